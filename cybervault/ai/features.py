@@ -0,0 +1,275 @@
+"""
+CyberVault Feature Store - Rolling per-user velocity aggregates for fraud scoring
+Each user owns one row in fixed-width NumPy arrays: 5-minute buckets for the last hour,
+hourly buckets for the last day, the last transaction time and a running (Welford)
+amount mean/variance. Rows are updated incrementally from newly inserted transactions,
+read in O(1) per transaction, and checkpointed to an .npz file.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from backend.db import as_bytes
+
+FEATURE_NAMES = ('amount', 'type', 'hour', 'count_1h', 'sum_1h', 'count_24h', 'sum_24h', 'since_last', 'amount_z')
+MINUTE_BUCKET = 300
+MINUTE_BUCKETS = 12
+HOUR_BUCKET = 3600
+HOUR_BUCKETS = 24
+# since_last for a user with no history
+NO_HISTORY = -1.0
+SYNC_BATCH = 5000
+# Rounds with fewer rows are folded in one by one; numpy overhead outweighs vectorizing them
+VECTOR_MIN_ROWS = 16
+CHECKPOINT_INTERVAL = 60.0
+FORMAT_VERSION = 1
+
+# Epoch seconds for an ISO-8601 timestamp (naive means UTC), or None
+def parse_timestamp(value):
+    try:
+        ts = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+# (amount, type) of a transaction payload; raises on malformed amounts
+def base_features(transaction):
+    amount = int(transaction.get('amount', 0))
+    tx_type = 0 if transaction.get('type', 'loan') == 'loan' else 1
+    return amount, tx_type
+
+# Positions grouped into rounds in which every user appears at most once; round k holds
+# each user's k-th transaction, so replaying rounds in order preserves per-user order
+def user_rounds(user_ids):
+    seen = {}
+    rounds = []
+    for pos, user_id in enumerate(user_ids):
+        k = seen.get(user_id, 0)
+        seen[user_id] = k + 1
+        if k == len(rounds):
+            rounds.append([])
+        rounds[k].append(pos)
+    return rounds
+
+class FeatureStore:
+    ARRAYS = ('minute_epoch', 'minute_count', 'minute_sum', 'hour_epoch', 'hour_count', 'hour_sum',
+              'last_ts', 'n', 'mean', 'm2')
+
+    def __init__(self, capacity=1024, pool=None, cipher=None, path=None):
+        self.pool = pool
+        self.cipher = cipher
+        self.path = path
+        self.slots = {}
+        self.last_id = 0
+        # Rows sync() could not decrypt or parse; they are passed over, not retried
+        self.skipped_rows = 0
+        self._lock = threading.Lock()
+        self._saved = time.monotonic()
+        self._dirty = False
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.minute_epoch = np.full((capacity, MINUTE_BUCKETS), -1, dtype=np.int64)
+        self.minute_count = np.zeros((capacity, MINUTE_BUCKETS), dtype=np.int32)
+        self.minute_sum = np.zeros((capacity, MINUTE_BUCKETS))
+        self.hour_epoch = np.full((capacity, HOUR_BUCKETS), -1, dtype=np.int64)
+        self.hour_count = np.zeros((capacity, HOUR_BUCKETS), dtype=np.int32)
+        self.hour_sum = np.zeros((capacity, HOUR_BUCKETS))
+        self.last_ts = np.zeros(capacity)
+        self.n = np.zeros(capacity, dtype=np.int64)
+        self.mean = np.zeros(capacity)
+        self.m2 = np.zeros(capacity)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _slot(self, user_id):
+        slot = self.slots.get(user_id)
+        if slot is None:
+            slot = len(self.slots)
+            if slot == len(self.n):
+                old = {name: getattr(self, name) for name in self.ARRAYS}
+                self._allocate(2 * slot)
+                for name, array in old.items():
+                    getattr(self, name)[:slot] = array
+            self.slots[user_id] = slot
+        return slot
+
+    # Fold one transaction into its user's aggregates; O(1)
+    def observe(self, user_id, amount, ts):
+        with self._lock:
+            self._observe(user_id, float(amount), ts)
+
+    def _observe(self, user_id, amount, ts):
+        i = self._slot(user_id)
+        for epoch, count, total, width, buckets in ((self.minute_epoch, self.minute_count, self.minute_sum, MINUTE_BUCKET, MINUTE_BUCKETS),
+                                                    (self.hour_epoch, self.hour_count, self.hour_sum, HOUR_BUCKET, HOUR_BUCKETS)):
+            b = int(ts // width)
+            k = b % buckets
+            if epoch[i, k] < b:
+                epoch[i, k], count[i, k], total[i, k] = b, 0, 0.0
+            # A late event whose bucket has already been reused is outside every window
+            if epoch[i, k] == b:
+                count[i, k] += 1
+                total[i, k] += amount
+        self.last_ts[i] = max(self.last_ts[i], ts) if self.n[i] else ts
+        self.n[i] += 1
+        delta = amount - self.mean[i]
+        self.mean[i] += delta / self.n[i]
+        self.m2[i] += delta * (amount - self.mean[i])
+        self._dirty = True
+
+    # Same update as _observe for rows whose users are all distinct, as array operations
+    def _observe_distinct(self, user_ids, amounts, ts):
+        i = np.fromiter((self._slot(u) for u in user_ids), dtype=np.int64, count=len(user_ids))
+        for epoch, count, total, width, buckets in ((self.minute_epoch, self.minute_count, self.minute_sum, MINUTE_BUCKET, MINUTE_BUCKETS),
+                                                    (self.hour_epoch, self.hour_count, self.hour_sum, HOUR_BUCKET, HOUR_BUCKETS)):
+            b = (ts // width).astype(np.int64)
+            k = b % buckets
+            stale = epoch[i, k] < b
+            epoch[i[stale], k[stale]] = b[stale]
+            count[i[stale], k[stale]] = 0
+            total[i[stale], k[stale]] = 0.0
+            live = epoch[i, k] == b
+            count[i[live], k[live]] += 1
+            total[i[live], k[live]] += amounts[live]
+        self.last_ts[i] = np.where(self.n[i] > 0, np.maximum(self.last_ts[i], ts), ts)
+        self.n[i] += 1
+        delta = amounts - self.mean[i]
+        self.mean[i] += delta / self.n[i]
+        self.m2[i] += delta * (amounts - self.mean[i])
+        self._dirty = True
+
+    # Fold rows in arrival order (caller holds the lock)
+    def _observe_rows(self, user_ids, amounts, ts, rounds=None):
+        for rnd in rounds if rounds is not None else user_rounds(user_ids):
+            if len(rnd) < VECTOR_MIN_ROWS:
+                for pos in rnd:
+                    self._observe(user_ids[pos], float(amounts[pos]), float(ts[pos]))
+            else:
+                self._observe_distinct([user_ids[pos] for pos in rnd], amounts[rnd], ts[rnd])
+
+    # Feature rows exactly as they would have been served for transactions arriving in this
+    # order, folding each one in afterwards; vectorized per round of distinct users
+    def replay(self, user_ids, amounts, types, timestamps):
+        user_ids = list(user_ids)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        types = np.asarray(types)
+        ts = np.asarray(timestamps, dtype=np.float64)
+        out = np.empty((len(user_ids), len(FEATURE_NAMES)))
+        for rnd in user_rounds(user_ids):
+            users = [user_ids[pos] for pos in rnd]
+            out[rnd] = self.matrix(users, amounts[rnd], types[rnd], ts[rnd])
+            with self._lock:
+                self._observe_rows(users, amounts[rnd], ts[rnd], [list(range(len(rnd)))])
+        return out
+
+    # Feature rows (len(FEATURE_NAMES) columns) for transactions scored against history so far
+    def matrix(self, user_ids, amounts, types, timestamps):
+        amounts = np.asarray(amounts, dtype=np.float64)
+        ts = np.asarray(timestamps, dtype=np.float64)
+        out = np.zeros((len(amounts), len(FEATURE_NAMES)))
+        out[:, 0] = amounts
+        out[:, 1] = types
+        out[:, 2] = (ts // HOUR_BUCKET) % 24
+        out[:, 7] = NO_HISTORY
+        with self._lock:
+            slots = np.array([self.slots.get(u, -1) for u in user_ids], dtype=np.int64)
+            known = np.flatnonzero(slots >= 0)
+            if len(known) == 0:
+                return out
+            i, t, amount = slots[known], ts[known], amounts[known]
+            for col, epoch, count, total, width, buckets in ((3, self.minute_epoch, self.minute_count, self.minute_sum, MINUTE_BUCKET, MINUTE_BUCKETS),
+                                                             (5, self.hour_epoch, self.hour_count, self.hour_sum, HOUR_BUCKET, HOUR_BUCKETS)):
+                b = (t // width).astype(np.int64)[:, None]
+                e = epoch[i]
+                live = (e > b - buckets) & (e <= b)
+                out[known, col] = (count[i] * live).sum(axis=1)
+                out[known, col + 1] = (total[i] * live).sum(axis=1)
+            out[known, 7] = np.maximum(t - self.last_ts[i], 0)
+            n = self.n[i]
+            std = np.sqrt(np.divide(self.m2[i], n - 1, out=np.zeros(len(i)), where=n > 1))
+            out[known, 8] = np.divide(amount - self.mean[i], std, out=np.zeros(len(i)), where=std > 0)
+        return out
+
+    # Catch up from transactions inserted since the last sync (rows with id > last_id)
+    def sync(self):
+        if self.pool is None:
+            return
+        conn = self.pool.connection()
+        with self._lock:
+            while True:
+                rows = conn.execute('SELECT id, user_id, data, timestamp FROM transactions WHERE id > ? ORDER BY id LIMIT ?',
+                                    (self.last_id, SYNC_BATCH)).fetchall()
+                if not rows:
+                    break
+                plain = self._decrypt_rows(rows)
+                now = time.time()
+                users, amounts, times = [], [], []
+                for (_, user_id, _, timestamp), data in zip(rows, plain):
+                    try:
+                        amount = float(json.loads(data).get('amount', 0))
+                    except (AttributeError, TypeError, ValueError):
+                        self.skipped_rows += 1
+                        continue
+                    ts = parse_timestamp(timestamp)
+                    users.append(user_id)
+                    amounts.append(amount)
+                    times.append(now if ts is None else ts)
+                self._observe_rows(users, np.array(amounts), np.array(times))
+                self.last_id = rows[-1][0]
+                self._dirty = True
+            if self.path and self._dirty and time.monotonic() - self._saved >= CHECKPOINT_INTERVAL:
+                self._save(self.path)
+
+    # Plaintext per row, None where a payload does not decrypt; one bad row falls back to
+    # per-row decryption so it cannot hold back the rest of its batch (or last_id)
+    def _decrypt_rows(self, rows):
+        try:
+            return self.cipher.decrypt_many([as_bytes(r[2]) for r in rows])
+        except Exception:
+            pass
+        plain = []
+        for r in rows:
+            try:
+                plain.append(self.cipher.decrypt(as_bytes(r[2])))
+            except Exception:
+                plain.append(None)
+        return plain
+
+    def save(self, path=None):
+        with self._lock:
+            self._save(path or self.path)
+
+    # Atomic checkpoint: users, the covered row id and the live part of every array
+    def _save(self, path):
+        count = len(self.slots)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, version=np.int32(FORMAT_VERSION), last_id=np.int64(self.last_id),
+                     users=np.array(list(self.slots), dtype=str),
+                     **{name: getattr(self, name)[:count] for name in self.ARRAYS})
+        os.replace(tmp, path)
+        self._saved = time.monotonic()
+        self._dirty = False
+
+    # Resume from a checkpoint when one exists; rows inserted after it are picked up by sync()
+    @classmethod
+    def open(cls, path, pool=None, cipher=None):
+        store = cls(pool=pool, cipher=cipher, path=path)
+        if not os.path.exists(path):
+            return store
+        with np.load(path, allow_pickle=False) as f:
+            if int(f['version']) != FORMAT_VERSION:
+                return store
+            users = [str(u) for u in f['users']]
+            store._allocate(max(1024, 2 * len(users)))
+            for name in cls.ARRAYS:
+                getattr(store, name)[:len(users)] = f[name]
+            store.slots = {u: i for i, u in enumerate(users)}
+            store.last_id = int(f['last_id'])
+        return store
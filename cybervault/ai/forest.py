@@ -0,0 +1,87 @@
+"""
+CyberVault Compiled Forest - Flat NumPy form of a trained RandomForestClassifier
+Every tree is flattened into shared node arrays stored in an .npz file; batches are
+scored by stepping all samples through all trees at once, without scikit-learn.
+Usage: python ai/forest.py <model.joblib> <model.npz>
+"""
+import sys
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Flatten clf.estimators_ into one node table. Leaves point to themselves with an
+# infinite threshold, so traversal can run a fixed max_depth steps without masking.
+def export_forest(clf, path):
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    depth = 0
+    offset = 0
+    for estimator in clf.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        nodes = np.arange(n) + offset
+        features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        lefts.append(np.where(leaf, nodes, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(leaf, nodes, tree.children_right + offset).astype(np.int32))
+        # Per-node class distribution, normalized as in DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        values.append(value / np.where(totals == 0, 1, totals))
+        roots.append(offset)
+        depth = max(depth, tree.max_depth)
+        offset += n
+    np.savez(path, version=np.int32(FORMAT_VERSION), feature=np.concatenate(features),
+             threshold=np.concatenate(thresholds), left=np.concatenate(lefts), right=np.concatenate(rights),
+             value=np.concatenate(values), roots=np.array(roots, dtype=np.int32), depth=np.int32(depth),
+             classes=np.asarray(clf.classes_), n_features=np.int32(clf.n_features_in_))
+
+class CompiledForest:
+    def __init__(self, feature, threshold, left, right, value, roots, depth, classes, n_features):
+        self.feature = feature.astype(np.intp)
+        self.threshold = threshold
+        # children[2 * node + go_left]: one gather picks the branch
+        self.children = np.stack([right, left], axis=1).ravel().astype(np.intp)
+        self.value = value
+        self.roots = roots.astype(np.intp)
+        self.depth = int(depth)
+        self.classes = classes
+        self.n_features = int(n_features)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            if int(f['version']) != FORMAT_VERSION:
+                raise ValueError(f'Unsupported forest format {int(f["version"])}')
+            return cls(f['feature'], f['threshold'], f['left'], f['right'], f['value'], f['roots'],
+                       f['depth'], f['classes'], f['n_features'])
+
+    # Leaf node reached in every tree: (n_samples, n_trees)
+    def apply(self, X):
+        # scikit-learn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f'Expected {self.n_features} features, got shape {X.shape}')
+        n = len(X)
+        # Tree-major flat state; features are read column-major so each step is 1-D gathers
+        columns = X.T.ravel()
+        rows = np.tile(np.arange(n), len(self.roots))
+        node = np.repeat(self.roots, n)
+        for _ in range(self.depth):
+            go_left = columns[self.feature[node] * n + rows] <= self.threshold[node]
+            node = self.children[2 * node + go_left]
+        return node.reshape(len(self.roots), n).T
+
+    def predict_proba(self, X):
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: python ai/forest.py <model.joblib> <model.npz>')
+        exit(1)
+    import joblib
+    export_forest(joblib.load(sys.argv[1]), sys.argv[2])
+    print(f'Exported {sys.argv[1]} to {sys.argv[2]}')
@@ -1,25 +1,120 @@
 """
 CyberVault AI Fraud Detection - Real model loading and inference
+The model is loaded on first use: the compiled NumPy forest when exported, else the
+joblib pickle (which imports scikit-learn). Models take a prefix of the feature vector
+in ai/features.py, so models trained on fewer features keep working.
 """
-import joblib
-import numpy as np
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from ai.features import FeatureStore, base_features, parse_timestamp
+from ai.forest import CompiledForest
+from modules.batching import run_batches
 
+FOREST_PATH = os.path.join(os.path.dirname(__file__), 'fraud_model.npz')
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'fraud_model.joblib')
-if os.path.exists(MODEL_PATH):
-    clf = joblib.load(MODEL_PATH)
-else:
-    clf = None
-
-def predict_fraud(transaction):
-    # transaction: {amount, type}
-    if not clf:
-        return False
+_clf = None
+_loaded = False
+_load_lock = threading.Lock()
+# Per-user velocity aggregates; an empty store means every user is scored as new
+_store = FeatureStore(capacity=1)
+
+def get_model():
+    global _clf, _loaded
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                if os.path.exists(FOREST_PATH):
+                    _clf = CompiledForest.load(FOREST_PATH)
+                elif os.path.exists(MODEL_PATH):
+                    import joblib
+                    _clf = joblib.load(MODEL_PATH)
+                _loaded = True
+    return _clf
+
+def use_feature_store(store):
+    global _store
+    _store = store
+
+def _feature_count(clf):
+    return int(getattr(clf, 'n_features', None) or clf.n_features_in_)
+
+def predict_fraud(transaction, user_id=None, timestamp=None):
+    return predict_fraud_batch([transaction], [user_id], [timestamp])[0]
+
+# Score many transactions with one vectorized clf.predict call. Velocity features come
+# from the feature store, caught up first with rows inserted since the last batch.
+def predict_fraud_batch(transactions, user_ids=None, timestamps=None):
+    flags = [False] * len(transactions)
+    clf = get_model()
+    if clf is None:
+        return flags
+    user_ids = user_ids or [None] * len(transactions)
+    timestamps = timestamps or [None] * len(transactions)
+    now = time.time()
+    positions, users, amounts, types, times = [], [], [], [], []
+    for i, transaction in enumerate(transactions):
+        try:
+            amount, tx_type = base_features(transaction)
+        except Exception:
+            continue
+        ts = parse_timestamp(timestamps[i])
+        positions.append(i)
+        users.append(user_ids[i])
+        amounts.append(amount)
+        types.append(tx_type)
+        times.append(now if ts is None else ts)
+    if not positions:
+        return flags
+    try:
+        _store.sync()
+    except Exception:
+        pass  # score against the aggregates already held
     try:
-        amount = int(transaction.get('amount', 0))
-        tx_type = 0 if transaction.get('type', 'loan') == 'loan' else 1
-        hour = 12  # Placeholder: could be extracted from timestamp
-        X = np.array([[amount, tx_type, hour]])
-        return bool(clf.predict(X)[0])
+        rows = _store.matrix(users, amounts, types, times)
+        preds = clf.predict(rows[:, :_feature_count(clf)])
     except Exception:
-        return False
+        return flags
+    for i, pred in zip(positions, preds):
+        flags[i] = bool(pred)
+    return flags
+
+class _Request:
+    def __init__(self, transaction, user_id, timestamp):
+        self.transaction = transaction
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.future = Future()
+
+# Micro-batcher: concurrent callers are scored together after a short wait. A batch that
+# fails (e.g. the model cannot be loaded) fails its callers' futures with the error.
+class FraudBatcher:
+    def __init__(self, max_batch=256, max_delay=0.002):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='cybervault-fraud-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, transaction, user_id=None, timestamp=None):
+        request = _Request(transaction, user_id, timestamp)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, transaction, user_id=None, timestamp=None):
+        return self.submit(transaction, user_id, timestamp).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        run_batches(self._queue, self._score, self.max_batch, self.max_delay)
+
+    def _score(self, batch):
+        flags = predict_fraud_batch([r.transaction for r in batch], [r.user_id for r in batch],
+                                    [r.timestamp for r in batch])
+        for request, flag in zip(batch, flags):
+            request.future.set_result(flag)
@@ -0,0 +1,277 @@
+"""
+CyberVault Training Pipeline - Out-of-core fraud model training over the transactions table
+Rows are streamed from the database in id order, decrypted and parsed by a pool of worker
+processes, and replayed through a FeatureStore so every row gets the features it was (or
+would have been) served with. A warm-started forest grows a few trees (fitted in parallel)
+per bounded group of rows, so memory stays flat as the table grows. Each run is saved as a
+versioned artifact with a timing and memory report.
+Labels are ground truth from the fraud_labels table (confirmed fraud, chargebacks), never
+the model's own fraud_flag; unlabeled rows only feed the features of later rows.
+Usage: python ai/pipeline.py train <db_file> [fit_rows] [workers]
+       python ai/pipeline.py labels <db_file> <labels.csv>
+       python ai/pipeline.py promote <version>
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import csv
+import json
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ai.features import FEATURE_NAMES, FeatureStore, parse_timestamp
+from ai.forest import export_forest
+from ai.model import FOREST_PATH, MODEL_PATH
+try:
+    import resource
+except ImportError:
+    # Windows: no getrusage, so the report leaves peak RSS out
+    resource = None
+
+# Must match AES_KEY in backend/app.py
+AES_KEY = 'cybervault_super_secret_key'
+MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
+CHUNK_ROWS = 20000
+FIT_ROWS = 1000000
+TREES_PER_FIT = 10
+# A group missing a class keeps growing until it holds this many times fit_rows rows;
+# beyond that only its newest fit_rows rows are kept
+PENDING_ROWS_FACTOR = 4
+MAX_DEPTH = 6
+# Every HOLDOUT_EVERY-th row (up to HOLDOUT_MAX) is kept out of training for the report
+HOLDOUT_EVERY = 10
+HOLDOUT_MAX = 200000
+
+_cipher = None
+
+def _init_worker(key):
+    global _cipher
+    from backend.security import get_cipher
+    _cipher = get_cipher(key)
+
+# Worker side: encrypted payloads and timestamps -> (amount, type, epoch seconds); NaN amount marks a bad row
+def _decode_chunk(blobs, timestamps):
+    amounts = np.full(len(blobs), np.nan)
+    types = np.zeros(len(blobs), dtype=np.int8)
+    times = np.full(len(blobs), np.nan)
+    for i, (blob, timestamp) in enumerate(zip(blobs, timestamps)):
+        try:
+            data = json.loads(_cipher.decrypt(bytes.fromhex(blob) if isinstance(blob, str) else blob))
+            amounts[i] = int(data.get('amount', 0))
+            types[i] = 0 if data.get('type', 'loan') == 'loan' else 1
+        except Exception:
+            continue
+        ts = parse_timestamp(timestamp)
+        if ts is not None:
+            times[i] = ts
+    return amounts, types, times
+
+def _read_chunks(conn, chunk_rows, timings):
+    last_id = 0
+    while True:
+        start = time.perf_counter()
+        rows = conn.execute('SELECT t.id, t.user_id, t.data, t.timestamp, l.label FROM transactions t '
+                            'LEFT JOIN fraud_labels l ON l.transaction_id = t.id WHERE t.id > ? ORDER BY t.id LIMIT ?',
+                            (last_id, chunk_rows)).fetchall()
+        timings['read'] += time.perf_counter() - start
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+# Decoded chunks in id order, with at most `prefetch` chunks being decrypted at once
+def _decoded_chunks(conn, pool, chunk_rows, prefetch, timings):
+    pending = deque()
+    chunks = _read_chunks(conn, chunk_rows, timings)
+    for rows in chunks:
+        pending.append((rows, pool.submit(_decode_chunk, [r[2] for r in rows], [r[3] for r in rows])))
+        if len(pending) >= prefetch:
+            yield _collect(pending.popleft(), timings)
+    while pending:
+        yield _collect(pending.popleft(), timings)
+
+def _collect(item, timings):
+    rows, future = item
+    start = time.perf_counter()
+    decoded = future.result()
+    timings['decrypt_wait'] += time.perf_counter() - start
+    return rows, decoded
+
+# Balanced sample weights for one fit group, as class_weight='balanced' would give
+def _balanced_weights(y):
+    counts = np.bincount(y, minlength=2)
+    return (len(y) / (2 * counts))[y]
+
+# Refuse to train without ground truth: the table must exist and hold both classes
+def _check_labels(conn):
+    try:
+        counts = dict(conn.execute('SELECT label != 0, COUNT(*) FROM fraud_labels GROUP BY label != 0').fetchall())
+    except sqlite3.OperationalError:
+        raise ValueError('No fraud_labels table; run backend/migrations.py on the database and import labels '
+                         'with: python ai/pipeline.py labels <db_file> <labels.csv>') from None
+    if not counts.get(1) or not counts.get(0):
+        raise ValueError(f'fraud_labels needs both confirmed-fraud and legitimate rows '
+                         f'(has {counts.get(1, 0)} fraud, {counts.get(0, 0)} legitimate)')
+    return counts
+
+# Peak RSS in MB for RUSAGE_SELF / RUSAGE_CHILDREN, or None where getrusage is unavailable
+def _rss_mb(who):
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(getattr(resource, who)).ru_maxrss / 1024, 1)
+
+def train(db_file, fit_rows=FIT_ROWS, workers=None, chunk_rows=CHUNK_ROWS, models_dir=MODELS_DIR):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score, precision_score, recall_score
+    import joblib
+    workers = workers or os.cpu_count() or 2
+    started = time.perf_counter()
+    timings = {'read': 0.0, 'decrypt_wait': 0.0, 'features': 0.0, 'fit': 0.0, 'export': 0.0}
+    store = FeatureStore()
+    clf = RandomForestClassifier(n_estimators=0, max_depth=MAX_DEPTH, warm_start=True, n_jobs=-1)
+    group_X, group_y, group_size, group_fraud = [], [], 0, 0
+    holdout_X, holdout_y, holdout_size = [], [], 0
+    rows_seen = rows_used = fraud_rows = fits = dropped_rows = 0
+    last_ts = time.time()
+
+    def fit_group():
+        nonlocal group_X, group_y, group_size, group_fraud, fits, dropped_rows
+        # Both classes are needed in every fit; otherwise keep accumulating, up to a cap
+        if not 0 < group_fraud < group_size:
+            if group_size > PENDING_ROWS_FACTOR * fit_rows:
+                dropped_rows += group_size - fit_rows
+                group_X, group_y = [np.concatenate(group_X)[-fit_rows:]], [np.concatenate(group_y)[-fit_rows:]]
+                group_size, group_fraud = fit_rows, int(group_y[0].sum())
+            return
+        X, y = np.concatenate(group_X), np.concatenate(group_y)
+        start = time.perf_counter()
+        clf.n_estimators += TREES_PER_FIT
+        clf.fit(X, y, sample_weight=_balanced_weights(y))
+        timings['fit'] += time.perf_counter() - start
+        group_X, group_y, group_size, group_fraud = [], [], 0, 0
+        fits += 1
+
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        _check_labels(conn)
+    except ValueError:
+        conn.close()
+        raise
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(AES_KEY,)) as pool:
+        for rows, (amounts, types, times) in _decoded_chunks(conn, pool, chunk_rows, 2 * workers, timings):
+            start = time.perf_counter()
+            rows_seen += len(rows)
+            valid = np.flatnonzero(~np.isnan(amounts))
+            labeled = np.array([rows[i][4] is not None for i in valid], dtype=bool)
+            # Unparseable timestamps take the previous row's time (the server uses arrival time)
+            times = times[valid]
+            for i in np.flatnonzero(np.isnan(times)):
+                times[i] = times[i - 1] if i else last_ts
+            if len(times):
+                last_ts = times[-1]
+            users = [rows[i][1] for i in valid]
+            # Every row is replayed (it shapes later rows' features); only labeled rows are trained on
+            X = store.replay(users, amounts[valid], types[valid], times)[labeled].astype(np.float32)
+            labels = np.array([int(rows[i][4] != 0) for i in valid[labeled]], dtype=np.int64)
+            held = np.zeros(len(labels), dtype=bool)
+            if holdout_size < HOLDOUT_MAX:
+                held[(rows_used + np.arange(len(labels))) % HOLDOUT_EVERY == 0] = True
+                held[np.flatnonzero(held)[HOLDOUT_MAX - holdout_size:]] = False
+                holdout_X.append(X[held])
+                holdout_y.append(labels[held])
+                holdout_size += int(held.sum())
+            rows_used += len(labels)
+            fraud_rows += int(labels.sum())
+            group_X.append(X[~held])
+            group_y.append(labels[~held])
+            group_size += int((~held).sum())
+            group_fraud += int(labels[~held].sum())
+            timings['features'] += time.perf_counter() - start
+            if group_size >= fit_rows:
+                fit_group()
+        if group_size:
+            fit_group()
+    conn.close()
+    if not fits:
+        raise ValueError('No training group held both fraud and legitimate labeled rows')
+
+    start = time.perf_counter()
+    # Time-ordered and unique even for runs started in the same second; the artifacts are
+    # written to a scratch directory and renamed into place, so a version is never partial
+    version = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime()) + '-' + uuid.uuid4().hex[:8]
+    os.makedirs(models_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f'.{version}-', dir=models_dir)
+    export_forest(clf, os.path.join(tmp_dir, 'fraud_model.npz'))
+    joblib.dump(clf, os.path.join(tmp_dir, 'fraud_model.joblib'))
+    timings['export'] = time.perf_counter() - start
+
+    report = {
+        'version': version, 'db_file': os.path.abspath(db_file), 'features': list(FEATURE_NAMES),
+        'rows': rows_seen, 'rows_used': rows_used, 'fraud_rows': fraud_rows, 'holdout_rows': holdout_size,
+        'dropped_rows': dropped_rows,
+        'trees': clf.n_estimators, 'fits': fits, 'max_depth': MAX_DEPTH, 'fit_rows': fit_rows,
+        'chunk_rows': chunk_rows, 'workers': workers,
+        'seconds': {name: round(t, 3) for name, t in timings.items()},
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'peak_rss_mb': _rss_mb('RUSAGE_SELF'),
+        'worker_peak_rss_mb': _rss_mb('RUSAGE_CHILDREN'),
+    }
+    report['rows_per_second'] = round(rows_seen / report['total_seconds']) if report['total_seconds'] else None
+    if holdout_size:
+        X, y = np.concatenate(holdout_X), np.concatenate(holdout_y)
+        pred = clf.predict(X)
+        report['holdout'] = {'accuracy': round(accuracy_score(y, pred), 4), 'fraud_rows': int(y.sum()),
+                             'precision': round(precision_score(y, pred, zero_division=0), 4),
+                             'recall': round(recall_score(y, pred, zero_division=0), 4)}
+    with open(os.path.join(tmp_dir, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    out_dir = os.path.join(models_dir, version)
+    os.rename(tmp_dir, out_dir)
+    return out_dir, report
+
+# Import ground-truth labels from a CSV of transaction_id,label[,source] rows (a header
+# row is skipped); a later label for the same transaction replaces the earlier one
+def import_labels(db_file, csv_path):
+    from backend.migrations import migrate
+    conn = sqlite3.connect(db_file)
+    try:
+        migrate(conn)
+        now = time.time()
+        with open(csv_path, newline='') as f:
+            rows = [(int(r[0]), int(r[1]), r[2] if len(r) > 2 else None, now)
+                    for r in csv.reader(f) if r and r[0].strip().isdigit()]
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO fraud_labels (transaction_id, label, source, labeled_at) VALUES (?, ?, ?, ?)', rows)
+        return len(rows)
+    finally:
+        conn.close()
+
+# Make a trained version the model the backend loads (picked up on its next start)
+def promote(version, models_dir=MODELS_DIR):
+    src = os.path.join(models_dir, version)
+    shutil.copyfile(os.path.join(src, 'fraud_model.npz'), FOREST_PATH)
+    shutil.copyfile(os.path.join(src, 'fraud_model.joblib'), MODEL_PATH)
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'train':
+        fit_rows = int(sys.argv[3]) if len(sys.argv) > 3 else FIT_ROWS
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        out_dir, report = train(sys.argv[2], fit_rows, workers)
+        print(json.dumps(report, indent=2))
+        print(f'Saved {out_dir}')
+    elif len(sys.argv) == 4 and sys.argv[1] == 'labels':
+        print(f'Imported {import_labels(sys.argv[2], sys.argv[3])} labels')
+    elif len(sys.argv) == 3 and sys.argv[1] == 'promote':
+        promote(sys.argv[2])
+        print(f'Promoted {sys.argv[2]}')
+    else:
+        print('Usage: python ai/pipeline.py train <db_file> [fit_rows] [workers]\n'
+              '       python ai/pipeline.py labels <db_file> <labels.csv>\n'
+              '       python ai/pipeline.py promote <version>')
+        exit(1)
@@ -1,21 +1,55 @@
 """
-Train a Random Forest model for fraud detection on synthetic data and export with joblib
+Train a Random Forest model for fraud detection on synthetic per-user transaction streams and export it with
+joblib and as a compiled NumPy forest (ai/fraud_model.npz, what the backend loads)
 """
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+from sklearn.metrics import accuracy_score, recall_score
 import numpy as np
 import joblib
+from ai.features import FEATURE_NAMES, FeatureStore
+from ai.forest import export_forest
+from ai.model import FOREST_PATH, MODEL_PATH
 
-# Generate synthetic data: [amount, type (0=loan, 1=payment), time_of_day], label (0=not fraud, 1=fraud)
-X = np.random.randint(1, 10000, (1000, 1))
-types = np.random.randint(0, 2, (1000, 1))
-times = np.random.randint(0, 24, (1000, 1))
-X = np.hstack([X, types, times])
-y = ((X[:,0] > 8000) & (X[:,1] == 0) & (X[:,2] < 6)).astype(int)  # High loan at night = fraud
+USERS = 300
+DAYS = 14
+rng = np.random.default_rng()
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
-clf = RandomForestClassifier(n_estimators=10, max_depth=4)
+# Synthetic streams: (timestamp, user, amount, type, label). Each user has a typical amount and
+# daytime habits; fraud is a burst of transactions, an amount spike, or a large loan at night.
+def synthetic_events():
+    events = []
+    span = DAYS * 86400
+    for user in range(USERS):
+        typical = rng.lognormal(5, 1)
+        for _ in range(rng.poisson(3 * DAYS)):
+            ts = rng.integers(0, DAYS) * 86400 + rng.normal(14, 3) % 24 * 3600
+            events.append((ts, user, max(1, int(rng.normal(typical, typical / 4))), int(rng.integers(0, 2)), 0))
+        if rng.random() < 0.3:
+            start = rng.uniform(0, span)
+            for ts in start + np.sort(rng.uniform(0, 900, rng.integers(5, 10))):
+                events.append((ts, user, max(1, int(rng.normal(typical, typical / 4))), 1, 1))
+        if rng.random() < 0.3:
+            events.append((rng.uniform(0, span), user, int(typical * rng.uniform(10, 30)), int(rng.integers(0, 2)), 1))
+        if rng.random() < 0.2:
+            events.append((rng.integers(0, DAYS) * 86400 + rng.uniform(0, 6 * 3600), user, int(rng.integers(8001, 10000)), 0, 1))
+    events.sort()
+    return events
+
+# Features exactly as served: each transaction against its user's history so far
+def build_dataset(events):
+    ts, users, amounts, types, labels = zip(*events)
+    return FeatureStore().replay(users, amounts, types, ts), np.array(labels)
+
+X, y = build_dataset(synthetic_events())
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y)
+clf = RandomForestClassifier(n_estimators=25, max_depth=6, class_weight='balanced')
 clf.fit(X_train, y_train)
-print('Accuracy:', accuracy_score(y_test, clf.predict(X_test)))
-joblib.dump(clf, 'fraud_model.joblib')
+pred = clf.predict(X_test)
+print(f'Transactions: {len(y)} ({y.sum()} fraud), features: {", ".join(FEATURE_NAMES)}')
+print('Accuracy:', accuracy_score(y_test, pred), 'Fraud recall:', recall_score(y_test, pred))
+joblib.dump(clf, MODEL_PATH)
+export_forest(clf, FOREST_PATH)
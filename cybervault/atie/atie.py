@@ -5,8 +5,10 @@ Modular for integration with CyberVault backend.
 """
 import json
 import os
+import threading
 
 THREAT_DB = 'atie_threat_db.json'
+GRAM_SIZE = 8
 
 # Load or initialize local threat signature database
 def load_threat_db():
@@ -18,16 +20,82 @@ def load_threat_db():
 def save_threat_db(db):
     with open(THREAT_DB, 'w') as f:
         json.dump(db, f)
+    _invalidate_matcher()
+
+# Multi-pattern matcher compiled from the signature list (Wu-Manber style):
+# long signatures are indexed by their first GRAM_SIZE chars, so a scan costs one
+# dict lookup per text position instead of one substring search per signature.
+class SignatureMatcher:
+    def __init__(self, signatures, gram=GRAM_SIZE):
+        self.gram = gram
+        self.index = {}
+        self.short = {}
+        for sig in signatures:
+            if not sig:
+                continue
+            if len(sig) >= gram:
+                self.index.setdefault(sig[:gram], []).append(sig)
+            else:
+                self.short.setdefault(len(sig), set()).add(sig)
+
+    # First signature found in text, or None
+    def search(self, text):
+        gram, index = self.gram, self.index
+        if index:
+            for i in range(len(text) - gram + 1):
+                candidates = index.get(text[i:i + gram])
+                if candidates:
+                    for sig in candidates:
+                        if text.startswith(sig, i):
+                            return sig
+        for length, sigs in self.short.items():
+            for i in range(len(text) - length + 1):
+                if text[i:i + length] in sigs:
+                    return text[i:i + length]
+        return None
+
+# Compiled matcher cache: rebuilt when the DB file changes on disk or a new
+# signature version is saved by this process
+_matcher_lock = threading.Lock()
+_matcher_key = None
+_matcher = None
+
+def get_matcher():
+    global _matcher_key, _matcher
+    try:
+        st = os.stat(THREAT_DB)
+        file_key = (THREAT_DB, st.st_mtime_ns, st.st_size)
+    except OSError:
+        file_key = (THREAT_DB, None, None)
+    with _matcher_lock:
+        if _matcher is None or _matcher_key != file_key:
+            _matcher = SignatureMatcher(load_threat_db()['signatures'])
+            _matcher_key = file_key
+        return _matcher
+
+def _invalidate_matcher():
+    global _matcher
+    with _matcher_lock:
+        _matcher = None
 
 # Analyze transaction and device logs for new threats
 def analyze_threats(transaction, device_logs=None):
-    db = load_threat_db()
     # Simple check: flag if transaction matches any known bad signature
-    for sig in db['signatures']:
-        if sig in json.dumps(transaction):
-            return {'threat_score': 100, 'action': 'quarantine'}
+    if get_matcher().search(json.dumps(transaction)) is not None:
+        return {'threat_score': 100, 'action': 'quarantine'}
     return {'threat_score': 0, 'action': 'allow'}
 
+# Batch variant: one matcher lookup for the whole list
+def analyze_threats_many(transactions):
+    matcher = get_matcher()
+    results = []
+    for transaction in transactions:
+        if matcher.search(json.dumps(transaction)) is not None:
+            results.append({'threat_score': 100, 'action': 'quarantine'})
+        else:
+            results.append({'threat_score': 0, 'action': 'allow'})
+    return results
+
 # Federated learning stub: update local model and sync with peers
 def federated_update(local_model_update):
     # Placeholder: merge local update, sync with peers when online
@@ -38,6 +106,7 @@ def add_threat_signature(signature):
     db = load_threat_db()
     if signature not in db['signatures']:
         db['signatures'].append(signature)
+        db['version'] = db.get('version', 1) + 1
         save_threat_db(db)
         return True
     return False
@@ -4,53 +4,219 @@ CyberVault Backend - REST API, Blockchain, AI Fraud Detection
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-import http.server
-import socketserver
 import sqlite3
 import hashlib
 import json
-import secrets
-import base64
+import threading
 from urllib.parse import parse_qs, urlparse
-from security import AESCipher, verify_pin
+from security import get_cipher, verify_pin
 from identity import create_user_id, authenticate_user
-from blockchain.blockchain import Block
-from ai.model import predict_fraud
+from blockchain.producer import BlockProducer, inclusion_proof
+from blockchain.validator import FullValidationJob, init_checkpoints, validate_chain
+from modules.consensus import MerkleLedger
+from reputation.reputation import calculate_reputation, index_sealed_reputation, init_reputation_index, query_reputation_from_chain, reputation_committed, store_reputation_on_chain
+from ai.features import FeatureStore
+from ai.model import FraudBatcher, use_feature_store
 from post_quantum import encrypt_post_quantum, decrypt_post_quantum
 from zkp import prove_loan_eligibility, verify_loan_proof
+from server import BoundedThreadPoolServer, KeepAliveHandler
+from static import CACHE_CONTROL, StaticCache, choose_encoding
+from db import ConnectionPool, row_to_json
+from migrations import migrate
+from mesh import INSERT_TRANSACTION, MeshDigest, backfill_content_ids, pull_from_peer, reconcile, store_transactions, transaction_id
+from writer import GroupCommitWriter
+from sessions import SessionStore
 
-PORT = 8080
+PORT = int(os.environ.get('CYBERVAULT_PORT', 8080))
+MAX_WORKERS = int(os.environ.get('CYBERVAULT_WORKERS', 8))
+QUEUE_DEPTH = int(os.environ.get('CYBERVAULT_QUEUE_DEPTH', 64))
+KEEPALIVE_TIMEOUT = int(os.environ.get('CYBERVAULT_KEEPALIVE_TIMEOUT', 15))
+REQUEST_TIMEOUT = int(os.environ.get('CYBERVAULT_REQUEST_TIMEOUT', 5))
+WRITE_BATCH_ROWS = int(os.environ.get('CYBERVAULT_WRITE_BATCH_ROWS', 500))
+WRITE_BATCH_MS = float(os.environ.get('CYBERVAULT_WRITE_BATCH_MS', 5))
+FRAUD_BATCH_SIZE = int(os.environ.get('CYBERVAULT_FRAUD_BATCH_SIZE', 256))
+FRAUD_BATCH_MS = float(os.environ.get('CYBERVAULT_FRAUD_BATCH_MS', 2))
+BLOCK_MAX_ITEMS = int(os.environ.get('CYBERVAULT_BLOCK_MAX_ITEMS', 256))
+BLOCK_MAX_MS = float(os.environ.get('CYBERVAULT_BLOCK_MAX_MS', 50))
+SESSION_TTL = int(os.environ.get('CYBERVAULT_SESSION_TTL', 8 * 3600))
+MAX_SESSIONS = int(os.environ.get('CYBERVAULT_MAX_SESSIONS', 100000))
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_FETCH_SIZE = 500
+
+# Keyset-paginated listing: (table, response key, {query param: SQL filter})
+LISTINGS = {
+    '/blockchain': ('blockchain', 'blockchain', {}),
+    '/transactions': ('transactions', 'transactions', {
+        'user_id': 'user_id = ?',
+        'status': 'status = ?',
+        'since': 'timestamp >= ?',
+        'until': 'timestamp < ?',
+    }),
+}
 DB_FILE = 'cybervault.db'
+FEATURES_FILE = 'cybervault.features.npz'
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../frontend'))
 AES_KEY = 'cybervault_super_secret_key'
+CIPHER = get_cipher(AES_KEY)
+
+db = ConnectionPool(DB_FILE)
+static_assets = StaticCache(STATIC_DIR)
 
 # Initialize DB
-conn = sqlite3.connect(DB_FILE)
-c = conn.cursor()
-c.execute('''CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, pin_hash TEXT)''')
-c.execute('''CREATE TABLE IF NOT EXISTS transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, data TEXT, status TEXT, fraud_flag INTEGER, timestamp TEXT)''')
-c.execute('''CREATE TABLE IF NOT EXISTS blockchain (id INTEGER PRIMARY KEY, block_hash TEXT, prev_hash TEXT, data TEXT, timestamp TEXT)''')
-conn.commit()
-conn.close()
-
-class CyberVaultHandler(http.server.BaseHTTPRequestHandler):
-    def _set_headers(self, code=200):
+conn = db.connection()
+if any(version == 3 for version, _ in migrate(conn)):
+    backfill_content_ids(conn, CIPHER)
+init_reputation_index(AES_KEY, conn)
+init_checkpoints(conn)
+
+# Transaction ingest goes through one group-committing writer thread
+writer = GroupCommitWriter(db, max_batch=WRITE_BATCH_ROWS, max_delay=WRITE_BATCH_MS / 1000)
+# Bearer tokens are checked in memory; logins and revocations persist through the writer
+sessions = SessionStore(writer, ttl=SESSION_TTL, max_sessions=MAX_SESSIONS)
+sessions.load(conn)
+# Per-user velocity features: resumed from the checkpoint, then caught up from the table
+feature_store = FeatureStore.open(FEATURES_FILE, db, CIPHER)
+feature_store.sync()
+use_feature_store(feature_store)
+fraud_batcher = FraudBatcher(max_batch=FRAUD_BATCH_SIZE, max_delay=FRAUD_BATCH_MS / 1000)
+mesh_digest = MeshDigest(db)
+mesh_digest.sync()
+# Chain appends (blocks, reputation updates, transaction anchors) are packed into Merkle-rooted blocks
+producer = BlockProducer(db, CIPHER, max_items=BLOCK_MAX_ITEMS, max_delay=BLOCK_MAX_MS / 1000,
+                         on_seal=index_sealed_reputation, on_commit=reputation_committed)
+# Full chain revalidation runs in a separate process, never on a request thread
+full_validation = FullValidationJob(DB_FILE, AES_KEY)
+
+# Merkle summary of the chain for peer comparison; block i is the i-th row by id.
+# Caught up from new rows on demand, so blocks added by any module are covered.
+chain_ledger = MerkleLedger()
+chain_ledger_ids = []
+chain_ledger_lock = threading.Lock()
+
+def sync_chain_ledger():
+    with chain_ledger_lock:
+        last_id = chain_ledger_ids[-1] if chain_ledger_ids else 0
+        c = db.connection().execute('SELECT id, block_hash FROM blockchain WHERE id > ? ORDER BY id', (last_id,))
+        for row_id, block_hash in c:
+            chain_ledger.append(block_hash)
+            chain_ledger_ids.append(row_id)
+    return chain_ledger
+
+# JSON error for a failed group-commit write: a busy or locked database is transient (503,
+# the client may retry); anything else failed the write outright (500)
+def storage_error(e):
+    if isinstance(e, sqlite3.OperationalError):
+        return {'error': f'Database busy, retry later: {e}'}, 503
+    return {'error': f'Could not store transaction: {e}'}, 500
+
+class CyberVaultHandler(KeepAliveHandler):
+    # HTTP/1.1 keep-alive: every response must carry a Content-Length.
+    # Idle connections wait in the server's selector; timeout bounds reads within a request.
+    protocol_version = 'HTTP/1.1'
+    timeout = REQUEST_TIMEOUT
+    disable_nagle_algorithm = True
+
+    def _set_headers(self, code=200, length=0, content_type='application/json', chunked=False):
         self.send_response(code)
-        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-type', content_type)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        elif length is not None:
+            self.send_header('Content-Length', str(length))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
         self.end_headers()
 
+    def _send_json(self, response, code=200):
+        body = json.dumps(response).encode()
+        self._set_headers(code, len(body))
+        self.wfile.write(body)
+
+    # Write cursor rows as NDJSON, one fetchmany() batch per chunk
+    def _stream_ndjson(self, cursor):
+        chunked = self.request_version != 'HTTP/1.0'
+        if not chunked:
+            # HTTP/1.0 has no chunked encoding: delimit the body by closing
+            self.close_connection = True
+        self._set_headers(200, None, 'application/x-ndjson', chunked=chunked)
+        while True:
+            rows = cursor.fetchmany(STREAM_FETCH_SIZE)
+            if not rows:
+                break
+            chunk = ''.join(json.dumps(row_to_json(row)) + '\n' for row in rows).encode()
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+
+    # GET /blockchain, /transactions: ?after_id=&limit= plus filters; format=ndjson streams
+    def _list_rows(self, path, query, fixed=None):
+        table, key, filters = LISTINGS[path]
+        params = {name: values[0] for name, values in parse_qs(query).items()}
+        params.update(fixed or {})
+        stream = params.get('format') == 'ndjson'
+        try:
+            after_id = int(params.get('after_id', 0))
+            limit = int(params['limit']) if 'limit' in params else (None if stream else DEFAULT_PAGE_SIZE)
+        except ValueError:
+            self._send_json({'error': 'after_id and limit must be integers'}, 400)
+            return
+        if limit is not None:
+            # Pages are capped; streams may ask for any number of rows
+            limit = max(1, limit if stream else min(limit, MAX_PAGE_SIZE))
+        clauses, args = ['id > ?'], [after_id]
+        for name, clause in filters.items():
+            if name in params:
+                clauses.append(clause)
+                args.append(params[name])
+        sql = f'SELECT * FROM {table} WHERE {" AND ".join(clauses)} ORDER BY id ASC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        c = db.connection().cursor()
+        c.execute(sql, args)
+        if stream:
+            try:
+                self._stream_ndjson(c)
+            finally:
+                c.close()
+            return
+        rows = [row_to_json(row) for row in c.fetchall()]
+        next_after_id = rows[-1][0] if len(rows) == limit else None
+        self._send_json({key: rows, 'next_after_id': next_after_id})
+
     def do_OPTIONS(self):
         self._set_headers(200)
 
+    def _bearer_token(self):
+        return self.headers.get('Authorization', '').replace('Bearer ', '')
+
+    # user_id of the request's session, or None after sending 401
     def _require_token(self):
-        token = self.headers.get('Authorization', '').replace('Bearer ', '')
-        if not token or len(token) < 10:
-            self._set_headers(401)
-            self.wfile.write(json.dumps({'error': 'Unauthorized'}).encode())
-            return False
-        return True
+        user_id = sessions.validate(self._bearer_token())
+        if user_id is None:
+            self._send_json({'error': 'Unauthorized'}, 401)
+        return user_id
+
+    # Score, store and anchor a new transaction. If a concurrent duplicate is stored first,
+    # the insert is ignored and the transaction is not anchored a second time.
+    def _ingest_transaction(self, user_id, tx_data, timestamp, cid):
+        try:
+            # Fraud detection (micro-batched with concurrent requests)
+            fraud_flag = int(fraud_batcher.predict(tx_data, user_id, timestamp))
+        except Exception as e:
+            return {'error': f'Fraud scoring unavailable: {e}'}, 503
+        enc_data = CIPHER.encrypt(json.dumps(tx_data))
+        try:
+            inserted = writer.execute(INSERT_TRANSACTION, (user_id, enc_data, 'queued', fraud_flag, timestamp, cid))
+        except Exception as e:
+            return storage_error(e)
+        if inserted is None:
+            return {'status': 'duplicate', 'fraud_flag': fraud_flag}, 200
+        # Anchor the transaction's content id on the chain; sealed in the background
+        producer.submit('transaction', {'content_id': cid}, timestamp)
+        return {'status': 'queued', 'fraud_flag': fraud_flag}, 200
 
     def do_POST(self):
         length = int(self.headers.get('Content-Length', 0))
@@ -70,11 +236,9 @@ class CyberVaultHandler(http.server.BaseHTTPRequestHandler):
                 user_id = create_user_id(username)
                 pin_hash = hashlib.sha256(pin.encode()).hexdigest()
                 try:
-                    conn = sqlite3.connect(DB_FILE)
-                    c = conn.cursor()
-                    c.execute('INSERT INTO users (id, pin_hash) VALUES (?, ?)', (user_id, pin_hash))
-                    conn.commit()
-                    conn.close()
+                    conn = db.connection()
+                    with conn:
+                        conn.execute('INSERT INTO users (id, pin_hash) VALUES (?, ?)', (user_id, pin_hash))
                     response = {'status': 'registered', 'user_id': user_id}
                 except sqlite3.IntegrityError:
                     response = {'error': 'User already exists'}
@@ -84,20 +248,21 @@ class CyberVaultHandler(http.server.BaseHTTPRequestHandler):
             username = data.get('username')
             pin = data.get('pin')
             user_id = create_user_id(username)
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT pin_hash FROM users WHERE id=?', (user_id,))
-            row = c.fetchone()
-            conn.close()
+            row = db.connection().execute('SELECT pin_hash FROM users WHERE id=?', (user_id,)).fetchone()
             if row and verify_pin(pin, row[0]):
-                token = base64.urlsafe_b64encode(secrets.token_bytes(24)).decode()
+                token = sessions.create(user_id)
                 response = {'status': 'authenticated', 'token': token, 'user_id': user_id}
             else:
                 response = {'error': 'Invalid credentials'}
                 code = 401
 
+        elif path == '/logout':
+            sessions.revoke(self._bearer_token())
+            response = {'status': 'logged out'}
+
         elif path == '/transaction':
-            if not self._require_token():
+            session_user = self._require_token()
+            if not session_user:
                 return
             user_id = data.get('user_id')
             tx_data = data.get('data')
@@ -105,61 +270,42 @@ class CyberVaultHandler(http.server.BaseHTTPRequestHandler):
             if not user_id or not tx_data or not timestamp:
                 response = {'error': 'Missing fields'}
                 code = 400
+            elif user_id != session_user:
+                response = {'error': 'Token does not belong to user_id'}
+                code = 403
             else:
-                # Fraud detection
-                fraud_flag = int(predict_fraud(tx_data))
-                # Encrypt transaction data
-                aes = AESCipher(AES_KEY)
-                enc_data = aes.encrypt(json.dumps(tx_data)).hex()
-                conn = sqlite3.connect(DB_FILE)
-                c = conn.cursor()
-                c.execute('INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?)',
-                          (user_id, enc_data, 'queued', fraud_flag, timestamp))
-                conn.commit()
-                conn.close()
-                response = {'status': 'queued', 'fraud_flag': fraud_flag}
+                cid = transaction_id(data)
+                existing = db.connection().execute('SELECT fraud_flag FROM transactions WHERE content_id=?', (cid,)).fetchone()
+                if existing:
+                    # A retried or replayed submission: already stored, scored and anchored
+                    response = {'status': 'duplicate', 'fraud_flag': existing[0]}
+                else:
+                    response, code = self._ingest_transaction(user_id, tx_data, timestamp, cid)
 
         elif path == '/blockchain/add':
             if not self._require_token():
                 return
             block_data = data.get('data')
-            prev_hash = data.get('prev_hash', '')
             timestamp = data.get('timestamp')
             if not block_data or not timestamp:
                 response = {'error': 'Missing fields'}
                 code = 400
             else:
-                # Encrypt block data
-                aes = AESCipher(AES_KEY)
-                enc_block_data = aes.encrypt(json.dumps(block_data)).hex()
-                conn = sqlite3.connect(DB_FILE)
-                c = conn.cursor()
-                c.execute('SELECT block_hash FROM blockchain ORDER BY id DESC LIMIT 1')
-                last = c.fetchone()
-                prev_hash = last[0] if last else ''
-                block = Block(index=0, previous_hash=prev_hash, timestamp=timestamp, data=enc_block_data)
-                c.execute('INSERT INTO blockchain (block_hash, prev_hash, data, timestamp) VALUES (?, ?, ?, ?)',
-                          (block.hash, prev_hash, enc_block_data, timestamp))
-                conn.commit()
-                conn.close()
-                response = {'status': 'block_added', 'block_hash': block.hash}
+                # Packed with other pending items into the next sealed block
+                sealed = producer.add('block', block_data, timestamp)
+                response = {'status': 'block_added', 'block_hash': sealed['block_hash'], 'position': sealed['position'],
+                            'merkle_root': sealed['merkle_root'], 'proof': sealed['proof']}
 
         elif path == '/blockchain/validate':
-            # Validate blockchain integrity
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT * FROM blockchain ORDER BY id ASC')
-            blocks = c.fetchall()
-            conn.close()
-            valid = True
-            prev_hash = ''
-            for block in blocks:
-                block_hash, block_prev_hash, enc_data, timestamp = block[1], block[2], block[3], block[4]
-                if block_prev_hash != prev_hash:
-                    valid = False
-                    break
-                prev_hash = block_hash
-            response = {'valid': valid, 'length': len(blocks)}
+            # Validate blockchain integrity incrementally from the last signed checkpoint.
+            # {"full": true} also starts a background re-check of every block (one at a
+            # time, token required); its progress and last result come back under "full".
+            if data.get('full') and not self._require_token():
+                return
+            response = validate_chain(db.connection(), AES_KEY)
+            if data.get('full'):
+                response['full_started'] = full_validation.start()
+            response['full'] = full_validation.status()
 
         elif path == '/smartcontract/validate':
             # Placeholder: Validate loan terms (e.g., repayment schedule)
@@ -168,24 +314,44 @@ class CyberVaultHandler(http.server.BaseHTTPRequestHandler):
             response = {'valid': True}
 
         elif path == '/mesh/sync':
-            # Peer-to-peer transaction sync (accepts a list of transactions)
+            # Peer-to-peer transaction sync (accepts a list of transactions; known content ids are skipped)
             if not self._require_token():
                 return
             txs = data.get('transactions', [])
-            aes = AESCipher(AES_KEY)
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            for tx in txs:
-                user_id = tx.get('user_id')
-                tx_data = tx.get('data')
-                timestamp = tx.get('timestamp')
-                if user_id and tx_data and timestamp:
-                    enc_data = aes.encrypt(json.dumps(tx_data)).hex()
-                    c.execute('INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?)',
-                              (user_id, enc_data, 'mesh', 0, timestamp))
-            conn.commit()
-            conn.close()
-            response = {'status': 'mesh_sync_complete', 'count': len(txs)}
+            try:
+                inserted = store_transactions(db.connection(), writer, CIPHER, txs)
+                response = {'status': 'mesh_sync_complete', 'count': len(txs), 'inserted': inserted}
+            except Exception as e:
+                response, code = storage_error(e)
+
+        elif path == '/mesh/reconcile':
+            # Set reconciliation: a peer's IBLT (or full id list) in, the delta in both directions out
+            if not self._require_token():
+                return
+            if 'iblt' not in data and not isinstance(data.get('ids'), list):
+                response = {'error': 'Missing iblt or ids'}
+                code = 400
+            else:
+                try:
+                    response = reconcile(db.connection(), CIPHER, mesh_digest, data)
+                except ValueError as e:
+                    response = {'error': str(e)}
+                    code = 400
+
+        elif path == '/mesh/pull':
+            # Delta-only sync with a peer node: {"peer": "http://host:port", "token": "<peer token>"}
+            if not self._require_token():
+                return
+            peer, peer_token = data.get('peer'), data.get('token')
+            if not peer or not peer_token:
+                response = {'error': 'Missing peer or token'}
+                code = 400
+            else:
+                try:
+                    response = pull_from_peer(peer, peer_token, db.connection(), CIPHER, writer, mesh_digest)
+                except (OSError, ValueError) as e:
+                    response = {'error': f'Peer sync failed: {e}'}
+                    code = 502
 
         elif path == '/zkp/prove':
             user_data = data.get('user_data')
@@ -203,10 +369,7 @@ class CyberVaultHandler(http.server.BaseHTTPRequestHandler):
                 response = {'error': 'Missing user_id'}
                 code = 400
             else:
-                conn = sqlite3.connect(DB_FILE)
-                from reputation.reputation import query_reputation_from_chain
-                score = query_reputation_from_chain(user_id, AES_KEY, conn)
-                conn.close()
+                score = query_reputation_from_chain(user_id, AES_KEY, db.connection())
                 response = {'user_id': user_id, 'reputation': score}
 
         elif path == '/reputation/update':
@@ -217,81 +380,122 @@ class CyberVaultHandler(http.server.BaseHTTPRequestHandler):
                 response = {'error': 'Missing user_id'}
                 code = 400
             else:
-                from reputation.reputation import calculate_reputation, store_reputation_on_chain
                 score_hash, score = calculate_reputation(user_id, tx_history, feedback)
-                conn = sqlite3.connect(DB_FILE)
-                block_hash = store_reputation_on_chain(user_id, score, AES_KEY, conn)
-                conn.close()
+                block_hash = store_reputation_on_chain(user_id, score, AES_KEY, db.connection(), producer)
                 response = {'user_id': user_id, 'reputation': score, 'block_hash': block_hash}
 
         else:
             response = {'error': 'Unknown endpoint'}
             code = 404
 
-        self._set_headers(code)
-        self.wfile.write(json.dumps(response).encode())
+        self._send_json(response, code)
 
     def do_GET(self):
-        path = urlparse(self.path).path
+        url = urlparse(self.path)
+        path = url.path
         response = {}
         code = 200
         # Serve API endpoints as before
         if path == '/status':
             response = {'status': 'CyberVault backend running'}
-            self._set_headers(code)
-            self.wfile.write(json.dumps(response).encode())
-        elif path == '/blockchain':
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT * FROM blockchain')
-            blocks = c.fetchall()
-            conn.close()
-            response = {'blockchain': blocks}
-            self._set_headers(code)
-            self.wfile.write(json.dumps(response).encode())
-        elif path == '/transactions':
-            conn = sqlite3.connect(DB_FILE)
-            c = conn.cursor()
-            c.execute('SELECT * FROM transactions')
-            txs = c.fetchall()
-            conn.close()
-            response = {'transactions': txs}
-            self._set_headers(code)
-            self.wfile.write(json.dumps(response).encode())
-        else:
-            # Serve static frontend files for all other GET requests
-            import os
-            static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../frontend'))
-            file_path = path.lstrip('/') or 'index.html'
-            abs_file = os.path.join(static_dir, file_path)
-            if not os.path.isfile(abs_file):
-                abs_file = os.path.join(static_dir, 'index.html')
+            self._send_json(response, code)
+        elif path in LISTINGS:
+            self._list_rows(path, url.query)
+        elif path.startswith('/users/') and path.endswith('/transactions'):
+            # Per-user history: keyset pages served from idx_transactions_user_id
+            user_id = path[len('/users/'):-len('/transactions')]
+            self._list_rows('/transactions', url.query, {'user_id': user_id})
+        elif path == '/blockchain/merkle':
+            # ?level=&index= returns one subtree hash; ?from=<block index> maps a divergent
+            # suffix to an after_id for GET /blockchain; no parameters returns the summary
+            ledger = sync_chain_ledger()
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
             try:
-                with open(abs_file, 'rb') as f:
-                    content = f.read()
-                if abs_file.endswith('.html'):
-                    self.send_response(200)
-                    self.send_header('Content-type', 'text/html')
-                elif abs_file.endswith('.js'):
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/javascript')
-                elif abs_file.endswith('.css'):
-                    self.send_response(200)
-                    self.send_header('Content-type', 'text/css')
-                elif abs_file.endswith('.json'):
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
+                if 'level' in params:
+                    level, index = int(params['level']), int(params['index'])
+                    node = ledger.node(level, index)
+                    if node is None:
+                        self._send_json({'error': 'Node not found'}, 404)
+                    else:
+                        self._send_json({'level': level, 'index': index, 'hash': node.hex()})
+                elif 'from' in params:
+                    start = int(params['from'])
+                    with chain_ledger_lock:
+                        if not 0 <= start <= len(chain_ledger_ids):
+                            raise ValueError(start)
+                        after_id = chain_ledger_ids[start - 1] if start else 0
+                    self._send_json({'from': start, 'after_id': after_id})
                 else:
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/octet-stream')
-                self.end_headers()
-                self.wfile.write(content)
-            except Exception:
-                self.send_response(404)
-                self.end_headers()
-                self.wfile.write(b'File not found')
+                    self._send_json({'size': ledger.size, 'root': ledger.root().hex(),
+                                     'peaks': [p.hex() for p in ledger.peaks()]})
+            except (KeyError, ValueError):
+                self._send_json({'error': 'Invalid level/index/from'}, 400)
+        elif path.startswith('/blockchain/proof/'):
+            # Inclusion proof for item <position> of a packed block: /blockchain/proof/<block_hash>/<position>
+            block_hash, _, position = path[len('/blockchain/proof/'):].partition('/')
+            proof = inclusion_proof(db.connection(), block_hash, int(position)) if position.isdigit() else None
+            if proof:
+                self._send_json(proof)
+            else:
+                self._send_json({'error': 'Item not found'}, 404)
+        elif path.startswith('/blockchain/blocks/'):
+            block_hash = path[len('/blockchain/blocks/'):]
+            c = db.connection().cursor()
+            c.execute('SELECT * FROM blockchain WHERE block_hash=?', (block_hash,))
+            block = c.fetchone()
+            if block:
+                self._send_json({'block': row_to_json(block)})
+            else:
+                self._send_json({'error': 'Block not found'}, 404)
+        else:
+            # Serve static frontend files for all other GET requests
+            self._serve_static(path)
+
+    def _static_headers(self, asset, encoding):
+        self.send_header('ETag', asset.etag_for(encoding))
+        self.send_header('Last-Modified', asset.last_modified)
+        self.send_header('Cache-Control', CACHE_CONTROL)
+        if asset.variants:
+            self.send_header('Vary', 'Accept-Encoding')
+
+    # Cached frontend assets: 304 revalidation, precompressed variants, sendfile for large files
+    def _serve_static(self, path):
+        try:
+            asset = static_assets.lookup(path)
+        except (OSError, ValueError):
+            # ValueError: a path the OS rejects, such as one with an embedded %00
+            asset = None
+        if asset is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '14')
+            self.end_headers()
+            self.wfile.write(b'File not found')
+            return
+        encoding = choose_encoding(self.headers.get('Accept-Encoding'), asset.variants)
+        if asset.not_modified(self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')):
+            self.send_response(304)
+            self._static_headers(asset, encoding)
+            self.end_headers()
+            return
+        body = asset.variants.get(encoding, asset.body)
+        self.send_response(200)
+        self.send_header('Content-type', asset.content_type)
+        self.send_header('Content-Length', str(asset.size if body is None else len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self._static_headers(asset, encoding)
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+            return
+        # socket.sendfile uses os.sendfile (zero-copy) and copes with the socket timeout
+        with open(asset.path, 'rb') as f:
+            if self.connection.sendfile(f, 0, asset.size) < asset.size:
+                # File shrank since it was stat-ed; the declared length cannot be met
+                self.close_connection = True
 
 if __name__ == "__main__":
-    with socketserver.TCPServer(("", PORT), CyberVaultHandler) as httpd:
-        print(f"CyberVault backend running at http://localhost:{PORT}")
+    with BoundedThreadPoolServer(("", PORT), CyberVaultHandler, max_workers=MAX_WORKERS, queue_depth=QUEUE_DEPTH,
+                                 idle_timeout=KEEPALIVE_TIMEOUT) as httpd:
+        print(f"CyberVault backend running at http://localhost:{PORT} ({MAX_WORKERS} workers, queue {QUEUE_DEPTH})")
         httpd.serve_forever()
@@ -0,0 +1,71 @@
+"""
+CyberVault BLOB Migration - Online conversion of hex TEXT payloads to raw BLOBs
+Walks each table by id in small batches, each its own short transaction, so the
+backend keeps serving while it runs. Rows that are not valid hex are left as-is, and
+so are packed blocks, whose data is a hex Merkle root rather than an encrypted payload.
+"""
+import sqlite3
+import time
+
+# (table, column, skip) holding encrypted payloads; rows matching skip (when its column
+# exists) are not payloads and stay as they are
+BLOB_COLUMNS = [('transactions', 'data', None), ('blockchain', 'data', ('item_count', 'item_count IS NOT NULL'))]
+BATCH_SIZE = 1000
+
+def convert_column(conn, table, column, batch_size=BATCH_SIZE, pause=0.0, skip=None):
+    converted = skipped = 0
+    last_id = 0
+    keep = f'CASE WHEN {skip} THEN 1 ELSE 0 END' if skip else '0'
+    while True:
+        rows = conn.execute(f"SELECT id, {column}, {keep} FROM {table} WHERE id > ? AND typeof({column}) = 'text' ORDER BY id LIMIT ?",
+                            (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row_id, value, kept in rows:
+            if kept:
+                skipped += 1
+                continue
+            try:
+                updates.append((bytes.fromhex(value), row_id))
+            except ValueError:
+                skipped += 1
+        with conn:
+            conn.executemany(f'UPDATE {table} SET {column}=? WHERE id=?', updates)
+        converted += len(updates)
+        last_id = rows[-1][0]
+        if pause:
+            # Yield the write lock to live traffic between batches
+            time.sleep(pause)
+    return converted, skipped
+
+def page_bytes(conn):
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    pages = conn.execute('PRAGMA page_count').fetchone()[0] - conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return page_size * pages
+
+def migrate_to_blobs(conn, batch_size=BATCH_SIZE, pause=0.0):
+    results = {}
+    for table, column, skip in BLOB_COLUMNS:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            columns = {r[1] for r in conn.execute(f'PRAGMA table_info({table})')}
+            where = skip[1] if skip and skip[0] in columns else None
+            results[f'{table}.{column}'] = convert_column(conn, table, column, batch_size, pause, where)
+    return results
+
+# CLI: python blob_migrate.py <db_file> [batch_size] [pause_seconds]
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print('Usage: python blob_migrate.py <db_file> [batch_size] [pause_seconds]')
+        exit(1)
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else BATCH_SIZE
+    pause = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    conn = sqlite3.connect(sys.argv[1], timeout=30)
+    before = page_bytes(conn)
+    start = time.perf_counter()
+    for name, (converted, skipped) in migrate_to_blobs(conn, batch_size, pause).items():
+        print(f'{name}: {converted} rows converted, {skipped} skipped')
+    after = page_bytes(conn)
+    print(f'Live data {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s (run VACUUM to shrink the file)')
+    conn.close()
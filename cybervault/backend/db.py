@@ -0,0 +1,56 @@
+"""
+CyberVault Database - Per-thread pooled SQLite connections (WAL mode)
+"""
+import sqlite3
+import threading
+
+# Applied to every pooled connection; WAL lets readers run alongside the writer
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+)
+STATEMENT_CACHE_SIZE = 256
+
+# One long-lived connection per worker thread, reused across requests
+class ConnectionPool:
+    def __init__(self, db_file, pragmas=PRAGMAS):
+        self.db_file = db_file
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, cached_statements=STATEMENT_CACHE_SIZE)
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Owned by another thread; released when that thread exits
+                pass
+        self._local = threading.local()
+
+# Encrypted payloads are stored as raw BLOBs; rows written before the switch hold hex TEXT
+def as_bytes(value):
+    if isinstance(value, str):
+        return bytes.fromhex(value)
+    return value
+
+# JSON-safe copy of a row: BLOB columns are rendered as hex, as the API always returned them
+def row_to_json(row):
+    return [v.hex() if isinstance(v, bytes) else v for v in row]
@@ -0,0 +1,148 @@
+"""
+CyberVault Mesh Sync - Content-addressed, delta-only transaction sync between nodes
+"""
+import json
+import threading
+import urllib.request
+from ai.model import predict_fraud_batch
+from db import as_bytes
+from modules.set_reconcile import IBLT, IBLT_SIZES, SetDigest, content_id
+
+# Duplicate content ids are dropped by the unique index on transactions.content_id
+INSERT_TRANSACTION = ('INSERT OR IGNORE INTO transactions (user_id, data, status, fraud_flag, timestamp, content_id) '
+                      'VALUES (?, ?, ?, ?, ?, ?)')
+BACKFILL_BATCH = 1000
+ID_QUERY_CHUNK = 500
+PEER_TIMEOUT = 30
+
+def transaction_id(tx):
+    return content_id(tx['user_id'], tx['data'], tx['timestamp'])
+
+# Give rows written before content ids their id; later duplicates of a row stay NULL
+def backfill_content_ids(conn, cipher, batch_size=BACKFILL_BATCH):
+    last_id = 0
+    filled = 0
+    while True:
+        rows = conn.execute('SELECT id, user_id, data, timestamp FROM transactions '
+                            'WHERE id > ? AND content_id IS NULL ORDER BY id LIMIT ?', (last_id, batch_size)).fetchall()
+        if not rows:
+            return filled
+        updates = []
+        for row_id, user_id, data, timestamp in rows:
+            try:
+                tx_data = json.loads(cipher.decrypt(as_bytes(data)))
+            except (ValueError, TypeError):
+                continue
+            updates.append((content_id(user_id, tx_data, timestamp), row_id))
+        with conn:
+            filled += conn.executemany('UPDATE OR IGNORE transactions SET content_id = ? WHERE id = ?', updates).rowcount
+        last_id = rows[-1][0]
+
+def _chunks(items, size=ID_QUERY_CHUNK):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def existing_ids(conn, ids):
+    found = set()
+    for chunk in _chunks(ids):
+        marks = ','.join('?' * len(chunk))
+        found.update(r[0] for r in conn.execute(f'SELECT content_id FROM transactions WHERE content_id IN ({marks})', chunk))
+    return found
+
+def transactions_for_ids(conn, cipher, ids):
+    rows = []
+    for chunk in _chunks(ids):
+        marks = ','.join('?' * len(chunk))
+        rows.extend(conn.execute(f'SELECT user_id, data, timestamp FROM transactions WHERE content_id IN ({marks})', chunk))
+    plain = cipher.decrypt_many([as_bytes(r[1]) for r in rows])
+    return [{'user_id': r[0], 'data': json.loads(p), 'timestamp': r[2]} for r, p in zip(rows, plain)]
+
+# Score, encrypt and insert peer transactions not already stored; returns the number inserted
+def store_transactions(conn, writer, cipher, txs):
+    valid = {}
+    for tx in txs:
+        if tx.get('user_id') and tx.get('data') and tx.get('timestamp'):
+            valid.setdefault(transaction_id(tx), tx)
+    for cid in existing_ids(conn, valid):
+        del valid[cid]
+    if not valid:
+        return 0
+    ids, fresh = list(valid), list(valid.values())
+    fraud_flags = predict_fraud_batch([tx['data'] for tx in fresh], [tx['user_id'] for tx in fresh],
+                                      [tx['timestamp'] for tx in fresh])
+    encrypted = cipher.encrypt_many([json.dumps(tx['data']) for tx in fresh])
+    rows = [(tx['user_id'], enc_data, 'mesh', int(fraud_flag), tx['timestamp'], cid)
+            for tx, enc_data, fraud_flag, cid in zip(fresh, encrypted, fraud_flags, ids)]
+    return writer.executemany(INSERT_TRANSACTION, rows)
+
+# This node's IBLTs over its content ids, caught up from new rows on demand
+class MeshDigest:
+    def __init__(self, pool, sizes=IBLT_SIZES):
+        self.pool = pool
+        self.digest = SetDigest(sizes)
+        self.last_id = 0
+        self._lock = threading.Lock()
+
+    def sync(self):
+        rows = self.pool.connection().execute('SELECT id, content_id FROM transactions WHERE id > ? ORDER BY id',
+                                              (self.last_id,)).fetchall()
+        if rows:
+            self.digest.add_many([cid for _, cid in rows if cid])
+            self.last_id = rows[-1][0]
+
+    def encoded(self, cells):
+        with self._lock:
+            self.sync()
+            return self.digest.table(cells).to_b64()
+
+    # (ids only here, ids only at the peer), or None if the difference is too large
+    def difference(self, remote):
+        with self._lock:
+            self.sync()
+            local = self.digest.table(remote.cells)
+            if local is None:
+                raise ValueError(f'Unsupported IBLT size {remote.cells}')
+            return local.subtract(remote).decode()
+
+# Server side of POST /mesh/reconcile: {'iblt': base64} or, after every size failed, {'ids': [...]}
+def reconcile(conn, cipher, mesh_digest, request):
+    if 'iblt' in request:
+        result = mesh_digest.difference(IBLT.from_b64(request['iblt']))
+        if result is None:
+            return {'decoded': False}
+        ours, theirs = result
+    else:
+        if not all(isinstance(i, str) for i in request['ids']):
+            raise ValueError('ids must be content id strings')
+        remote = set(request['ids'])
+        local = {r[0] for r in conn.execute('SELECT content_id FROM transactions WHERE content_id IS NOT NULL')}
+        ours, theirs = local - remote, remote - local
+    return {'decoded': True, 'need': sorted(theirs), 'transactions': transactions_for_ids(conn, cipher, ours)}
+
+def _post(url, token, payload, stats):
+    body = json.dumps(payload).encode()
+    request = urllib.request.Request(url, body, {'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'})
+    with urllib.request.urlopen(request, timeout=PEER_TIMEOUT) as response:
+        reply = response.read()
+    stats['requests'] += 1
+    stats['bytes_sent'] += len(body)
+    stats['bytes_received'] += len(reply)
+    return json.loads(reply)
+
+# Client side: reconcile with a peer node, store what it has, push what it lacks
+def pull_from_peer(peer_url, token, conn, cipher, writer, mesh_digest):
+    peer_url = peer_url.rstrip('/')
+    stats = {'requests': 0, 'bytes_sent': 0, 'bytes_received': 0}
+    for cells in mesh_digest.digest.tables:
+        reply = _post(f'{peer_url}/mesh/reconcile', token, {'iblt': mesh_digest.encoded(cells)}, stats)
+        if reply['decoded']:
+            break
+    else:
+        ids = [r[0] for r in conn.execute('SELECT content_id FROM transactions WHERE content_id IS NOT NULL')]
+        reply = _post(f'{peer_url}/mesh/reconcile', token, {'ids': ids}, stats)
+    stats['received'] = store_transactions(conn, writer, cipher, reply['transactions'])
+    stats['sent'] = len(reply['need'])
+    if reply['need']:
+        _post(f'{peer_url}/mesh/sync', token, {'transactions': transactions_for_ids(conn, cipher, reply['need'])}, stats)
+    return stats
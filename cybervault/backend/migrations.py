@@ -0,0 +1,65 @@
+"""
+CyberVault Migrations - Versioned schema upgrades tracked in PRAGMA user_version
+"""
+
+# (version, description, statements); append new entries, never edit applied ones
+MIGRATIONS = [
+    (1, 'base schema', [
+        '''CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, pin_hash TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, data TEXT, status TEXT, fraud_flag INTEGER, timestamp TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS blockchain (id INTEGER PRIMARY KEY, block_hash TEXT, prev_hash TEXT, data TEXT, timestamp TEXT)''',
+    ]),
+    (2, 'lookup indexes for history, filters and hash lookups', [
+        'CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions (user_id, id)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions (status, id)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_blockchain_block_hash ON blockchain (block_hash)',
+        'CREATE INDEX IF NOT EXISTS idx_blockchain_prev_hash ON blockchain (prev_hash)',
+    ]),
+    (3, 'transaction content ids for mesh deduplication', [
+        'ALTER TABLE transactions ADD COLUMN content_id TEXT',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_content_id ON transactions (content_id)',
+    ]),
+    (4, 'packed blocks: Merkle-committed items per block', [
+        'ALTER TABLE blockchain ADD COLUMN item_count INTEGER',
+        '''CREATE TABLE IF NOT EXISTS block_items (block_id INTEGER NOT NULL, position INTEGER NOT NULL, kind TEXT, timestamp TEXT, item_hash TEXT, data BLOB, PRIMARY KEY (block_id, position)) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_block_items_kind ON block_items (kind, block_id)',
+    ]),
+    (5, 'persisted login sessions (token hashes only)', [
+        'CREATE TABLE IF NOT EXISTS sessions (token_hash TEXT PRIMARY KEY, user_id TEXT NOT NULL, expires REAL NOT NULL) WITHOUT ROWID',
+    ]),
+    (6, 'ground-truth fraud labels (confirmed fraud, chargebacks) for training', [
+        'CREATE TABLE IF NOT EXISTS fraud_labels (transaction_id INTEGER PRIMARY KEY, label INTEGER NOT NULL, source TEXT, labeled_at REAL)',
+    ]),
+]
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+# Apply pending migrations in order, each in its own transaction
+def migrate(conn, target=None):
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= schema_version(conn) or (target is not None and version > target):
+            continue
+        with conn:
+            # Explicit BEGIN: sqlite3 would otherwise autocommit each DDL statement
+            conn.execute('BEGIN')
+            for stmt in statements:
+                conn.execute(stmt)
+            conn.execute(f'PRAGMA user_version = {version}')
+        applied.append((version, description))
+    return applied
+
+# CLI: python migrations.py <db_file>
+if __name__ == '__main__':
+    import sqlite3
+    import sys
+    if len(sys.argv) < 2:
+        print('Usage: python migrations.py <db_file>')
+        exit(1)
+    conn = sqlite3.connect(sys.argv[1])
+    for version, description in migrate(conn):
+        print(f'Applied migration {version}: {description}')
+    print(f'Schema version: {schema_version(conn)}')
+    conn.close()
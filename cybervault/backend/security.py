@@ -3,27 +3,84 @@ CyberVault Security - AES-256 encryption/decryption, JWT-like tokens, PIN-based
 """
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
-import os, secrets, hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import os, secrets, hashlib, threading
+
+# Batches smaller than this are not worth dispatching to the thread pool
+BULK_PARALLEL_THRESHOLD = 2048
+BULK_CHUNK_SIZE = 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _bulk_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix='cybervault-aes')
+        return _executor
+
+@lru_cache(maxsize=32)
+def _derive_key(key):
+    return hashlib.sha256(key.encode()).digest()
 
 # AES-256 encryption/decryption
 class AESCipher:
     def __init__(self, key):
-        self.key = hashlib.sha256(key.encode()).digest()
+        self.key = _derive_key(key)
+        self._algorithm = algorithms.AES(self.key)
+        self._backend = default_backend()
 
     def encrypt(self, data):
         iv = os.urandom(16)
-        cipher = Cipher(algorithms.AES(self.key), modes.CFB(iv), backend=default_backend())
-        encryptor = cipher.encryptor()
-        ct = encryptor.update(data.encode()) + encryptor.finalize()
-        return iv + ct
+        return self._encrypt_with_iv(data, iv)
 
     def decrypt(self, enc):
         iv = enc[:16]
         ct = enc[16:]
-        cipher = Cipher(algorithms.AES(self.key), modes.CFB(iv), backend=default_backend())
+        cipher = Cipher(self._algorithm, modes.CFB(iv), backend=self._backend)
         decryptor = cipher.decryptor()
         return (decryptor.update(ct) + decryptor.finalize()).decode()
 
+    def _encrypt_with_iv(self, data, iv):
+        cipher = Cipher(self._algorithm, modes.CFB(iv), backend=self._backend)
+        encryptor = cipher.encryptor()
+        ct = encryptor.update(data.encode()) + encryptor.finalize()
+        return iv + ct
+
+    def _encrypt_chunk(self, items):
+        # One urandom call for the whole chunk's IVs
+        ivs = os.urandom(16 * len(items))
+        return [self._encrypt_with_iv(data, ivs[i * 16:(i + 1) * 16]) for i, data in enumerate(items)]
+
+    def _decrypt_chunk(self, items):
+        return [self.decrypt(enc) for enc in items]
+
+    # Bulk APIs: same output as encrypt()/decrypt() per item, in input order.
+    # Large batches are split across a shared thread pool (OpenSSL drops the GIL).
+    def encrypt_many(self, items, parallel=None):
+        return self._bulk(self._encrypt_chunk, list(items), parallel)
+
+    def decrypt_many(self, items, parallel=None):
+        return self._bulk(self._decrypt_chunk, list(items), parallel)
+
+    def _bulk(self, fn, items, parallel):
+        if parallel is None:
+            parallel = len(items) >= BULK_PARALLEL_THRESHOLD
+        if not parallel or len(items) <= BULK_CHUNK_SIZE:
+            return fn(items)
+        chunks = [items[i:i + BULK_CHUNK_SIZE] for i in range(0, len(items), BULK_CHUNK_SIZE)]
+        results = []
+        for chunk in _bulk_executor().map(fn, chunks):
+            results.extend(chunk)
+        return results
+
+# Shared cipher per key: avoids re-deriving the key and rebuilding per request
+@lru_cache(maxsize=32)
+def get_cipher(key):
+    return AESCipher(key)
+
 # PIN-based MFA (local)
 def verify_pin(input_pin, stored_hash):
     return hashlib.sha256(input_pin.encode()).hexdigest() == stored_hash
@@ -0,0 +1,171 @@
+"""
+CyberVault Server - Bounded thread-pool HTTP server with load shedding
+Idle connections (new or kept alive between requests) wait in a selector; a worker is
+only taken when a connection has a request to read.
+"""
+import http.server
+import json
+import queue
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+
+# Serves one request per dispatch. Pipelined requests already buffered are served in
+# place; otherwise a kept-alive connection is handed back to the server's selector.
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._buffered():
+            self.handle_one_request()
+        if not self.close_connection:
+            self.server.park(self.request, self.client_address)
+
+    # Bytes already received for the next request, without blocking on the socket
+    def _buffered(self):
+        timeout = self.request.gettimeout()
+        self.request.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.request.settimeout(timeout)
+
+# Fixed worker pool fed by a bounded queue of readable connections; full queue -> 503
+class BoundedThreadPoolServer(socketserver.TCPServer):
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=8, queue_depth=64, idle_timeout=15, max_idle=1024):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self._requests = queue.Queue(maxsize=queue_depth)
+        self._stopping = threading.Event()
+        self._parked = threading.local()
+        # Connections to (re)register, handed to the selector thread through a wakeup socket
+        self._to_park = queue.Queue()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector_thread = threading.Thread(target=self._select_loop, name='cybervault-selector', daemon=True)
+        self._selector_thread.start()
+        self._workers = []
+        for i in range(max_workers):
+            t = threading.Thread(target=self._worker, name=f'cybervault-worker-{i}', daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    # New connections wait for their first request without holding a worker
+    def process_request(self, request, client_address):
+        self._to_park.put((request, client_address))
+        self._wake()
+
+    # Called by the handler (on a worker thread) to keep a connection open for its next request
+    def park(self, request, client_address):
+        self._parked.request = request
+        self._to_park.put((request, client_address))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wakeup_w.send(b'\0')
+        except OSError:
+            pass
+
+    def _dispatch(self, request, client_address):
+        try:
+            self._requests.put_nowait((request, client_address))
+        except queue.Full:
+            self._reject(request)
+            self.shutdown_request(request)
+
+    def _select_loop(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup_r, selectors.EVENT_READ)
+        idle = OrderedDict()  # request -> (client_address, parked at); oldest first
+        while not self._stopping.is_set():
+            for key, _ in selector.select(timeout=1.0):
+                if key.fileobj is self._wakeup_r:
+                    try:
+                        while self._wakeup_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                selector.unregister(key.fileobj)
+                client_address, _ = idle.pop(key.fileobj)
+                self._dispatch(key.fileobj, client_address)
+            while True:
+                try:
+                    request, client_address = self._to_park.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    selector.register(request, selectors.EVENT_READ)
+                except (OSError, ValueError):
+                    self.shutdown_request(request)
+                    continue
+                idle[request] = (client_address, time.monotonic())
+            # Close connections idle too long, and the oldest ones past max_idle
+            deadline = time.monotonic() - self.idle_timeout
+            while idle:
+                request, (_, parked_at) = next(iter(idle.items()))
+                if parked_at > deadline and len(idle) <= self.max_idle:
+                    break
+                del idle[request]
+                selector.unregister(request)
+                self.shutdown_request(request)
+        for request in idle:
+            self.shutdown_request(request)
+        selector.close()
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                request, client_address = self._requests.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._parked.request = None
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+                self._parked.request = None
+            finally:
+                # A parked connection now belongs to the selector
+                if self._parked.request is not request:
+                    self.shutdown_request(request)
+
+    # Shed load without reading the request: minimal HTTP/1.1 503
+    def _reject(self, request):
+        body = json.dumps({'error': 'Server busy'}).encode()
+        head = ('HTTP/1.1 503 Service Unavailable\r\n'
+                'Content-type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Retry-After: 1\r\n'
+                'Connection: close\r\n\r\n').encode()
+        try:
+            request.settimeout(1.0)
+            request.sendall(head + body)
+        except OSError:
+            pass
+
+    def server_close(self):
+        super().server_close()
+        if not hasattr(self, '_stopping'):
+            # Bind or listen failed inside TCPServer.__init__; nothing else was started
+            return
+        self._stopping.set()
+        self._wake()
+        self._selector_thread.join(timeout=2.0)
+        for t in self._workers:
+            t.join(timeout=1.0)
+        self._wakeup_r.close()
+        self._wakeup_w.close()
@@ -0,0 +1,116 @@
+"""
+CyberVault Sessions - In-memory bearer token store with TTL/LRU eviction
+Lookups never touch disk; changes are persisted write-behind through the
+group-commit writer so sessions survive a restart. Only token hashes are kept.
+Expired sessions are swept from memory and the table as new ones are created.
+"""
+import base64
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+SESSION_TTL = 8 * 3600
+MAX_SESSIONS = 100000
+# A login sweeps expired sessions if the last sweep is at least this old (seconds)
+SWEEP_INTERVAL = 60
+UPSERT_SESSION = 'INSERT OR REPLACE INTO sessions (token_hash, user_id, expires) VALUES (?, ?, ?)'
+DELETE_SESSION = 'DELETE FROM sessions WHERE token_hash = ?'
+DELETE_EXPIRED = 'DELETE FROM sessions WHERE expires <= ?'
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+# token hash -> (user_id, expires); most recently used last, so eviction pops the front
+class SessionStore:
+    def __init__(self, writer=None, ttl=SESSION_TTL, max_sessions=MAX_SESSIONS, sweep_interval=SWEEP_INTERVAL):
+        self.writer = writer
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _persist(self, sql, params):
+        if self.writer is not None:
+            self.writer.submit(sql, params)
+
+    # Store one session, evicting the least recently used past max_sessions (caller holds the lock)
+    def _put(self, token_hash, user_id, expires):
+        self._sessions[token_hash] = (user_id, expires)
+        self._sessions.move_to_end(token_hash)
+        evicted = []
+        while len(self._sessions) > self.max_sessions:
+            evicted.append(self._sessions.popitem(last=False)[0])
+        return evicted
+
+    def create(self, user_id):
+        token = base64.urlsafe_b64encode(secrets.token_bytes(24)).decode()
+        token_hash = hash_token(token)
+        now = time.time()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+        expires = now + self.ttl
+        with self._lock:
+            evicted = self._put(token_hash, user_id, expires)
+        self._persist(UPSERT_SESSION, (token_hash, user_id, expires))
+        for h in evicted:
+            self._persist(DELETE_SESSION, (h,))
+        return token
+
+    # Drop every expired session from memory, and from the table in one statement;
+    # returns how many were in memory. validate() still rejects expired tokens between sweeps.
+    def sweep(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            expired = [h for h, (_, expires) in self._sessions.items() if expires <= now]
+            for h in expired:
+                del self._sessions[h]
+        self._persist(DELETE_EXPIRED, (now,))
+        return len(expired)
+
+    # user_id bound to a live token, else None; O(1) and memory-only
+    def validate(self, token):
+        if not token:
+            return None
+        token_hash = hash_token(token)
+        with self._lock:
+            entry = self._sessions.get(token_hash)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._sessions[token_hash]
+                expired = True
+            else:
+                self._sessions.move_to_end(token_hash)
+                expired = False
+        if expired:
+            self._persist(DELETE_SESSION, (token_hash,))
+            return None
+        return entry[0]
+
+    def revoke(self, token):
+        token_hash = hash_token(token)
+        with self._lock:
+            found = self._sessions.pop(token_hash, None) is not None
+        if found:
+            self._persist(DELETE_SESSION, (token_hash,))
+        return found
+
+    # Startup: drop expired rows, then load the newest live sessions that fit
+    def load(self, conn):
+        now = time.time()
+        with conn:
+            conn.execute('DELETE FROM sessions WHERE expires <= ?', (now,))
+        rows = conn.execute('SELECT token_hash, user_id, expires FROM sessions ORDER BY expires DESC LIMIT ?',
+                            (self.max_sessions,)).fetchall()
+        with self._lock:
+            for token_hash, user_id, expires in reversed(rows):
+                self._put(token_hash, user_id, expires)
+        return len(rows)
@@ -0,0 +1,159 @@
+"""
+CyberVault Static Assets - In-memory frontend cache with validators and precompression
+Small assets are held in memory with gzip (and brotli, when installed) variants and
+invalidated by mtime; large assets are streamed from disk with sendfile. URL paths are
+cached with the asset they resolve to, so a hit does no filesystem work.
+"""
+import email.utils
+import gzip
+import hashlib
+import os
+import threading
+import time
+from urllib.parse import unquote
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_TYPES = {
+    '.html': 'text/html',
+    '.js': 'application/javascript',
+    '.css': 'text/css',
+    '.json': 'application/json',
+    '.webmanifest': 'application/manifest+json',
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+    '.ico': 'image/x-icon',
+    '.txt': 'text/plain',
+}
+COMPRESSIBLE = {'.html', '.js', '.css', '.json', '.webmanifest', '.svg', '.txt'}
+MIN_COMPRESS_SIZE = 256
+# Larger files are not cached in memory; they go out with sendfile
+SENDFILE_THRESHOLD = 256 * 1024
+# Re-resolve a URL and re-stat its file at most this often (seconds)
+STAT_INTERVAL = 1.0
+# Cached URL -> asset resolutions
+MAX_URLS = 1024
+# Unversioned file names: clients must revalidate, which the ETag makes a cheap 304
+CACHE_CONTROL = 'no-cache'
+
+class StaticAsset:
+    def __init__(self, path, st):
+        self.path = path
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        ext = os.path.splitext(path)[1].lower()
+        self.content_type = CONTENT_TYPES.get(ext, 'application/octet-stream')
+        self.last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        self.checked = time.monotonic()
+        self.body = None
+        self.variants = {}
+        if self.size > SENDFILE_THRESHOLD:
+            self.etag = f'"{self.size:x}-{self.mtime_ns:x}"'
+            return
+        with open(path, 'rb') as f:
+            self.body = f.read()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:20]}"'
+        if ext in COMPRESSIBLE and len(self.body) >= MIN_COMPRESS_SIZE:
+            self._add_variant('gzip', gzip.compress(self.body, 9, mtime=0))
+            if brotli is not None:
+                self._add_variant('br', brotli.compress(self.body, quality=11))
+
+    def _add_variant(self, encoding, data):
+        if len(data) < len(self.body):
+            self.variants[encoding] = data
+
+    # Every representation has its own strong ETag
+    def etag_for(self, encoding):
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def not_modified(self, if_none_match, if_modified_since):
+        if if_none_match:
+            tags = {t.strip().removeprefix('W/') for t in if_none_match.split(',')}
+            return '*' in tags or any(self.etag_for(e) in tags for e in [None, *self.variants])
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime_ns // 1_000_000_000) <= since
+        return False
+
+# Best encoding the client accepts (q > 0) among the asset's variants; brotli first
+def choose_encoding(accept_encoding, variants):
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+class StaticCache:
+    def __init__(self, root, index='index.html', max_urls=MAX_URLS):
+        self.root = os.path.realpath(root)
+        self.index = index
+        self.max_urls = max_urls
+        # File path -> asset, shared by every URL that resolves to the file
+        self._assets = {}
+        # URL path -> (asset, monotonic time it was resolved); hits skip unquote/realpath/stat
+        self._urls = {}
+        self._lock = threading.Lock()
+
+    # URL path -> file under root; unknown paths fall back to the index page (client-side routes).
+    # Raises ValueError for paths the OS cannot represent (e.g. an embedded %00).
+    def resolve(self, url_path):
+        rel = unquote(url_path).lstrip('/') or self.index
+        path = os.path.realpath(os.path.join(self.root, rel))
+        if os.path.commonpath([self.root, path]) != self.root or not os.path.isfile(path):
+            path = os.path.join(self.root, self.index)
+        return path
+
+    def lookup(self, url_path):
+        now = time.monotonic()
+        entry = self._urls.get(url_path)
+        if entry is not None and now - entry[1] < STAT_INTERVAL:
+            return entry[0]
+        path = self.resolve(url_path)
+        asset = self._assets.get(path)
+        if asset is None or now - asset.checked >= STAT_INTERVAL:
+            asset = self._refresh(path, asset, now)
+        with self._lock:
+            if asset is None:
+                self._urls.pop(url_path, None)
+            else:
+                if url_path not in self._urls and len(self._urls) >= self.max_urls:
+                    # Fallback routes are unbounded; forget the oldest URL
+                    self._urls.pop(next(iter(self._urls)))
+                self._urls[url_path] = (asset, now)
+        return asset
+
+    # Re-stat one file; reload it only if its mtime or size changed
+    def _refresh(self, path, asset, now):
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._assets.pop(path, None)
+            return None
+        if asset is not None and asset.mtime_ns == st.st_mtime_ns and asset.size == st.st_size:
+            asset.checked = now
+            return asset
+        asset = StaticAsset(path, st)
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+
+    # Drop cached assets and URL resolutions (e.g. after deploying a new frontend)
+    def invalidate(self):
+        with self._lock:
+            self._assets.clear()
+            self._urls.clear()
@@ -0,0 +1,88 @@
+"""
+CyberVault Write-Behind - Group-commit ingestion queue for SQLite inserts
+"""
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from modules.batching import run_batches
+
+# A queued statement (or executemany batch) and the future its caller waits on
+class _WriteOp:
+    def __init__(self, sql, params, many=False):
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.size = len(params) if many else 1
+        self.future = Future()
+
+    # Rows changed for a batch; for one statement the new row id, or None if it changed
+    # nothing (e.g. INSERT OR IGNORE skipped a duplicate)
+    def run(self, conn):
+        if self.many:
+            return conn.executemany(self.sql, self.params).rowcount
+        cursor = conn.execute(self.sql, self.params)
+        return cursor.lastrowid if cursor.rowcount else None
+
+# Single writer thread: commits queued rows in batches bounded by size or time.
+# Futures resolve only after the batch's COMMIT (synchronous=FULL) returns.
+class GroupCommitWriter:
+    def __init__(self, pool, max_batch=500, max_delay=0.005):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='cybervault-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params=()):
+        op = _WriteOp(sql, params)
+        self._queue.put(op)
+        return op.future
+
+    def submit_many(self, sql, rows):
+        op = _WriteOp(sql, list(rows), many=True)
+        if not op.params:
+            op.future.set_result(0)
+            return op.future
+        self._queue.put(op)
+        return op.future
+
+    # Blocking helpers for request handlers: return once the row is durable
+    def execute(self, sql, params=()):
+        return self.submit(sql, params).result()
+
+    def executemany(self, sql, rows):
+        return self.submit_many(sql, rows).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = self.pool.connection()
+        conn.execute('PRAGMA synchronous=FULL')
+        run_batches(self._queue, lambda batch: self._commit(conn, batch), self.max_batch, self.max_delay,
+                    size=lambda op: op.size)
+
+    def _commit(self, conn, batch):
+        try:
+            with conn:
+                results = [op.run(conn) for op in batch]
+        except sqlite3.OperationalError:
+            # Locked or busy database: replaying op by op would wait out the busy timeout
+            # once per op, so the whole batch fails (run_batches hands callers the error)
+            raise
+        except Exception:
+            # One bad op must not fail its batch-mates: replay each on its own
+            for op in batch:
+                try:
+                    with conn:
+                        result = op.run(conn)
+                except Exception as e:
+                    op.future.set_exception(e)
+                else:
+                    op.future.set_result(result)
+            return
+        for op, result in zip(batch, results):
+            op.future.set_result(result)
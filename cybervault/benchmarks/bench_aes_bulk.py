@@ -0,0 +1,36 @@
+"""
+Benchmark: per-record AESCipher (as app.py used it) vs shared cipher bulk APIs
+Usage: python benchmarks/bench_aes_bulk.py [records]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import json
+import time
+import warnings
+from security import AESCipher, get_cipher
+
+warnings.filterwarnings('ignore')
+KEY = 'cybervault_super_secret_key'
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    payloads = [json.dumps({'amount': str(i), 'type': 'loan' if i % 2 else 'payment'}) for i in range(n)]
+    cipher = get_cipher(KEY)
+    _, per_request = timed(lambda: [AESCipher(KEY).encrypt(p) for p in payloads])
+    _, loop = timed(lambda: [cipher.encrypt(p) for p in payloads])
+    _, serial = timed(lambda: cipher.encrypt_many(payloads, parallel=False))
+    enc, threaded = timed(lambda: cipher.encrypt_many(payloads, parallel=True))
+    dec, dec_threaded = timed(lambda: cipher.decrypt_many(enc, parallel=True))
+    _, dec_loop = timed(lambda: [cipher.decrypt(e) for e in enc])
+    assert dec == payloads
+    print(f'{n} records')
+    for name, t in [('new AESCipher per record', per_request), ('shared cipher loop', loop),
+                    ('encrypt_many serial', serial), ('encrypt_many threaded', threaded),
+                    ('decrypt loop', dec_loop), ('decrypt_many threaded', dec_threaded)]:
+        print(f'{name:<28}{t * 1000:>9.1f} ms {n / t:>12.0f} rec/s')
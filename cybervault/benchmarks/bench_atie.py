@@ -0,0 +1,53 @@
+"""
+Benchmark: per-signature substring scan (original atie) vs compiled SignatureMatcher
+Usage: python benchmarks/bench_atie.py [signatures] [transactions]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import random
+import string
+import tempfile
+import time
+import atie.atie as atie
+
+def legacy_analyze(transaction):
+    db = atie.load_threat_db()
+    for sig in db['signatures']:
+        if sig in json.dumps(transaction):
+            return {'threat_score': 100, 'action': 'quarantine'}
+    return {'threat_score': 0, 'action': 'allow'}
+
+if __name__ == '__main__':
+    n_sigs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_txs = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    rng = random.Random(1)
+    alphabet = string.ascii_letters + string.digits
+    signatures = [''.join(rng.choices(alphabet, k=rng.randint(4, 24))) for _ in range(n_sigs)]
+    txs = [{'user_id': ''.join(rng.choices(alphabet, k=32)), 'amount': str(rng.randint(1, 10000)),
+            'type': rng.choice(['loan', 'payment'])} for _ in range(n_txs)]
+    for tx in txs[::100]:
+        tx['memo'] = rng.choice(signatures)
+    with tempfile.TemporaryDirectory() as tmp:
+        atie.THREAT_DB = os.path.join(tmp, 'atie_threat_db.json')
+        atie.save_threat_db({'signatures': signatures, 'version': 1})
+        legacy_n = min(n_txs, 50)
+        start = time.perf_counter()
+        legacy = [legacy_analyze(tx) for tx in txs[:legacy_n]]
+        legacy_per_tx = (time.perf_counter() - start) / legacy_n
+        start = time.perf_counter()
+        atie.get_matcher()
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        single = [atie.analyze_threats(tx) for tx in txs]
+        single_per_tx = (time.perf_counter() - start) / n_txs
+        start = time.perf_counter()
+        batch = atie.analyze_threats_many(txs)
+        batch_per_tx = (time.perf_counter() - start) / n_txs
+    assert single == batch and legacy == batch[:legacy_n]
+    print(f'{n_sigs} signatures, {n_txs} transactions ({sum(r["threat_score"] > 0 for r in batch)} flagged)')
+    print(f'matcher build (once per DB change): {build * 1000:.0f} ms')
+    print(f'legacy per transaction:             {legacy_per_tx * 1e6:10.1f} us')
+    print(f'analyze_threats per transaction:    {single_per_tx * 1e6:10.1f} us')
+    print(f'analyze_threats_many per tx:        {batch_per_tx * 1e6:10.1f} us')
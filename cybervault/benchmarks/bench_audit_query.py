@@ -0,0 +1,63 @@
+"""
+Benchmark: full JSONL scan vs sparse-indexed perpetual audit log queries
+Usage: python benchmarks/bench_audit_query.py [records] [log_dir]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import random
+import tempfile
+import time
+import modules.perpetual_audit as audit
+
+ACTIONS = ['transaction', 'login', 'vote', 'reputation_update', 'model_update']
+
+def full_scan(path, start, end, action):
+    found = []
+    for segment in audit.segment_paths(path):
+        with open(segment, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if start <= entry['timestamp'] <= end and (action is None or entry['action'] == action):
+                    found.append(entry)
+    return found
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000000
+    log_dir = sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp(prefix='cybervault-audit-')
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, 'perpetual_audit.log')
+    rng = random.Random(1)
+    start = time.perf_counter()
+    logger = audit.AuditLogger(path)
+    for i in range(n):
+        logger.log(rng.choice(ACTIONS), {'user_id': rng.randint(1, 10000), 'seq': i})
+        # A short burst of kill-switch activity in the middle of the log
+        if n // 2 <= i < n // 2 + 50:
+            logger.log('kill_switch', {'by': 'governance', 'seq': i})
+    logger.close()
+    size = sum(os.path.getsize(p) for p in audit.segment_paths(path))
+    print(f'Wrote {n} entries ({size / 1e9:.2f} GB, {len(audit.segment_paths(path))} segments) '
+          f'in {time.perf_counter() - start:.1f}s')
+
+    first = json.loads(open(audit.segment_paths(path)[0]).readline())['timestamp']
+    last = json.loads(audit._last_line(path))['timestamp']
+    mid = first + (last - first) * 0.6
+    window = (mid, mid + (last - first) * 0.001)
+    cases = [('0.1% time window', window[0], window[1], None),
+             ('0.1% window, votes', window[0], window[1], 'vote'),
+             ('kill_switch, all time', first, last, 'kill_switch')]
+    for label, lo, hi, action in cases:
+        audit._index_cache.clear()
+        indexed, cold = timed(lambda: list(audit.query(lo, hi, action, path=path)))
+        _, warm = timed(lambda: list(audit.query(lo, hi, action, path=path)))
+        scanned, scan = timed(lambda: full_scan(path, lo, hi, action))
+        assert [e['hash'] for e in indexed] == [e['hash'] for e in scanned]
+        print(f'{label:24s} {len(indexed):7d} hits  full scan {scan * 1000:9.1f}ms  '
+              f'indexed cold {cold * 1000:7.1f}ms  warm {warm * 1000:7.1f}ms')
@@ -0,0 +1,61 @@
+"""
+Benchmark: hex TEXT vs raw BLOB storage of encrypted transaction payloads
+Measures file size, insert and read+decrypt throughput, then runs the online
+migration on the hex database.
+Usage: python benchmarks/bench_blob_storage.py [rows]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import json
+import sqlite3
+import tempfile
+import time
+import warnings
+from security import get_cipher
+from db import as_bytes
+from blob_migrate import migrate_to_blobs
+
+warnings.filterwarnings('ignore')
+SCHEMA = 'CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, data TEXT, status TEXT, fraud_flag INTEGER, timestamp TEXT)'
+INSERT = 'INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?)'
+
+def build(path, payloads, as_hex):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    start = time.perf_counter()
+    with conn:
+        conn.executemany(INSERT, (('user', p.hex() if as_hex else p, 'queued', 0, 't') for p in payloads))
+    insert = time.perf_counter() - start
+    return conn, insert
+
+# (read + decode to bytes, read + decode + decrypt) seconds
+def read_all(conn, cipher):
+    start = time.perf_counter()
+    payloads = [as_bytes(r[0]) for r in conn.execute('SELECT data FROM transactions')]
+    read = time.perf_counter() - start
+    cipher.decrypt_many(payloads)
+    return read, time.perf_counter() - start
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    cipher = get_cipher('cybervault_super_secret_key')
+    payloads = cipher.encrypt_many([json.dumps({'amount': str(i), 'type': 'loan', 'note': 'x' * 40}) for i in range(n)])
+    with tempfile.TemporaryDirectory() as tmp:
+        hex_path, blob_path = os.path.join(tmp, 'hex.db'), os.path.join(tmp, 'blob.db')
+        hex_conn, hex_insert = build(hex_path, payloads, True)
+        blob_conn, blob_insert = build(blob_path, payloads, False)
+        hex_read, blob_read = read_all(hex_conn, cipher), read_all(blob_conn, cipher)
+        hex_size, blob_size = os.path.getsize(hex_path), os.path.getsize(blob_path)
+        start = time.perf_counter()
+        migrate_to_blobs(hex_conn)
+        migrate_time = time.perf_counter() - start
+        hex_conn.execute('VACUUM')
+        migrated_size = os.path.getsize(hex_path)
+        hex_conn.close()
+        blob_conn.close()
+    print(f'{n} encrypted transactions')
+    print(f'{"":<12}{"file MB":>10}{"insert rows/s":>16}{"read rows/s":>14}{"read+decrypt rows/s":>22}')
+    for name, size, insert, (read, decrypt) in [('hex TEXT', hex_size, hex_insert, hex_read), ('BLOB', blob_size, blob_insert, blob_read)]:
+        print(f'{name:<12}{size / 1e6:>10.1f}{n / insert:>16.0f}{n / read:>14.0f}{n / decrypt:>22.0f}')
+    print(f'Online migration: {n / migrate_time:.0f} rows/s, {migrated_size / 1e6:.1f} MB after VACUUM')
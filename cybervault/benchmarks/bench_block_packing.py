@@ -0,0 +1,67 @@
+"""
+Benchmark: one block per payload vs BlockProducer packing with Merkle roots
+Usage: python benchmarks/bench_block_packing.py [items] [max_items_per_block]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import tempfile
+import time
+from blockchain.blockchain import Block
+from blockchain.producer import BlockProducer
+from blockchain.validator import init_checkpoints, validate_chain
+from db import ConnectionPool
+from migrations import migrate
+from security import get_cipher
+
+AES_KEY = 'bench-key'
+
+# The pre-producer path: one BEGIN IMMEDIATE, tip lookup and block per payload
+def legacy_append(conn, cipher, payload):
+    enc = cipher.encrypt(json.dumps(payload))
+    with conn:
+        c = conn.cursor()
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('SELECT block_hash FROM blockchain ORDER BY id DESC LIMIT 1')
+        last = c.fetchone()
+        block = Block(index=0, previous_hash=last[0] if last else '', timestamp='', data=enc)
+        c.execute('INSERT INTO blockchain (block_hash, prev_hash, data, timestamp) VALUES (?, ?, ?, ?)',
+                  (block.hash, block.previous_hash, enc, ''))
+
+def report(label, db_file, elapsed, n):
+    conn = ConnectionPool(db_file).connection()
+    init_checkpoints(conn)
+    length = conn.execute('SELECT COUNT(*) FROM blockchain').fetchone()[0]
+    start = time.perf_counter()
+    result = validate_chain(conn, AES_KEY)
+    validate = time.perf_counter() - start
+    assert result['valid']
+    print(f'{label:8s} append {n / elapsed:8.0f} items/s  chain length {length:6d}  '
+          f'validate {validate * 1000:7.1f}ms ({validate / n * 1e6:.1f}us per item)')
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    per_block = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    cipher = get_cipher(AES_KEY)
+    payloads = [{'user_id': f'user-{i % 1000}', 'score': i % 50} for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db, packed_db = os.path.join(tmp, 'legacy.db'), os.path.join(tmp, 'packed.db')
+        for db_file in (legacy_db, packed_db):
+            migrate(ConnectionPool(db_file).connection())
+
+        conn = ConnectionPool(legacy_db).connection()
+        start = time.perf_counter()
+        for payload in payloads:
+            legacy_append(conn, cipher, payload)
+        report('legacy', legacy_db, time.perf_counter() - start, n)
+
+        producer = BlockProducer(ConnectionPool(packed_db), cipher, max_items=per_block)
+        start = time.perf_counter()
+        futures = [producer.submit('reputation', payload) for payload in payloads]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        producer.close()
+        report('packed', packed_db, elapsed, n)
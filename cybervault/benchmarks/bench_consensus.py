@@ -0,0 +1,55 @@
+"""
+Benchmark: str(chain) majority vote vs Merkle mountain range ledger comparison
+Usage: python benchmarks/bench_consensus.py [blocks] [peers]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import hashlib
+import time
+from collections import Counter
+from modules.consensus import MerkleLedger, find_divergence, heal_blockchain
+
+def legacy_heal(local_chain, peer_chains):
+    chains = [local_chain] + peer_chains
+    chain_hashes = [hashlib.sha256(str(chain).encode()).hexdigest() for chain in chains]
+    most_common = Counter(chain_hashes).most_common(1)[0][0]
+    for chain, h in zip(chains, chain_hashes):
+        if h == most_common:
+            return chain
+    return local_chain
+
+class CountingPeer:
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.size = ledger.size
+        self.exchanges = 0
+
+    def node(self, level, index):
+        self.exchanges += 1
+        return self.ledger.node(level, index)
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_peers = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    chain = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+    local = list(chain)
+    local[n - n // 10] = 'corrupted'
+    peers = [list(chain) for _ in range(n_peers)]
+
+    start = time.perf_counter()
+    healed = legacy_heal(local, peers)
+    legacy = time.perf_counter() - start
+    print(f'str(chain) vote: {legacy * 1000:.1f}ms, transfers {len(healed)} blocks')
+
+    start = time.perf_counter()
+    ledgers = [MerkleLedger(c) for c in [local] + peers]
+    print(f'Ledger build (one-off, then O(1) per appended block): {(time.perf_counter() - start) / len(ledgers) * 1000:.1f}ms per chain')
+    peer = CountingPeer(ledgers[1])
+    start = time.perf_counter()
+    divergence = find_divergence(ledgers[0], peer)
+    print(f'find_divergence: block {divergence} in {peer.exchanges} hash exchanges, {(time.perf_counter() - start) * 1e6:.0f}us')
+    start = time.perf_counter()
+    heal_blockchain(ledgers[0], ledgers[1:])
+    print(f'Merkle heal: {(time.perf_counter() - start) * 1000:.1f}ms, transfers {n - divergence} blocks; '
+          f'repaired root matches: {ledgers[0].root() == ledgers[1].root()}')
@@ -0,0 +1,71 @@
+"""
+Benchmark: per-request sqlite3.connect vs pooled WAL connections
+Replays the /transaction insert and /login lookup from app.py across worker threads.
+Usage: python benchmarks/bench_db_pool.py [requests] [threads]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import sqlite3
+import tempfile
+import threading
+import time
+from db import ConnectionPool
+
+SCHEMA = ('CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, pin_hash TEXT)',
+          'CREATE TABLE IF NOT EXISTS transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, data TEXT, status TEXT, fraud_flag INTEGER, timestamp TEXT)')
+INSERT_TX = 'INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?)'
+SELECT_USER = 'SELECT pin_hash FROM users WHERE id=?'
+
+def setup(db_file):
+    conn = sqlite3.connect(db_file)
+    for stmt in SCHEMA:
+        conn.execute(stmt)
+    conn.executemany('INSERT INTO users (id, pin_hash) VALUES (?, ?)', [(f'user{i}', 'x' * 64) for i in range(1000)])
+    conn.commit()
+    conn.close()
+
+# Baseline: what every handler branch did before the pool
+def request_connect_per_call(db_file, i):
+    conn = sqlite3.connect(db_file, timeout=30)
+    c = conn.cursor()
+    c.execute(SELECT_USER, (f'user{i % 1000}',))
+    c.fetchone()
+    c.execute(INSERT_TX, (f'user{i % 1000}', 'ab' * 48, 'queued', 0, '2024-01-01T00:00:00Z'))
+    conn.commit()
+    conn.close()
+
+def request_pooled(pool, i):
+    conn = pool.connection()
+    conn.execute(SELECT_USER, (f'user{i % 1000}',)).fetchone()
+    with conn:
+        conn.execute(INSERT_TX, (f'user{i % 1000}', 'ab' * 48, 'queued', 0, '2024-01-01T00:00:00Z'))
+
+def run(requests, threads, fn):
+    per_thread = requests // threads
+    def work(offset):
+        for i in range(offset, offset + per_thread):
+            fn(i)
+    workers = [threading.Thread(target=work, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        before_db = os.path.join(tmp, 'before.db')
+        after_db = os.path.join(tmp, 'after.db')
+        setup(before_db)
+        setup(after_db)
+        before = run(requests, threads, lambda i: request_connect_per_call(before_db, i))
+        pool = ConnectionPool(after_db)
+        after = run(requests, threads, lambda i: request_pooled(pool, i))
+        pool.close_all()
+    print(f'{requests} requests, {threads} threads')
+    print(f'connect per request: {before:10.0f} req/s')
+    print(f'pooled WAL:          {after:10.0f} req/s  ({after / before:.1f}x)')
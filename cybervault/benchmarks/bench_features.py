@@ -0,0 +1,91 @@
+"""
+Benchmark: per-user velocity features from a history query vs the incremental feature store
+Seeds a transactions table, then computes the same feature rows for a sample of new
+transactions both ways and reports the time per transaction.
+Usage: python benchmarks/bench_features.py [transactions] [users] [samples]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import json
+import shutil
+import tempfile
+import time
+import numpy as np
+from ai.features import FEATURE_NAMES, FeatureStore, parse_timestamp
+from db import ConnectionPool
+from migrations import migrate
+from security import get_cipher
+
+AES_KEY = 'cybervault_super_secret_key'
+START = 1_790_000_000
+SPAN = 14 * 86400
+
+def iso(ts):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(ts))
+
+def seed(pool, cipher, count, users, rng):
+    times = np.sort(rng.integers(START, START + SPAN, count))
+    user_ids = rng.integers(0, users, count)
+    amounts = rng.integers(1, 5000, count)
+    encrypted = cipher.encrypt_many([json.dumps({'amount': str(a), 'type': 'loan'}) for a in amounts])
+    conn = pool.connection()
+    with conn:
+        conn.executemany('INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?)',
+                         [(f'user-{u}', e, 'queued', 0, iso(int(t))) for u, e, t in zip(user_ids, encrypted, times)])
+        conn.execute('CREATE INDEX IF NOT EXISTS bench_user_time ON transactions (user_id, timestamp)')
+
+# What scoring without the store costs: fetch and decrypt the user's whole history
+def history_features(conn, cipher, user_id, amount, tx_type, ts):
+    rows = conn.execute('SELECT data, timestamp FROM transactions WHERE user_id = ? AND timestamp < ?',
+                        (user_id, iso(ts))).fetchall()
+    history = np.array([float(json.loads(p)['amount']) for p in cipher.decrypt_many([r[0] for r in rows])])
+    times = np.array([parse_timestamp(r[1]) for r in rows])
+    # Same windows as the store: the current 5-minute (hourly) bucket and the 11 (23) before it
+    hour, day = times >= (ts // 300 - 11) * 300, times >= (ts // 3600 - 23) * 3600
+    since = ts - times.max() if len(times) else -1.0
+    z = (amount - history.mean()) / history.std(ddof=1) if len(history) > 1 and history.std() > 0 else 0.0
+    return [amount, tx_type, ts // 3600 % 24, hour.sum(), history[hour].sum(), day.sum(), history[day].sum(), since, z]
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    samples = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    rng = np.random.default_rng(0)
+    root = tempfile.mkdtemp(prefix='cybervault-features-')
+    try:
+        pool = ConnectionPool(os.path.join(root, 'cybervault.db'))
+        migrate(pool.connection())
+        cipher = get_cipher(AES_KEY)
+        seed(pool, cipher, count, users, rng)
+
+        store = FeatureStore(pool=pool, cipher=cipher, path=os.path.join(root, 'features.npz'))
+        start = time.perf_counter()
+        store.sync()
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        store.save()
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        FeatureStore.open(store.path)
+        load = time.perf_counter() - start
+        print(f'{count} transactions, {users} users: initial sync {build:.2f}s, checkpoint '
+              f'{os.path.getsize(store.path) / 1e6:.1f} MB saved in {save * 1000:.0f}ms, loaded in {load * 1000:.0f}ms')
+
+        probe = [(f'user-{u}', int(a), 0, START + SPAN + 60) for u, a in zip(rng.integers(0, users, samples), rng.integers(1, 5000, samples))]
+        conn = pool.connection()
+        start = time.perf_counter()
+        naive = [history_features(conn, cipher, *p) for p in probe]
+        t_naive = (time.perf_counter() - start) / samples
+        start = time.perf_counter()
+        served = [store.matrix([u], [a], [k], [ts])[0] for u, a, k, ts in probe]
+        t_store = (time.perf_counter() - start) / samples
+        start = time.perf_counter()
+        batched = store.matrix(*zip(*probe))
+        t_batch = (time.perf_counter() - start) / samples
+        assert np.allclose(naive, served) and np.allclose(served, batched), 'feature store disagrees with history query'
+        print(f'features ({len(FEATURE_NAMES)}) per transaction: history query {t_naive * 1e6:.0f}us, '
+              f'feature store {t_store * 1e6:.1f}us, batched {t_batch * 1e6:.2f}us')
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
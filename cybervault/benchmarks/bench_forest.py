@@ -0,0 +1,74 @@
+"""
+Benchmark: scikit-learn RandomForestClassifier vs the compiled NumPy forest
+Reports cold-start time (fresh interpreter: import + load + first prediction) and
+per-batch scoring latency, and checks that both give the same predictions.
+Usage: python benchmarks/bench_forest.py [model.joblib] [repeats]
+"""
+import sys
+import os
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+import subprocess
+import tempfile
+import time
+import warnings
+import numpy as np
+from ai.forest import CompiledForest, export_forest
+
+BATCH_SIZES = (1, 16, 256, 4096)
+
+COLD_JOBLIB = '''
+import joblib, numpy as np
+clf = joblib.load({path!r})
+clf.predict(np.array([[5000, 0, 12]]))
+'''
+COLD_FOREST = '''
+import sys, numpy as np
+sys.path.append({root!r})
+from ai.forest import CompiledForest
+clf = CompiledForest.load({path!r})
+clf.predict(np.array([[5000, 0, 12]]))
+'''
+
+def cold_start(code, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-W', 'ignore', '-c', code], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def latency(predict, X, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == '__main__':
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'fraud_model.joblib')
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    import joblib
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        clf = joblib.load(model_path)
+    forest_path = os.path.join(tempfile.mkdtemp(prefix='cybervault-forest-'), 'model.npz')
+    export_forest(clf, forest_path)
+    forest = CompiledForest.load(forest_path)
+    print(f'model: {len(clf.estimators_)} trees, {os.path.getsize(model_path)} B joblib, {os.path.getsize(forest_path)} B npz')
+
+    python = cold_start('pass', repeats)
+    legacy = cold_start(COLD_JOBLIB.format(path=model_path), repeats)
+    compiled = cold_start(COLD_FOREST.format(root=ROOT, path=forest_path), repeats)
+    print(f'cold start (interpreter {python * 1000:.0f}ms): joblib+sklearn {legacy * 1000:.0f}ms, '
+          f'compiled forest {compiled * 1000:.0f}ms')
+
+    rng = np.random.default_rng(0)
+    print(f'{"batch":>6} | {"sklearn":>10} | {"compiled":>10} | speedup')
+    for size in BATCH_SIZES:
+        X = np.hstack([rng.integers(1, 10000, (size, 1)), rng.integers(0, 2, (size, 1)), rng.integers(0, 24, (size, 1))])
+        assert (clf.predict(X) == forest.predict(X)).all(), 'compiled forest disagrees with sklearn'
+        t_sk = latency(clf.predict, X, repeats * 20)
+        t_np = latency(forest.predict, X, repeats * 20)
+        print(f'{size:6d} | {t_sk * 1e6:8.0f}us | {t_np * 1e6:8.0f}us | {t_sk / t_np:6.1f}x')
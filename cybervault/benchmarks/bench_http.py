@@ -0,0 +1,141 @@
+"""
+Benchmark: end-to-end HTTP requests/sec against a running backend, before and after
+Starts backend/app.py on a free port in a temporary directory, then drives each
+endpoint from keep-alive client threads and reports requests/sec and latency. The
+baseline run serves the same handlers the way the server did before pooling: stock
+ThreadingHTTPServer, one thread per connection, and a sqlite3.connect per request.
+Usage: python benchmarks/bench_http.py [requests_per_endpoint] [threads]
+"""
+import sys
+import os
+import http.client
+import json
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+APP = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend', 'app.py'))
+# Run in the backend's working directory: app.py's handlers on the stdlib server, with
+# the connection pool swapped for a fresh connection on every db.connection() call
+BASELINE = f'''
+import http.server, os, sqlite3, sys
+sys.path.insert(0, {os.path.dirname(APP)!r})
+import app
+class PerRequestConnections:
+    def connection(self):
+        return sqlite3.connect(app.DB_FILE, timeout=30)
+class Handler(app.CyberVaultHandler):
+    handle = http.server.BaseHTTPRequestHandler.handle
+app.db = PerRequestConnections()
+http.server.ThreadingHTTPServer(('', int(os.environ['CYBERVAULT_PORT'])), Handler).serve_forever()
+'''
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_backend(root, port, baseline=False):
+    command = [sys.executable, '-c', BASELINE] if baseline else [sys.executable, APP]
+    proc = subprocess.Popen(command, cwd=root, env=dict(os.environ, CYBERVAULT_PORT=str(port)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/status')
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError('backend did not start')
+
+def call(conn, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = 'Bearer ' + token
+    conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, data
+
+# requests spread over threads, each on one keep-alive connection; make(i) -> (method, path, body)
+def drive(port, requests, threads, make, token=None):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def work(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine = []
+        for i in range(offset, requests, threads):
+            method, path, body = make(i)
+            start = time.perf_counter()
+            status, _ = call(conn, method, path, body, token)
+            mine.append(time.perf_counter() - start)
+            if status >= 400:
+                with lock:
+                    errors[0] += 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return requests / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], errors[0]
+
+ENDPOINTS = ['GET /status', 'POST /login', 'POST /transaction', 'GET /transactions', 'POST /reputation/query']
+
+def endpoint_requests(user_id):
+    return {
+        'GET /status': lambda i: ('GET', '/status', None),
+        'POST /login': lambda i: ('POST', '/login', {'username': 'bench', 'pin': '1234'}),
+        'POST /transaction': lambda i: ('POST', '/transaction', {
+            'user_id': user_id, 'data': {'amount': str(10 + i % 500), 'type': 'loan' if i % 2 else 'payment'},
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(1_790_000_000 + i)) + 'Z'}),
+        'GET /transactions': lambda i: ('GET', '/transactions?limit=100', None),
+        'POST /reputation/query': lambda i: ('POST', '/reputation/query', {'user_id': user_id}),
+    }
+
+# One fresh backend per mode; {endpoint: (req/s, p50, p99, errors)}
+def run(requests, threads, baseline):
+    root = tempfile.mkdtemp(prefix='cybervault-http-')
+    port = free_port()
+    proc = start_backend(root, port, baseline)
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        call(conn, 'POST', '/register', {'username': 'bench', 'pin': '1234'})
+        login = json.loads(call(conn, 'POST', '/login', {'username': 'bench', 'pin': '1234'})[1])
+        conn.close()
+        make = endpoint_requests(login['user_id'])
+        return {name: drive(port, requests, threads, make[name], login['token']) for name in ENDPOINTS}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print(f'{requests} requests per endpoint, {threads} keep-alive client threads')
+    results = {}
+    for mode, baseline in (('baseline', True), ('pooled', False)):
+        results[mode] = run(requests, threads, baseline)
+        print(f'\n{mode}' + (' (ThreadingHTTPServer, sqlite3.connect per request)' if baseline else ' (worker pool, pooled WAL connections)'))
+        for name, (rate, p50, p99, errors) in results[mode].items():
+            print(f'{name:24s} {rate:8.0f} req/s  p50 {p50 * 1000:6.2f}ms  p99 {p99 * 1000:7.2f}ms'
+                  + (f'  ({errors} errors)' if errors else ''))
+    print()
+    for name in ENDPOINTS:
+        before, after = results['baseline'][name][0], results['pooled'][name][0]
+        print(f'{name:24s} {before:8.0f} -> {after:8.0f} req/s  ({after / before:.2f}x)')
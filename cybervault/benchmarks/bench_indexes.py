@@ -0,0 +1,72 @@
+"""
+Benchmark: access-pattern queries before and after migration 2 (lookup indexes)
+Seeds a database with N transactions and N/10 blocks, times each query on the
+base schema, applies the index migration and times them again.
+Usage: python benchmarks/bench_indexes.py [rows]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import hashlib
+import random
+import sqlite3
+import tempfile
+import time
+from migrations import migrate
+
+QUERIES = {
+    'user history page': ('SELECT * FROM transactions WHERE id > 0 AND user_id = ? ORDER BY id ASC LIMIT 100', lambda r: (f'user{r.randrange(10000)}',)),
+    'status page': ('SELECT * FROM transactions WHERE id > 0 AND status = ? ORDER BY id ASC LIMIT 100', lambda r: ('flagged',)),
+    'time range': ('SELECT * FROM transactions WHERE timestamp >= ? AND timestamp < ? ORDER BY id ASC LIMIT 100', lambda r: ('2024-03-01', '2024-03-02')),
+    'block by hash': ('SELECT * FROM blockchain WHERE block_hash = ?', lambda r: (hashlib.sha256(str(r.randrange(ROWS // 10)).encode()).hexdigest(),)),
+    'block by prev_hash': ('SELECT * FROM blockchain WHERE prev_hash = ?', lambda r: (hashlib.sha256(str(r.randrange(ROWS // 10)).encode()).hexdigest(),)),
+}
+
+def seed(conn, rows):
+    migrate(conn, target=1)
+    rng = random.Random(1)
+    statuses = ['queued'] * 97 + ['mesh'] * 2 + ['flagged']
+    batch = []
+    for i in range(rows):
+        ts = f'2024-{1 + i * 12 // rows:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00Z'
+        batch.append((f'user{rng.randrange(10000)}', 'ab' * 48, rng.choice(statuses), 0, ts))
+        if len(batch) == 50000:
+            conn.executemany('INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?)', batch)
+            batch = []
+    if batch:
+        conn.executemany('INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?)', batch)
+    prev = ''
+    blocks = []
+    for i in range(rows // 10):
+        block_hash = hashlib.sha256(str(i).encode()).hexdigest()
+        blocks.append((block_hash, prev, 'ab' * 48, str(i)))
+        prev = block_hash
+    conn.executemany('INSERT INTO blockchain (block_hash, prev_hash, data, timestamp) VALUES (?, ?, ?, ?)', blocks)
+    conn.commit()
+
+def time_queries(conn, repeat=20):
+    results = {}
+    for name, (sql, make_args) in QUERIES.items():
+        rng = random.Random(2)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, make_args(rng)).fetchall()
+        results[name] = (time.perf_counter() - start) / repeat * 1000
+    return results
+
+if __name__ == '__main__':
+    ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        seed(conn, ROWS)
+        print(f'Seeded {ROWS} transactions, {ROWS // 10} blocks in {time.perf_counter() - start:.1f}s')
+        before = time_queries(conn, repeat=5)
+        start = time.perf_counter()
+        migrate(conn)
+        print(f'Migration 2 (indexes) applied in {time.perf_counter() - start:.1f}s')
+        after = time_queries(conn)
+        conn.close()
+    print(f'{"query":<20}{"before ms":>12}{"after ms":>12}')
+    for name in QUERIES:
+        print(f'{name:<20}{before[name]:>12.2f}{after[name]:>12.3f}')
@@ -0,0 +1,125 @@
+"""
+Benchmark: full-resend mesh sync vs IBLT set reconciliation between local nodes
+Starts real backend processes on local ports, one database each, and reports
+bytes transferred and sync time as the shared ledger grows.
+Usage: python benchmarks/bench_mesh_sync.py [sizes] [unique_per_node] [base_port]
+       e.g. python benchmarks/bench_mesh_sync.py 1000,10000,50000 50 18080
+"""
+import sys
+import os
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.dirname(BACKEND_DIR))
+import json
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+import urllib.request
+from mesh import INSERT_TRANSACTION, transaction_id
+from migrations import migrate
+from security import get_cipher
+
+# Must match AES_KEY in backend/app.py
+AES_KEY = 'cybervault_super_secret_key'
+
+def make_txs(prefix, count):
+    return [{'user_id': f'user-{i % 500}', 'data': {'amount': str(i % 9000 + 1), 'type': 'loan' if i % 3 else 'payment',
+             'memo': f'{prefix}-{i}'}, 'timestamp': f'2026-01-01T00:00:{i:08d}Z'} for i in range(count)]
+
+def seed(db_file, txs):
+    conn = sqlite3.connect(db_file)
+    migrate(conn)
+    cipher = get_cipher(AES_KEY)
+    encrypted = cipher.encrypt_many([json.dumps(tx['data']) for tx in txs])
+    with conn:
+        conn.executemany(INSERT_TRANSACTION, [(tx['user_id'], enc, 'mesh', 0, tx['timestamp'], transaction_id(tx))
+                                              for tx, enc in zip(txs, encrypted)])
+    conn.close()
+
+def content_ids(db_file):
+    conn = sqlite3.connect(db_file)
+    ids = {r[0] for r in conn.execute('SELECT content_id FROM transactions')}
+    conn.close()
+    return ids
+
+def post(port, path, payload, token=None):
+    body = json.dumps(payload).encode()
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', body, headers)
+    with urllib.request.urlopen(request, timeout=600) as response:
+        return json.loads(response.read()), len(body)
+
+class Node:
+    def __init__(self, root, name, port):
+        self.dir = os.path.join(root, name)
+        os.makedirs(self.dir)
+        self.db = os.path.join(self.dir, 'cybervault.db')
+        self.port = port
+        self.proc = None
+        self.token = None
+
+    def start(self):
+        env = dict(os.environ, CYBERVAULT_PORT=str(self.port))
+        self.proc = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, 'app.py')], cwd=self.dir, env=env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{self.port}/status', timeout=1).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline or self.proc.poll() is not None:
+                    raise RuntimeError(f'Node on port {self.port} did not start')
+                time.sleep(0.2)
+        post(self.port, '/register', {'username': 'bench', 'pin': '1234'})
+        self.token = post(self.port, '/login', {'username': 'bench', 'pin': '1234'})[0]['token']
+
+    def stop(self):
+        if self.proc:
+            self.proc.terminate()
+            self.proc.wait()
+
+if __name__ == '__main__':
+    sizes = [int(s) for s in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1000, 10000, 50000]
+    unique = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 18080
+    print(f'{"ledger":>8} {"delta":>6} | {"full resend":>12} {"time":>8} | {"reconcile":>10} {"time":>8} {"reqs":>4}')
+    for size in sizes:
+        root = tempfile.mkdtemp(prefix='cybervault-mesh-')
+        nodes = []
+        try:
+            shared = make_txs('shared', size)
+            a_txs = shared + make_txs('a', unique)
+            # b and c start identical: c receives the legacy full resend, b reconciles
+            a, b, c = (Node(root, name, port + i) for i, name in enumerate('abc'))
+            nodes = [a, b, c]
+            seed(a.db, a_txs)
+            seed(b.db, shared + make_txs('b', unique))
+            shutil.copy(b.db, c.db)
+            for node in nodes:
+                node.start()
+
+            start = time.perf_counter()
+            reply, full_bytes = post(c.port, '/mesh/sync', {'transactions': a_txs}, c.token)
+            full_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            stats, request_bytes = post(a.port, '/mesh/pull', {'peer': f'http://127.0.0.1:{b.port}', 'token': b.token}, a.token)
+            sync_time = time.perf_counter() - start
+            if 'error' in stats:
+                raise RuntimeError(stats['error'])
+            for node in nodes:
+                node.stop()
+            assert content_ids(a.db) == content_ids(b.db), 'nodes diverge after reconciliation'
+            moved = stats['bytes_sent'] + stats['bytes_received']
+            print(f'{size:8d} {2 * unique:6d} | {full_bytes:10d} B {full_time * 1000:6.0f}ms | '
+                  f'{moved:8d} B {sync_time * 1000:6.0f}ms {stats["requests"]:4d}')
+        finally:
+            for node in nodes:
+                node.stop()
+            shutil.rmtree(root, ignore_errors=True)
+        port += 3
@@ -0,0 +1,70 @@
+"""
+Benchmark: out-of-core training pipeline over a seeded transactions table
+Seeds a database with synthetic per-user streams, left unscored, with fraud_labels marking
+the amount spikes as confirmed fraud, then trains with one decryption worker and with a full pool and prints each
+run's timing and memory report.
+Usage: python benchmarks/bench_pipeline.py [transactions] [users] [fit_rows]
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import json
+import shutil
+import sqlite3
+import tempfile
+import time
+import numpy as np
+from ai.pipeline import AES_KEY, train
+from migrations import migrate
+from security import get_cipher
+
+START = 1_790_000_000
+SEED_BATCH = 100000
+
+def iso(ts):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(ts))
+
+def seed(db_file, count, users, rng):
+    conn = sqlite3.connect(db_file)
+    migrate(conn)
+    cipher = get_cipher(AES_KEY)
+    typical = rng.lognormal(5, 1, users)
+    span = count // users * 8 * 3600
+    for offset in range(0, count, SEED_BATCH):
+        n = min(SEED_BATCH, count - offset)
+        user = rng.integers(0, users, n)
+        times = START + np.sort(rng.integers(offset * span // count, (offset + n) * span // count, n))
+        amounts = np.maximum(1, rng.normal(typical[user], typical[user] / 4)).astype(int)
+        fraud = rng.random(n) < 0.01
+        amounts[fraud] *= 20
+        payloads = [json.dumps({'amount': str(a), 'type': 'loan' if t % 2 else 'payment'}) for a, t in zip(amounts, times)]
+        ids = range(offset + 1, offset + n + 1)
+        with conn:
+            conn.executemany('INSERT INTO transactions (id, user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+                             [(i, f'user-{u}', e, 'queued', 0, iso(int(t)))
+                              for i, u, e, t in zip(ids, user, cipher.encrypt_many(payloads), times)])
+            conn.executemany('INSERT INTO fraud_labels (transaction_id, label, source) VALUES (?, ?, ?)',
+                             [(i, int(f), 'synthetic') for i, f in zip(ids, fraud)])
+    conn.close()
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    fit_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 250000
+    rng = np.random.default_rng(0)
+    root = tempfile.mkdtemp(prefix='cybervault-pipeline-')
+    try:
+        db_file = os.path.join(root, 'cybervault.db')
+        start = time.perf_counter()
+        seed(db_file, count, users, rng)
+        print(f'seeded {count} transactions ({users} users) in {time.perf_counter() - start:.1f}s, '
+              f'{os.path.getsize(db_file) / 1e6:.0f} MB')
+        for workers in sorted({1, os.cpu_count() or 2}):
+            _, report = train(db_file, fit_rows, workers, models_dir=os.path.join(root, f'models-{workers}'))
+            print(f'workers={workers}: {report["total_seconds"]:.1f}s ({report["rows_per_second"]} rows/s), '
+                  f'{report["trees"]} trees in {report["fits"]} fits, peak RSS {report["peak_rss_mb"]:.0f} MB '
+                  f'(workers {report["worker_peak_rss_mb"]:.0f} MB)')
+            print('  seconds:', report['seconds'], 'holdout:', report.get('holdout'))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
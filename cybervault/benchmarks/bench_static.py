@@ -0,0 +1,36 @@
+"""
+Benchmark: static frontend serving against a running backend
+Reports requests/s and bytes per response for a full fetch, a gzip fetch and an
+If-None-Match revalidation of each asset.
+Usage: python benchmarks/bench_static.py [host:port] [requests]
+"""
+import sys
+import http.client
+import time
+
+ASSETS = ['/index.html', '/app.js', '/styles.css', '/service-worker.js', '/manifest.json']
+
+def fetch(conn, path, headers):
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    body = response.read()
+    return response.status, response.getheader('ETag'), len(body)
+
+def run(conn, path, headers, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        status, _, size = fetch(conn, path, headers)
+    return n / (time.perf_counter() - start), status, size
+
+if __name__ == '__main__':
+    host, _, port = (sys.argv[1] if len(sys.argv) > 1 else 'localhost:8080').partition(':')
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    conn = http.client.HTTPConnection(host, int(port or 8080))
+    print(f'{"asset":20s} {"full":>16s} {"gzip":>16s} {"revalidate":>16s}')
+    for path in ASSETS:
+        full = run(conn, path, {}, n)
+        gz = run(conn, path, {'Accept-Encoding': 'gzip'}, n)
+        _, etag, _ = fetch(conn, path, {'Accept-Encoding': 'gzip'})
+        reval = run(conn, path, {'Accept-Encoding': 'gzip', 'If-None-Match': etag or '"none"'}, n)
+        print(f'{path:20s} ' + ' '.join(f'{rate:6.0f}/s {size:5d}B{"" if status == 200 else f" {status}":4s}'
+                                         for rate, status, size in (full, gz, reval)))
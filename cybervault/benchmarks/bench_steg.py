@@ -0,0 +1,52 @@
+"""
+Benchmark: per-bit Python LSB codec (original steg.py) vs packbits/unpackbits codec
+The legacy codec is only run up to 256 KB; beyond that it takes minutes.
+Usage: python benchmarks/bench_steg.py
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+from steg.steg import encode_bytes_to_image, decode_bytes_from_image
+
+SIZES = [1024, 64 * 1024, 256 * 1024, 1024 * 1024, 8 * 1024 * 1024]
+LEGACY_MAX = 256 * 1024
+
+# The original implementation, inlined for comparison
+def legacy_encode(data_bytes, image_path):
+    data_bits = ''.join([bin(byte)[2:].zfill(8) for byte in data_bytes])
+    size = int(np.ceil(np.sqrt(len(data_bits) / 3)))
+    img = np.zeros((size, size, 3), dtype=np.uint8) + 255
+    flat = img.flatten()
+    for i, bit in enumerate(data_bits):
+        flat[i] = (flat[i] & 0xFE) | int(bit)  # ~1 overflows uint8 on NumPy 2
+    Image.fromarray(flat.reshape((size, size, 3))).save(image_path)
+
+def legacy_decode(image_path):
+    flat = np.array(Image.open(image_path)).flatten()
+    bits = [str(flat[i] & 1) for i in range(len(flat))]
+    return bytes([int(''.join(bits[i:i+8]), 2) for i in range(0, len(bits), 8)])
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+    print(f'{"payload":>10}{"legacy enc s":>14}{"legacy dec s":>14}{"new enc s":>12}{"new dec s":>12}')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.png')
+        for size in SIZES:
+            payload = os.urandom(size)
+            legacy = ('-', '-')
+            if size <= LEGACY_MAX:
+                _, enc = timed(legacy_encode, payload, path)
+                _, dec = timed(legacy_decode, path)
+                legacy = (f'{enc:.3f}', f'{dec:.3f}')
+            _, enc = timed(encode_bytes_to_image, payload, path)
+            out, dec = timed(decode_bytes_from_image, path)
+            assert out == payload
+            print(f'{size // 1024:>8}KB{legacy[0]:>14}{legacy[1]:>14}{enc:>12.3f}{dec:>12.3f}')
@@ -15,5 +15,7 @@ class Block:
         self.hash = self.calculate_hash()
 
     def calculate_hash(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.nonce}"
+        # Hash BLOB data by its hex form so stored format never changes the hash
+        data = self.data.hex() if isinstance(self.data, bytes) else self.data
+        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{data}{self.nonce}"
         return hashlib.sha256(block_string.encode()).hexdigest()
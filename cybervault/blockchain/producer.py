@@ -0,0 +1,151 @@
+"""
+CyberVault Block Producer - Packs many encrypted payloads into one block per seal
+Items are committed by a Merkle root stored as the block's data; blocks are sealed
+when enough items are pending or the oldest has waited long enough, and every item
+gets an inclusion proof against its block's root.
+"""
+import hashlib
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from backend.db import as_bytes
+from blockchain.blockchain import Block
+from modules.batching import run_batches
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+INSERT_BLOCK = 'INSERT INTO blockchain (block_hash, prev_hash, data, timestamp, item_count) VALUES (?, ?, ?, ?, ?)'
+INSERT_ITEM = 'INSERT INTO block_items (block_id, position, kind, timestamp, item_hash, data) VALUES (?, ?, ?, ?, ?, ?)'
+
+# Leaf commits to the item's timestamp (length-prefixed) and its encrypted payload
+def leaf_digest(timestamp, data):
+    ts = (timestamp or '').encode()
+    return hashlib.sha256(LEAF_PREFIX + len(ts).to_bytes(4, 'big') + ts + data).digest()
+
+def item_hash(timestamp, data):
+    return leaf_digest(timestamp, data).hex()
+
+# Tree levels (raw digests) from the hex leaves up; an unpaired last node is promoted, never duplicated
+def merkle_levels(leaves):
+    return merkle_levels_raw([bytes.fromhex(h) for h in leaves])
+
+def merkle_levels_raw(level):
+    levels = [level]
+    sha256 = hashlib.sha256
+    while len(level) > 1:
+        level = [sha256(NODE_PREFIX + level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)] + level[len(level) - len(level) % 2:]
+        levels.append(level)
+    return levels
+
+def merkle_root(leaves):
+    return merkle_levels(leaves)[-1][0].hex() if leaves else ''
+
+# Sibling path for the leaf at position: [{'side': 'left'|'right', 'hash': ...}, ...]
+def merkle_proof(levels, position):
+    proof = []
+    for level in levels[:-1]:
+        sibling = position ^ 1
+        if sibling < len(level):
+            proof.append({'side': 'left' if sibling < position else 'right', 'hash': level[sibling].hex()})
+        position //= 2
+    return proof
+
+def verify_proof(leaf, proof, root):
+    h = bytes.fromhex(leaf)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        h = hashlib.sha256(NODE_PREFIX + (sibling + h if step['side'] == 'left' else h + sibling)).digest()
+    return h.hex() == root
+
+# Proof for an item already on the chain, or None if the block or position is unknown
+def inclusion_proof(conn, block_hash, position):
+    block = conn.execute('SELECT id, data FROM blockchain WHERE block_hash=? AND item_count IS NOT NULL', (block_hash,)).fetchone()
+    if not block:
+        return None
+    leaves = [r[0] for r in conn.execute('SELECT item_hash FROM block_items WHERE block_id=? ORDER BY position', (block[0],))]
+    if not 0 <= position < len(leaves):
+        return None
+    # Hex root, whether stored as text or (after an older BLOB migration) as bytes
+    root = as_bytes(block[1]).hex()
+    proof = merkle_proof(merkle_levels(leaves), position)
+    return {'block_hash': block_hash, 'merkle_root': root, 'position': position,
+            'item_hash': leaves[position], 'proof': proof, 'valid': verify_proof(leaves[position], proof, root)}
+
+# A pending payload and the future its caller waits on
+class _Item:
+    def __init__(self, kind, payload, data, timestamp):
+        self.kind = kind
+        self.payload = payload
+        self.data = data
+        self.timestamp = timestamp
+        self.hash = item_hash(timestamp, data)
+        self.future = Future()
+
+# Single sealing thread: packs up to max_items pending payloads (or whatever arrived within
+# max_delay of the first) into one block. on_seal(conn, block_id, block_hash, items) runs in
+# the sealing transaction, so derived state (e.g. the reputation index) commits with the block;
+# on_commit(block_id, block_hash, items) runs after the commit, before any future resolves.
+class BlockProducer:
+    def __init__(self, pool, cipher, max_items=256, max_delay=0.05, on_seal=None, on_commit=None):
+        self.pool = pool
+        self.cipher = cipher
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.on_seal = on_seal
+        self.on_commit = on_commit
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='cybervault-block-producer', daemon=True)
+        self._thread.start()
+
+    # Encrypt and queue a payload; the future resolves to its block hash, position and proof
+    def submit(self, kind, payload, timestamp=''):
+        data = self.cipher.encrypt(json.dumps(payload))
+        item = _Item(kind, payload, data, str(timestamp) if timestamp else '')
+        self._queue.put(item)
+        return item.future
+
+    def add(self, kind, payload, timestamp=''):
+        return self.submit(kind, payload, timestamp).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = self.pool.connection()
+        conn.execute('PRAGMA synchronous=FULL')
+        run_batches(self._queue, lambda items: self._seal(conn, items), self.max_items, self.max_delay)
+
+    def _seal(self, conn, items):
+        levels = merkle_levels([item.hash for item in items])
+        root = levels[-1][0].hex()
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        try:
+            with conn:
+                c = conn.cursor()
+                # Link to the current tip; IMMEDIATE keeps concurrent appends from forking
+                c.execute('BEGIN IMMEDIATE')
+                c.execute('SELECT block_hash FROM blockchain ORDER BY id DESC LIMIT 1')
+                last = c.fetchone()
+                block = Block(index=0, previous_hash=last[0] if last else '', timestamp=timestamp, data=root)
+                c.execute(INSERT_BLOCK, (block.hash, block.previous_hash, root, timestamp, len(items)))
+                block_id = c.lastrowid
+                c.executemany(INSERT_ITEM, [(block_id, pos, item.kind, item.timestamp, item.hash, item.data)
+                                            for pos, item in enumerate(items)])
+                if self.on_seal:
+                    self.on_seal(conn, block_id, block.hash, items)
+        except Exception as e:
+            if len(items) > 1:
+                # One bad item must not fail its batch-mates: seal each on its own
+                for item in items:
+                    self._seal(conn, [item])
+            else:
+                items[0].future.set_exception(e)
+            return
+        if self.on_commit:
+            self.on_commit(block_id, block.hash, items)
+        for pos, item in enumerate(items):
+            item.future.set_result({'block_hash': block.hash, 'block_id': block_id, 'position': pos,
+                                    'merkle_root': root, 'item_hash': item.hash, 'proof': merkle_proof(levels, pos)})
@@ -0,0 +1,196 @@
+"""
+CyberVault Chain Validator - Hash-recomputing, checkpointed blockchain validation
+Incremental mode only verifies blocks appended since the last signed checkpoint;
+full mode re-verifies every block across worker processes. Packed blocks also have
+every item hash and their Merkle root recomputed. The server only runs incremental
+checks itself; full runs happen in a separate validator process, one at a time.
+"""
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from backend.db import as_bytes
+from blockchain.blockchain import Block
+from blockchain.producer import leaf_digest, merkle_levels_raw
+
+CHECKPOINT_SCHEMA = '''CREATE TABLE IF NOT EXISTS chain_checkpoints (id INTEGER PRIMARY KEY AUTOINCREMENT, block_id INTEGER, block_hash TEXT, length INTEGER, signature TEXT, created REAL)'''
+SELECT_BLOCKS = 'SELECT id, block_hash, prev_hash, data, timestamp, item_count FROM blockchain WHERE id > ? AND id <= ? ORDER BY id ASC'
+SELECT_ITEMS = 'SELECT timestamp, data FROM block_items WHERE block_id=? ORDER BY position'
+MAX_BLOCK_ID = 2 ** 63 - 1
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# The CLI reads the checkpoint secret from here when given '-', so it stays out of argv
+SECRET_ENV = 'CYBERVAULT_CHAIN_SECRET'
+
+def init_checkpoints(conn):
+    with conn:
+        conn.execute(CHECKPOINT_SCHEMA)
+
+def _sign(secret, block_id, block_hash, length):
+    key = hashlib.sha256(f'checkpoint:{secret}'.encode()).digest()
+    msg = f'{block_id}:{block_hash}:{length}'.encode()
+    return hmac.new(key, msg, hashlib.sha256).hexdigest()
+
+# Packed block: the Merkle root recomputed from every item's timestamp and payload is the
+# block's data (stored item hashes only serve proofs, which verify against this root).
+# The root is hex text, or raw bytes if an older BLOB migration converted it.
+def _check_items(conn, block_id, root, item_count):
+    leaves = [leaf_digest(timestamp, data) for timestamp, data in conn.execute(SELECT_ITEMS, (block_id,))]
+    return len(leaves) == item_count and merkle_levels_raw(leaves)[-1][0] == as_bytes(root)
+
+# Verify a run of blocks: links to the previous hash, recomputed block hashes and,
+# for packed blocks, their items
+def _check_blocks(conn, rows, prev_hash, last_id=None):
+    count = 0
+    for block_id, block_hash, block_prev_hash, data, timestamp, item_count in rows:
+        if block_prev_hash != prev_hash:
+            return False, block_id, last_id, prev_hash, count
+        if Block(index=0, previous_hash=block_prev_hash, timestamp=timestamp, data=data).hash != block_hash:
+            return False, block_id, last_id, prev_hash, count
+        if item_count is not None and not _check_items(conn, block_id, data, item_count):
+            return False, block_id, last_id, prev_hash, count
+        last_id, prev_hash = block_id, block_hash
+        count += 1
+    return True, None, last_id, prev_hash, count
+
+# Latest checkpoint, if its signature holds and its block is still on the chain
+def latest_checkpoint(conn, secret):
+    row = conn.execute('SELECT block_id, block_hash, length, signature FROM chain_checkpoints ORDER BY id DESC LIMIT 1').fetchone()
+    if not row:
+        return None
+    block_id, block_hash, length, signature = row
+    if not hmac.compare_digest(signature, _sign(secret, block_id, block_hash, length)):
+        return None
+    tip = conn.execute('SELECT block_hash FROM blockchain WHERE id=?', (block_id,)).fetchone()
+    if not tip or tip[0] != block_hash:
+        return None
+    return block_id, block_hash, length
+
+# Only the latest checkpoint is ever read, so older rows are pruned as it is written
+def save_checkpoint(conn, secret, block_id, block_hash, length):
+    with conn:
+        c = conn.execute('INSERT INTO chain_checkpoints (block_id, block_hash, length, signature, created) VALUES (?, ?, ?, ?, ?)',
+                         (block_id, block_hash, length, _sign(secret, block_id, block_hash, length), time.time()))
+        conn.execute('DELETE FROM chain_checkpoints WHERE id < ?', (c.lastrowid,))
+
+# Incremental validation: stream only the blocks after the last good checkpoint
+def validate_chain(conn, secret):
+    checkpoint = latest_checkpoint(conn, secret)
+    start_id, prev_hash, length = checkpoint or (0, '', 0)
+    cursor = conn.execute(SELECT_BLOCKS, (start_id, MAX_BLOCK_ID))
+    valid, first_invalid, last_id, last_hash, checked = _check_blocks(conn, cursor, prev_hash, start_id)
+    cursor.close()
+    if valid and checked:
+        save_checkpoint(conn, secret, last_id, last_hash, length + checked)
+    return {'valid': valid, 'length': length + checked, 'checked': checked, 'first_invalid': first_invalid}
+
+# Worker: verify one id segment in its own read-only connection
+def _validate_segment(db_file, lo, hi):
+    conn = sqlite3.connect(f'file:{db_file}?mode=ro', uri=True)
+    try:
+        cursor = conn.execute(SELECT_BLOCKS, (lo, hi))
+        first = cursor.fetchone()
+        if first is None:
+            return True, None, None, None, 0
+        valid, first_invalid, last_id, last_hash, count = _check_blocks(conn, [first], first[2])
+        if valid:
+            valid, first_invalid, last_id, last_hash, more = _check_blocks(conn, cursor, last_hash, last_id)
+            count += more
+        return valid, first_invalid, first[2], last_hash, count
+    finally:
+        conn.close()
+
+# Full revalidation: split the id range into segments, verify them in parallel,
+# then stitch segment boundaries (each segment's first prev_hash = previous last hash).
+# Workers are spawned, not forked, so this is safe to call from a threaded process.
+def validate_chain_full(db_file, secret, workers=None):
+    workers = workers or os.cpu_count() or 1
+    conn = sqlite3.connect(db_file)
+    try:
+        min_id, max_id = conn.execute('SELECT MIN(id), MAX(id) FROM blockchain').fetchone()
+        if min_id is None:
+            return {'valid': True, 'length': 0, 'checked': 0, 'first_invalid': None}
+        step = max(1, (max_id - min_id + workers) // workers)
+        bounds = [(lo, min(lo + step, max_id)) for lo in range(min_id - 1, max_id, step)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(bounds)), mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_validate_segment, db_file, lo, hi) for lo, hi in bounds]
+            results = [f.result() for f in futures]
+        prev_hash = ''
+        length = 0
+        for (lo, hi), (valid, first_invalid, first_prev_hash, last_hash, count) in zip(bounds, results):
+            if not count and valid:
+                continue
+            if first_prev_hash != prev_hash:
+                first_id = conn.execute('SELECT MIN(id) FROM blockchain WHERE id > ?', (lo,)).fetchone()[0]
+                return {'valid': False, 'length': length, 'checked': length, 'first_invalid': first_id}
+            if not valid:
+                return {'valid': False, 'length': length + count, 'checked': length + count, 'first_invalid': first_invalid}
+            prev_hash = last_hash
+            length += count
+        save_checkpoint(conn, secret, max_id, prev_hash, length)
+        return {'valid': True, 'length': length, 'checked': length, 'first_invalid': None}
+    finally:
+        conn.close()
+
+# Full revalidation in a child validator process (the CLI below), started on demand by the
+# server. At most one run is in flight; start() while one is running does nothing.
+class FullValidationJob:
+    def __init__(self, db_file, secret):
+        self.db_file = os.path.abspath(db_file)
+        self.secret = secret
+        self._lock = threading.Lock()
+        self._thread = None
+        self.started = self.finished = None
+        self.result = None
+
+    # True if this call started a run
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self.started, self.finished = time.time(), None
+            self._thread = threading.Thread(target=self._run, name='cybervault-full-validation', daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        env = dict(os.environ, **{SECRET_ENV: self.secret})
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+        proc = subprocess.run([sys.executable, '-m', 'blockchain.validator', self.db_file, '-', 'full'],
+                              cwd=ROOT, env=env, capture_output=True, text=True)
+        try:
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            result = {'error': f'Validator exited with {proc.returncode}', 'stderr': proc.stderr[-2000:]}
+        with self._lock:
+            self.result, self.finished = result, time.time()
+
+    def status(self):
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive()
+            return {'running': running, 'started': self.started, 'finished': self.finished, 'result': self.result}
+
+# CLI: python -m blockchain.validator <db_file> <secret|-> [full]
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('Usage: python -m blockchain.validator <db_file> <secret|-> [full]')
+        exit(1)
+    from backend.migrations import migrate
+    db_file, secret = sys.argv[1], sys.argv[2]
+    if secret == '-':
+        secret = os.environ[SECRET_ENV]
+    conn = sqlite3.connect(db_file)
+    migrate(conn)
+    init_checkpoints(conn)
+    if len(sys.argv) > 3 and sys.argv[3] == 'full':
+        conn.close()
+        print(json.dumps(validate_chain_full(db_file, secret)))
+    else:
+        print(json.dumps(validate_chain(conn, secret)))
+        conn.close()
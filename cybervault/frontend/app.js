@@ -161,6 +161,8 @@ async function handleTxSubmit(e) {
         const data = await res.json();
         if (data.fraud_flag) {
             document.getElementById('fraud-alert').textContent = 'Fraud detected!';
+        } else if (data.status === 'duplicate') {
+            document.getElementById('fraud-alert').textContent = 'Transaction already submitted.';
         } else {
             document.getElementById('fraud-alert').textContent = 'Transaction submitted.';
         }
@@ -179,7 +181,7 @@ async function syncQueuedTransactions() {
     for (const tx of txs) {
         await fetch(API_URL + '/transaction', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: { 'Content-Type': 'application/json', 'Authorization': 'Bearer ' + token },
             body: JSON.stringify(tx)
         });
     }
@@ -215,6 +217,7 @@ document.getElementById('register-form').addEventListener('submit', handleRegist
 document.getElementById('login-form').addEventListener('submit', handleLogin);
 document.getElementById('tx-form').addEventListener('submit', handleTxSubmit);
 document.getElementById('logout-btn').addEventListener('click', () => {
+    if (token) fetch(API_URL + '/logout', { method: 'POST', headers: { 'Authorization': 'Bearer ' + token } });
     userId = null; token = null;
     document.getElementById('auth-section').style.display = '';
     document.getElementById('main-section').style.display = 'none';
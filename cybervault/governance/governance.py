@@ -5,57 +5,118 @@ Offline-first: all actions are queued and validated locally, then synced when po
 """
 import hashlib
 import json
+import os
+import threading
 import time
-from backend.security import AESCipher
+from backend.security import get_cipher
+from backend.db import ConnectionPool
 from blockchain.blockchain import Block
 
 PROPOSALS_DB = 'governance_proposals.json'
+GOVERNANCE_DB = 'governance.db'
+APPROVAL_THRESHOLD = 3
 
-# Load or initialize local proposals db
-def load_proposals():
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS proposals (id TEXT PRIMARY KEY, proposer TEXT, change_data TEXT, enc_data BLOB, timestamp REAL, status TEXT, vote_count INTEGER)',
+    'CREATE TABLE IF NOT EXISTS votes (proposal_id TEXT, voter TEXT, PRIMARY KEY (proposal_id, voter)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS idx_proposals_status ON proposals (status)',
+)
+INSERT_VOTE = 'INSERT OR IGNORE INTO votes (proposal_id, voter) SELECT ?, ? WHERE EXISTS (SELECT 1 FROM proposals WHERE id=?)'
+COUNT_VOTE = f'''UPDATE proposals SET vote_count = vote_count + 1,
+    status = CASE WHEN vote_count + 1 >= {APPROVAL_THRESHOLD} THEN 'approved' ELSE status END WHERE id=?'''
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Indexed proposal store (SQLite); created on first use
+def _db():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_file != GOVERNANCE_DB:
+            _pool = ConnectionPool(GOVERNANCE_DB)
+            conn = _pool.connection()
+            with conn:
+                for stmt in SCHEMA:
+                    conn.execute(stmt)
+            _import_legacy_proposals(conn)
+    return _pool.connection()
+
+# One-time import of the old JSON proposals file
+def _import_legacy_proposals(conn):
+    if not os.path.exists(PROPOSALS_DB):
+        return
     try:
         with open(PROPOSALS_DB, 'r') as f:
-            return json.load(f)
+            proposals = json.load(f)
     except Exception:
-        return []
+        return
+    with conn:
+        for p in proposals:
+            enc_data = bytes.fromhex(p['enc_data']) if p.get('enc_data') else None
+            conn.execute('INSERT OR IGNORE INTO proposals (id, proposer, change_data, enc_data, timestamp, status, vote_count) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (p['id'], p['proposer'], json.dumps(p['change_data']), enc_data, p['timestamp'], p['status'], len(p['votes'])))
+            conn.executemany('INSERT OR IGNORE INTO votes (proposal_id, voter) VALUES (?, ?)', [(p['id'], v) for v in p['votes']])
+    os.replace(PROPOSALS_DB, PROPOSALS_DB + '.imported')
 
-def save_proposals(proposals):
-    with open(PROPOSALS_DB, 'w') as f:
-        json.dump(proposals, f)
+def _row_to_proposal(row, votes):
+    proposal_id, proposer, change_data, enc_data, timestamp, status = row
+    return {'id': proposal_id, 'proposer': proposer, 'change_data': json.loads(change_data), 'votes': votes,
+            'timestamp': timestamp, 'status': status, 'enc_data': enc_data.hex() if enc_data else None}
+
+# Load all proposals (same shape as the old JSON records); two queries, whatever the count
+def load_proposals():
+    conn = _db()
+    rows = conn.execute('SELECT id, proposer, change_data, enc_data, timestamp, status FROM proposals ORDER BY timestamp').fetchall()
+    votes = {}
+    for proposal_id, voter in conn.execute('SELECT proposal_id, voter FROM votes ORDER BY proposal_id, voter'):
+        votes.setdefault(proposal_id, []).append(voter)
+    return [_row_to_proposal(row, votes.get(row[0], [])) for row in rows]
+
+# O(1) lookup by proposal id
+def get_proposal(proposal_id):
+    conn = _db()
+    row = conn.execute('SELECT id, proposer, change_data, enc_data, timestamp, status FROM proposals WHERE id=?', (proposal_id,)).fetchone()
+    if not row:
+        return None
+    votes = [v for (v,) in conn.execute('SELECT voter FROM votes WHERE proposal_id=? ORDER BY voter', (proposal_id,))]
+    return _row_to_proposal(row, votes)
 
 # Submit a new proposal
 def submit_proposal(proposer, change_data, aes_key):
-    proposals = load_proposals()
-    proposal = {
-        'id': hashlib.sha256(f'{proposer}{time.time()}'.encode()).hexdigest(),
-        'proposer': proposer,
-        'change_data': change_data,
-        'votes': [proposer],
-        'timestamp': time.time(),
-        'status': 'pending'
-    }
-    aes = AESCipher(aes_key)
-    proposal['enc_data'] = aes.encrypt(json.dumps(change_data)).hex()
-    proposals.append(proposal)
-    save_proposals(proposals)
-    return proposal['id']
+    proposal_id = hashlib.sha256(f'{proposer}{time.time()}'.encode()).hexdigest()
+    aes = get_cipher(aes_key)
+    enc_data = aes.encrypt(json.dumps(change_data))
+    conn = _db()
+    with conn:
+        conn.execute('INSERT INTO proposals (id, proposer, change_data, enc_data, timestamp, status, vote_count) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     (proposal_id, proposer, json.dumps(change_data), enc_data, time.time(), 'pending', 1))
+        conn.execute('INSERT INTO votes (proposal_id, voter) VALUES (?, ?)', (proposal_id, proposer))
+    return proposal_id
+
+def _apply_vote(conn, proposal_id, voter):
+    if conn.execute(INSERT_VOTE, (proposal_id, voter, proposal_id)).rowcount:
+        conn.execute(COUNT_VOTE, (proposal_id,))
+        return True
+    return False
 
 # Vote on a proposal
 def vote_proposal(proposal_id, voter):
-    proposals = load_proposals()
-    for p in proposals:
-        if p['id'] == proposal_id and voter not in p['votes']:
-            p['votes'].append(voter)
-            if len(p['votes']) >= 3:
-                p['status'] = 'approved'
-    save_proposals(proposals)
+    conn = _db()
+    with conn:
+        _apply_vote(conn, proposal_id, voter)
     return True
 
+# Apply votes gathered offline in one transaction; returns how many were new
+def bulk_vote(votes):
+    conn = _db()
+    with conn:
+        return sum(_apply_vote(conn, proposal_id, voter) for proposal_id, voter in votes)
+
 # Activate kill switch if approved
 def activate_kill_switch(aes_key):
-    proposals = load_proposals()
-    for p in proposals:
-        if p['status'] == 'approved' and 'kill' in p['change_data']:
+    conn = _db()
+    for (change_data,) in conn.execute("SELECT change_data FROM proposals WHERE status='approved'"):
+        if 'kill' in json.loads(change_data):
             # Store kill event on blockchain
             block = Block(index=0, previous_hash='', timestamp=str(time.time()), data='KILL_SWITCH')
             # (Assume blockchain DB integration elsewhere)
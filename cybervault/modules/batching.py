@@ -0,0 +1,49 @@
+"""
+Micro-batching - Shared consumer loop for the background batching threads
+Items queued by concurrent callers are handed over in batches bounded by size or by
+the time since the first item arrived. Every item carries a Future; if handling a
+batch raises, the batch's unresolved futures fail instead of leaving callers waiting.
+"""
+import queue
+import time
+
+# Block for the first item, then take more until max_size (counted with size(item)) or
+# max_delay has passed; returns (batch, stop). A None item is the stop sentinel.
+def drain_batch(q, max_size, max_delay, size=None):
+    item = q.get()
+    if item is None:
+        return [], True
+    batch = [item]
+    total = size(item) if size else 1
+    deadline = time.monotonic() + max_delay
+    while total < max_size:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            item = q.get(timeout=timeout)
+        except queue.Empty:
+            break
+        if item is None:
+            return batch, True
+        batch.append(item)
+        total += size(item) if size else 1
+    return batch, False
+
+# Consumer thread body: handle(batch) per batch until the sentinel; anything it raises
+# (or leaves unresolved) fails that batch's futures, and the loop carries on
+def run_batches(q, handle, max_size, max_delay, size=None):
+    stop = False
+    while not stop:
+        batch, stop = drain_batch(q, max_size, max_delay, size)
+        if not batch:
+            continue
+        try:
+            handle(batch)
+        except Exception as e:
+            error = e
+        else:
+            error = RuntimeError('Batch finished without a result for this item')
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(error)
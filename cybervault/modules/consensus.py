@@ -1,21 +1,138 @@
 """
 Distributed, Self-Healing Consensus Blockchain
 Hybrid proof-of-authority and proof-of-activity, auto-heals by comparing ledgers.
+Each ledger keeps a Merkle mountain range over its blocks, so peers agree on a
+root in O(1), locate the first divergent block in O(log n) hash exchanges, and
+repair by transferring only the divergent suffix.
 """
 import hashlib
+import threading
+from collections import Counter
 
-# Compare local ledgers and repair corrupted blocks
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+# Blocks hash by their own hash when they carry one (Block objects, stored block hashes)
+def block_digest(block):
+    digest = getattr(block, 'hash', None)
+    return digest if isinstance(digest, str) else str(block)
+
+def leaf_hash(block):
+    return hashlib.sha256(LEAF_PREFIX + block_digest(block).encode()).digest()
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+# Perfect subtrees (level, index) covering leaves [0, size), largest first
+def _peak_positions(size):
+    positions = []
+    start = 0
+    for level in range(size.bit_length() - 1, -1, -1):
+        if size & (1 << level):
+            positions.append((level, start >> level))
+            start += 1 << level
+    return positions
+
+# Append-only Merkle mountain range: levels[k][i] is the hash of leaves [i*2^k, (i+1)*2^k)
+class MerkleLedger:
+    def __init__(self, blocks=None):
+        self.blocks = []
+        self.levels = [[]]
+        self._lock = threading.RLock()
+        self.extend(blocks or [])
+
+    def __len__(self):
+        return len(self.blocks)
+
+    @property
+    def size(self):
+        return len(self.blocks)
+
+    # O(1) amortized: a node is added whenever its right child completes
+    def append(self, block):
+        with self._lock:
+            self.blocks.append(block)
+            h = leaf_hash(block)
+            self.levels[0].append(h)
+            level = 0
+            while len(self.levels[level]) % 2 == 0:
+                pair = self.levels[level][-2:]
+                if len(self.levels) == level + 1:
+                    self.levels.append([])
+                level += 1
+                self.levels[level].append(node_hash(pair[0], pair[1]))
+
+    def extend(self, blocks):
+        for block in blocks:
+            self.append(block)
+
+    # Drop blocks from index size onwards
+    def truncate(self, size):
+        with self._lock:
+            del self.blocks[size:]
+            for level, hashes in enumerate(self.levels):
+                del hashes[size >> level:]
+            while len(self.levels) > 1 and not self.levels[-1]:
+                self.levels.pop()
+
+    # Hash of a complete aligned subtree, or None if it does not exist (yet)
+    def node(self, level, index):
+        with self._lock:
+            if level < len(self.levels) and index < len(self.levels[level]):
+                return self.levels[level][index]
+            return None
+
+    def peaks(self):
+        with self._lock:
+            return [self.levels[level][index] for level, index in _peak_positions(self.size)]
+
+    # Commits to the size and every peak
+    def root(self):
+        with self._lock:
+            h = hashlib.sha256(self.size.to_bytes(8, 'big'))
+            for peak in self.peaks():
+                h.update(peak)
+            return h.digest()
+
+    def blocks_from(self, start):
+        with self._lock:
+            return self.blocks[start:]
+
+# First block index at which two ledgers differ (None if identical). remote only needs
+# size and node(level, index), so it can be a proxy for a peer's ledger; every node
+# call is one hash exchange: O(log n) to compare peaks, then O(log n) to descend.
+def find_divergence(local, remote):
+    common = min(local.size, remote.size)
+    for level, index in _peak_positions(common):
+        if local.node(level, index) == remote.node(level, index):
+            continue
+        while level > 0:
+            level, index = level - 1, index * 2
+            if local.node(level, index) == remote.node(level, index):
+                index += 1
+        return index
+    return None if local.size == remote.size else common
+
+def _as_ledger(chain):
+    return chain if isinstance(chain, MerkleLedger) else MerkleLedger(chain)
+
+# Compare local ledgers and repair corrupted blocks: the majority root wins, and the
+# local chain keeps its agreeing prefix and takes only the divergent suffix from a winner
 def heal_blockchain(local_chain, peer_chains):
-    # Find the most common valid chain among peers
-    chains = [local_chain] + peer_chains
-    chain_hashes = [hashlib.sha256(str(chain).encode()).hexdigest() for chain in chains]
-    # Majority wins
-    from collections import Counter
-    most_common = Counter(chain_hashes).most_common(1)[0][0]
-    for chain, h in zip(chains, chain_hashes):
-        if h == most_common:
-            return chain
-    return local_chain
+    local = _as_ledger(local_chain)
+    peers = [_as_ledger(chain) for chain in peer_chains]
+    roots = [ledger.root() for ledger in [local] + peers]
+    majority = Counter(roots).most_common(1)[0][0]
+    if roots[0] == majority:
+        return local_chain
+    winner = peers[roots.index(majority) - 1]
+    start = find_divergence(local, winner)
+    suffix = winner.blocks_from(start)
+    if isinstance(local_chain, MerkleLedger):
+        local_chain.truncate(start)
+        local_chain.extend(suffix)
+        return local_chain
+    return list(local_chain[:start]) + list(suffix)
 
 # Hybrid consensus: require both signatures and activity
 # To be expanded with real signature/activity checks
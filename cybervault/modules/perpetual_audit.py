@@ -1,23 +1,435 @@
 """
 Perpetual Audit & Transparency Engine
 Immutably logs every action, model update, and governance vote with ZKP stubs.
+Entries are buffered in memory, group-written by a background flusher, and
+hash-chained across size-rotated log segments for tamper evidence. A sparse
+index of time ranges and actions per block of records lets queries seek
+straight to the relevant parts of the log.
 """
-import time
+import atexit
+import glob
+import hashlib
 import json
+import os
+import threading
+import time
+from collections import deque
 
 AUDIT_LOG = 'perpetual_audit.log'
+BUFFER_CAPACITY = 4096
+FLUSH_INTERVAL = 0.05
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+GENESIS_HASH = '0' * 64
+INDEX_BLOCK_RECORDS = 1024
+READ_CHUNK = 1024 * 1024
+
+# Canonical form of the hashed fields; the stored line is this body plus the chain fields
+def _canonical(timestamp, action, details):
+    return json.dumps({'timestamp': timestamp, 'action': action, 'details': details}, sort_keys=True)
+
+# The hash covers the body text exactly as stored, so it never depends on a JSON round trip
+def entry_hash(prev_hash, body):
+    return hashlib.sha256((prev_hash + body).encode()).hexdigest()
+
+# Hashed body of a stored line: everything before the chain fields, re-closed
+def _stored_body(line):
+    cut = line.rfind(', "prev_hash": ')
+    return None if cut == -1 else line[:cut] + '}'
+
+def _rotated_segments(path):
+    return sorted(glob.glob(glob.escape(path) + '.[0-9]*'))
+
+# Rotated segments (oldest first) followed by the active log
+def segment_paths(path=AUDIT_LOG):
+    return _rotated_segments(path) + ([path] if os.path.exists(path) else [])
+
+# Segments are numbered from 1; the active log carries the number it will be rotated to
+def _numbered_segments(path):
+    rotated = [(int(p.rsplit('.', 1)[1]), p) for p in _rotated_segments(path)]
+    active = rotated[-1][0] + 1 if rotated else 1
+    return rotated + [(active, path)]
+
+def index_path(path=AUDIT_LOG):
+    return path + '.idx'
+
+def _last_byte(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1)
+
+def _last_line(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b''
+        while pos > 0 and tail.count(b'\n') < 2:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+    lines = tail.rstrip(b'\n').split(b'\n')
+    return lines[-1] if lines and lines[-1] else None
+
+# Yield (line size, entry) for each complete line from offset; entry is None if unreadable.
+# With a needle, lines that do not contain it are skipped without being parsed.
+# The file is read READ_CHUNK bytes at a time, so memory stays flat on large segments.
+def _read_entries(file_path, offset=0, length=None, needle=None):
+    remaining = length
+    tail = b''
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        while remaining is None or remaining > 0:
+            chunk = f.read(READ_CHUNK if remaining is None else min(READ_CHUNK, remaining))
+            if not chunk:
+                return
+            if remaining is not None:
+                remaining -= len(chunk)
+            data = tail + chunk
+            end = data.rfind(b'\n') + 1
+            pos = 0
+            while pos < end:
+                nl = data.index(b'\n', pos) + 1
+                if needle is not None and data.find(needle, pos, nl) == -1:
+                    pos = nl
+                    continue
+                try:
+                    entry = json.loads(data[pos:nl])
+                except ValueError:
+                    entry = None
+                yield nl - pos, entry
+                pos = nl
+            tail = data[end:]
+
+# Index entry for a contiguous run of up to INDEX_BLOCK_RECORDS lines in one segment
+class _IndexBlock:
+    def __init__(self, segment, offset):
+        self.segment = segment
+        self.offset = offset
+        self.length = 0
+        self.count = 0
+        self.t_min = self.t_max = None
+        self.actions = set()
+
+    @property
+    def end(self):
+        return self.offset + self.length
+
+    def add(self, size, timestamp=None, action=None):
+        self.length += size
+        if timestamp is None:
+            return
+        self.count += 1
+        self.t_min = timestamp if self.t_min is None else min(self.t_min, timestamp)
+        self.t_max = timestamp if self.t_max is None else max(self.t_max, timestamp)
+        self.actions.add(action)
+
+    def entry(self):
+        return {'segment': self.segment, 'offset': self.offset, 'length': self.length, 'count': self.count,
+                't_min': self.t_min, 't_max': self.t_max, 'actions': sorted(self.actions, key=str)}
+
+_index_cache = {}
+_index_cache_lock = threading.Lock()
+
+def _extend_ends(ends, entries):
+    for e in entries:
+        ends[e['segment']] = max(ends.get(e['segment'], 0), e['offset'] + e['length'])
+
+# Parsed index entries plus the indexed end offset of each segment;
+# only lines appended since the last call are read
+def _load_index(path):
+    idx = index_path(path)
+    with _index_cache_lock:
+        pos, entries, ends = _index_cache.get(idx, (0, [], {}))
+        try:
+            size = os.path.getsize(idx)
+        except OSError:
+            _index_cache.pop(idx, None)
+            return [], {}
+        if size < pos:
+            pos, entries, ends = 0, [], {}
+        if size > pos:
+            with open(idx, 'rb') as f:
+                f.seek(pos)
+                data = f.read(size - pos)
+            data = data[:data.rfind(b'\n') + 1]
+            new = [json.loads(line) for line in data.splitlines()]
+            entries = entries + new
+            ends = dict(ends)
+            _extend_ends(ends, new)
+            pos += len(data)
+        _index_cache[idx] = (pos, entries, ends)
+        return entries, ends
+
+# Index every record not yet covered by the index. The active segment's trailing
+# partial block is sealed too, unless seal_active is False, in which case it is returned open.
+def build_index(path=AUDIT_LOG, seal_active=True):
+    _, indexed = _load_index(path)
+    segments = _numbered_segments(path)
+    active = segments[-1][0]
+    sealed = []
+    open_block = _IndexBlock(active, indexed.get(active, 0))
+    for number, file_path in segments:
+        if not os.path.exists(file_path):
+            continue
+        block = _IndexBlock(number, indexed.get(number, 0))
+        for size, entry in _read_entries(file_path, block.offset):
+            if entry is None:
+                block.add(size)
+            else:
+                block.add(size, entry.get('timestamp', 0), entry.get('action'))
+            if block.count >= INDEX_BLOCK_RECORDS:
+                sealed.append(block.entry())
+                block = _IndexBlock(number, block.end)
+        if number == active and not seal_active:
+            open_block = block
+        elif block.length:
+            sealed.append(block.entry())
+    if sealed:
+        with open(index_path(path), 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(e) + '\n' for e in sealed))
+    return open_block
+
+def _matches(entry, start, end, action, predicate):
+    if entry is None:
+        return False
+    ts = entry.get('timestamp', 0)
+    if (start is not None and ts < start) or (end is not None and ts > end):
+        return False
+    if action is not None and entry.get('action') != action:
+        return False
+    return predicate is None or predicate(entry)
+
+# Entries with start <= timestamp <= end (either bound optional), of the given action,
+# for which predicate(entry) holds. Reads only index blocks that can match, plus
+# whatever the index does not cover yet.
+def query(start=None, end=None, action=None, predicate=None, path=AUDIT_LOG):
+    if _logger is not None and _logger.path == path:
+        _logger.flush()
+    entries, indexed = _load_index(path)
+    files = dict(_numbered_segments(path))
+    # A byte test on the serialized action skips most non-matching lines unparsed
+    needle = None if action is None else ('"action": ' + json.dumps(action) + ',').encode()
+    for e in entries:
+        if e['count'] == 0 or e['segment'] not in files:
+            continue
+        if (start is not None and e['t_max'] < start) or (end is not None and e['t_min'] > end):
+            continue
+        if action is not None and action not in e['actions']:
+            continue
+        for _, entry in _read_entries(files[e['segment']], e['offset'], e['length'], needle):
+            if _matches(entry, start, end, action, predicate):
+                yield entry
+    for number, file_path in files.items():
+        if os.path.exists(file_path) and os.path.getsize(file_path) > indexed.get(number, 0):
+            for _, entry in _read_entries(file_path, indexed.get(number, 0), needle=needle):
+                if _matches(entry, start, end, action, predicate):
+                    yield entry
+
+class AuditLogger:
+    def __init__(self, path=AUDIT_LOG, capacity=BUFFER_CAPACITY, flush_interval=FLUSH_INTERVAL,
+                 fsync=False, segment_bytes=SEGMENT_MAX_BYTES):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.segment_bytes = segment_bytes
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._enqueued = 0
+        self._written = 0
+        self._closed = False
+        self._error = None
+        self._last_hash = self._recover_last_hash()
+        self._file = open(path, 'ab')
+        if self._file.tell() and _last_byte(path) != b'\n':
+            # Terminate a line torn by a crash so new records start cleanly
+            self._file.write(b'\n')
+            self._file.flush()
+        self._block = build_index(path, seal_active=False)
+        self._segment_no = self._block.segment
+        self._index = open(index_path(path), 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='cybervault-audit-flusher', daemon=True)
+        self._thread.start()
+
+    def _recover_last_hash(self):
+        for segment in reversed(segment_paths(self.path)):
+            line = _last_line(segment)
+            if line:
+                try:
+                    return json.loads(line).get('hash', GENESIS_HASH)
+                except ValueError:
+                    # Torn final line; verify_chain reports it
+                    return GENESIS_HASH
+        return GENESIS_HASH
+
+    # Hot path: append to the ring buffer; blocks (back-pressure) while it is full.
+    # Details are serialized here, so unserializable input raises to the caller.
+    def log(self, action, details):
+        timestamp = time.time()
+        body = _canonical(timestamp, action, details)
+        with self._cond:
+            while len(self._buffer) >= self.capacity and not self._closed and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise RuntimeError('Audit log write failed') from self._error
+            if self._closed:
+                raise RuntimeError('Audit logger is closed')
+            self._buffer.append((timestamp, action, body))
+            self._enqueued += 1
+            if len(self._buffer) == 1:
+                self._cond.notify_all()
+
+    # Block until everything logged so far is written (and fsynced, if enabled)
+    def flush(self):
+        with self._cond:
+            target = self._enqueued
+            self._cond.notify_all()
+            while self._written < target and self._error is None:
+                self._cond.wait()
+            if self._written < target:
+                raise RuntimeError('Audit log write failed') from self._error
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._block.length:
+            self._index.write(json.dumps(self._block.entry()) + '\n')
+        self._file.close()
+        self._index.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if not self._buffer:
+                    return
+                batch = list(self._buffer)
+                self._buffer.clear()
+                self._cond.notify_all()
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # The chain can't continue past a failed write; stop taking entries
+                # and wake everyone waiting instead of leaving them blocked
+                with self._cond:
+                    self._error = e
+                    self._buffer.clear()
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+
+    # One write (and at most one fsync) per batch and segment; chain hashes and index
+    # blocks are computed here, off the hot path
+    def _write_batch(self, batch):
+        lines = []
+        sealed = []
+        size = self._file.tell()
+        for timestamp, action, body in batch:
+            prev_hash = self._last_hash
+            self._last_hash = entry_hash(prev_hash, body)
+            line = f'{body[:-1]}, "prev_hash": "{prev_hash}", "hash": "{self._last_hash}"}}\n'.encode()
+            # Rotate before a record that would take the segment past its limit
+            if size and size + len(line) > self.segment_bytes:
+                self._write_lines(lines)
+                lines = []
+                if self._block.length:
+                    sealed.append(self._block.entry())
+                self._rotate()
+                self._block = _IndexBlock(self._segment_no, 0)
+                size = 0
+            lines.append(line)
+            size += len(line)
+            self._block.add(len(line), timestamp, action)
+            if self._block.count >= INDEX_BLOCK_RECORDS:
+                sealed.append(self._block.entry())
+                self._block = _IndexBlock(self._segment_no, self._block.end)
+        self._write_lines(lines)
+        # Index entries only ever point at data already written
+        if sealed:
+            self._index.write(''.join(json.dumps(e) + '\n' for e in sealed))
+            self._index.flush()
+
+    def _write_lines(self, lines):
+        if not lines:
+            return
+        self._file.write(b''.join(lines))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _rotate(self):
+        self._file.close()
+        os.replace(self.path, f'{self.path}.{self._segment_no:06d}')
+        self._segment_no += 1
+        self._file = open(self.path, 'ab')
+
+# Walk every segment and recompute the chain; returns (valid, entries checked, bad location)
+def verify_chain(path=AUDIT_LOG):
+    prev_hash = GENESIS_HASH
+    checked = 0
+    for segment in segment_paths(path):
+        with open(segment, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return False, checked, (segment, line_no)
+                if 'hash' not in entry:
+                    if checked:
+                        return False, checked, (segment, line_no)
+                    # Entries written before hash chaining
+                    continue
+                body = _stored_body(line.rstrip('\n'))
+                if entry.get('prev_hash') != prev_hash or body is None or entry_hash(prev_hash, body) != entry['hash']:
+                    return False, checked, (segment, line_no)
+                prev_hash = entry['hash']
+                checked += 1
+    return True, checked, None
+
+_logger = None
+_logger_lock = threading.Lock()
+
+def get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = AuditLogger(AUDIT_LOG)
+            atexit.register(_logger.close)
+        return _logger
 
 def log_action(action, details):
-    entry = {
-        'timestamp': time.time(),
-        'action': action,
-        'details': details
-    }
-    with open(AUDIT_LOG, 'a') as f:
-        f.write(json.dumps(entry) + '\n')
+    get_logger().log(action, details)
 
 # ZKP stub for privacy-preserving audit
 
 def prove_legitimacy(action):
     # Placeholder: always returns True
     return True
+
+# CLI: python -m modules.perpetual_audit query <log> [start|-] [end|-] [action]
+#      python -m modules.perpetual_audit index|verify <log>
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 3 or sys.argv[1] not in ('query', 'index', 'verify'):
+        print('Usage: python -m modules.perpetual_audit query <log> [start|-] [end|-] [action]')
+        print('       python -m modules.perpetual_audit index|verify <log>')
+        exit(1)
+    cmd, log = sys.argv[1], sys.argv[2]
+    if cmd == 'query':
+        bounds = [None if a == '-' else float(a) for a in (sys.argv[3:5] + ['-', '-'])[:2]]
+        action = sys.argv[5] if len(sys.argv) > 5 else None
+        for entry in query(bounds[0], bounds[1], action, path=log):
+            print(json.dumps(entry))
+    elif cmd == 'index':
+        build_index(log)
+        print(f'Indexed {sum(e["count"] for e in _load_index(log)[0])} entries in {index_path(log)}')
+    else:
+        valid, checked, bad = verify_chain(log)
+        print(f'Chain valid: {checked} entries' if valid else f'Chain broken after {checked} entries at {bad[0]}:{bad[1]}')
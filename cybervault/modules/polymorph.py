@@ -2,22 +2,111 @@
 Polymorphic Data & Code Obfuscation
 Periodic re-encryption and code morphing for anti-tamper and self-healing.
 """
+import mmap
 import os
 import secrets
 import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
-# Re-encrypt data with a new random key
-def polymorph_data(file_path):
+# Polymorphed file: magic + 16-byte AES-CTR nonce + ciphertext
+POLY_MAGIC = b'CVP1'
+NONCE_SIZE = 16
+HEADER_SIZE = len(POLY_MAGIC) + NONCE_SIZE
+CHUNK_SIZE = 4 * 1024 * 1024
+
+def _ctr(key, nonce):
+    return Cipher(algorithms.AES(key), modes.CTR(nonce))
+
+def is_polymorphed(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read(len(POLY_MAGIC)) == POLY_MAGIC
+
+# Stream file_path through decrypt (old_key) and/or encrypt (new_key) chunk by chunk
+# over a memory map, into a temp file in the same directory that replaces the original
+def _rewrite(file_path, old_key=None, new_key=None):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.polymorph-')
+    try:
+        with open(file_path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            size = os.fstat(src.fileno()).st_size
+            view = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+            try:
+                start = 0
+                decryptor = encryptor = None
+                if old_key is not None:
+                    if view[:len(POLY_MAGIC)] != POLY_MAGIC:
+                        raise ValueError(f'{file_path} is not polymorphed')
+                    decryptor = _ctr(old_key, view[len(POLY_MAGIC):HEADER_SIZE]).decryptor()
+                    start = HEADER_SIZE
+                if new_key is not None:
+                    nonce = secrets.token_bytes(NONCE_SIZE)
+                    encryptor = _ctr(new_key, nonce).encryptor()
+                    dst.write(POLY_MAGIC + nonce)
+                for offset in range(start, size, CHUNK_SIZE):
+                    chunk = view[offset:offset + CHUNK_SIZE]
+                    if decryptor:
+                        chunk = decryptor.update(chunk)
+                    if encryptor:
+                        chunk = encryptor.update(chunk)
+                    dst.write(chunk)
+            finally:
+                if size:
+                    view.close()
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+# Re-encrypt data with a new random key; returns the key (needed to recover the file).
+# Files already polymorphed must be given their current key and are re-keyed in one pass.
+def polymorph_data(file_path, old_key=None):
     if not os.path.exists(file_path):
         return False
-    with open(file_path, 'rb') as f:
-        data = f.read()
+    if old_key is None and is_polymorphed(file_path):
+        raise ValueError(f'{file_path} is already polymorphed; pass its current key')
     key = secrets.token_bytes(32)
-    enc = bytes([b ^ key[i % len(key)] for i, b in enumerate(data)])
-    with open(file_path, 'wb') as f:
-        f.write(enc)
+    _rewrite(file_path, old_key=old_key, new_key=key)
+    return key
+
+# Decrypt a polymorphed file back to its original contents
+def recover_data(file_path, key):
+    if not os.path.exists(file_path):
+        return False
+    _rewrite(file_path, old_key=key)
     return True
 
+# Re-encrypt every file in a directory across worker processes.
+# keys maps already-polymorphed paths to their current keys. Returns ({path: new key},
+# {path: error}): inputs are checked before anything is encrypted, and a file that fails
+# never costs the keys of files that were already rewritten.
+def polymorph_directory(directory, keys=None, workers=None):
+    keys = keys or {}
+    paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+             if os.path.isfile(os.path.join(directory, name)) and not name.startswith('.polymorph-')]
+    new_keys, errors = {}, {}
+    todo = []
+    for path in paths:
+        try:
+            if keys.get(path) is None and is_polymorphed(path):
+                raise ValueError(f'{path} is already polymorphed; pass its current key')
+        except (OSError, ValueError) as e:
+            errors[path] = e
+        else:
+            todo.append(path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {path: pool.submit(polymorph_data, path, keys.get(path)) for path in todo}
+        for path, future in futures.items():
+            try:
+                new_keys[path] = future.result()
+            except Exception as e:
+                errors[path] = e
+    return new_keys, errors
+
 # Self-heal by restoring from backup
 def self_heal(file_path, backup_path):
     if os.path.exists(backup_path):
@@ -0,0 +1,143 @@
+"""
+Set Reconciliation - Invertible Bloom lookup tables over transaction content ids
+Two nodes subtract their tables and peel the result to learn exactly which ids
+each side is missing, exchanging O(difference) bytes instead of whole ledgers.
+"""
+import base64
+import hashlib
+import json
+import struct
+import numpy as np
+
+HASH_COUNT = 3
+# Table sizes tried in order; each decodes differences up to roughly 2/3 of its cells
+IBLT_SIZES = (96, 768, 6144, 49152)
+IBLT_HEADER = struct.Struct('>4sI')
+IBLT_MAGIC = b'CVI1'
+
+# Transaction identity: the same (user, data, timestamp) has the same id on every node
+def content_id(user_id, data, timestamp):
+    canonical = json.dumps([user_id, data, timestamp], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+# 256-bit ids as rows of four uint64 words
+def _words(ids):
+    return np.frombuffer(b''.join(bytes.fromhex(i) for i in ids), dtype='>u8').astype(np.uint64).reshape(-1, 4)
+
+def _checksum(words):
+    # splitmix64 finalizer over the folded id: non-linear, so XOR-ed sums cannot pass for a pure cell
+    x = words[:, 0] ^ words[:, 1] ^ words[:, 2] ^ words[:, 3]
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class IBLT:
+    def __init__(self, cells):
+        self.sub = -(-cells // HASH_COUNT)
+        self.cells = self.sub * HASH_COUNT
+        self.counts = np.zeros(self.cells, dtype=np.int64)
+        self.keys = np.zeros((self.cells, 4), dtype=np.uint64)
+        self.checks = np.zeros(self.cells, dtype=np.uint64)
+
+    # One cell per hash in its own sub-table, so an id never hits the same cell twice
+    def _positions(self, words):
+        return [(words[:, j] % np.uint64(self.sub)).astype(np.int64) + j * self.sub for j in range(HASH_COUNT)]
+
+    def _apply(self, words, sign):
+        checks = _checksum(words)
+        for pos in self._positions(words):
+            np.add.at(self.counts, pos, sign)
+            np.bitwise_xor.at(self.keys, pos, words)
+            np.bitwise_xor.at(self.checks, pos, checks)
+
+    def add_many(self, ids):
+        if len(ids):
+            self._apply(_words(ids), 1)
+
+    def remove_many(self, ids):
+        if len(ids):
+            self._apply(_words(ids), -1)
+
+    def subtract(self, other):
+        if other.cells != self.cells:
+            raise ValueError(f'IBLT size mismatch: {self.cells} vs {other.cells}')
+        diff = IBLT(self.cells)
+        diff.counts = self.counts - other.counts
+        diff.keys = self.keys ^ other.keys
+        diff.checks = self.checks ^ other.checks
+        return diff
+
+    # Peel a difference table: returns (ids only in self, ids only in other), or None if
+    # the difference is too large for this size
+    def decode(self):
+        counts, keys, checks = self.counts.copy(), self.keys.copy(), self.checks.copy()
+        ours, theirs = [], []
+        pure = list(np.nonzero(((counts == 1) | (counts == -1)) & (checks == _checksum(keys)))[0])
+        while pure:
+            i = pure.pop()
+            if counts[i] not in (1, -1):
+                continue
+            words = keys[i:i + 1].copy()
+            check = _checksum(words)
+            if checks[i] != check[0]:
+                continue
+            sign = int(counts[i])
+            (ours if sign == 1 else theirs).append(words[0].astype('>u8').tobytes().hex())
+            for pos in self._positions(words):
+                j = int(pos[0])
+                counts[j] -= sign
+                keys[j] ^= words[0]
+                checks[j] ^= check[0]
+                if counts[j] in (1, -1):
+                    pure.append(j)
+        if counts.any() or keys.any() or checks.any():
+            return None
+        return ours, theirs
+
+    def to_bytes(self):
+        return (IBLT_HEADER.pack(IBLT_MAGIC, self.cells) + self.counts.astype('>i4').tobytes()
+                + self.keys.astype('>u8').tobytes() + self.checks.astype('>u8').tobytes())
+
+    # Raises ValueError for anything that is not a complete serialized table
+    @classmethod
+    def from_bytes(cls, raw):
+        if len(raw) < IBLT_HEADER.size:
+            raise ValueError('Malformed IBLT: truncated header')
+        magic, cells = IBLT_HEADER.unpack_from(raw)
+        if magic != IBLT_MAGIC or not cells or cells % HASH_COUNT:
+            raise ValueError('Malformed IBLT: bad header')
+        if len(raw) != IBLT_HEADER.size + cells * 44:
+            raise ValueError(f'Malformed IBLT: {cells} cells need {IBLT_HEADER.size + cells * 44} bytes, got {len(raw)}')
+        table = cls(cells)
+        start = IBLT_HEADER.size
+        table.counts = np.frombuffer(raw, dtype='>i4', count=cells, offset=start).astype(np.int64)
+        start += cells * 4
+        table.keys = np.frombuffer(raw, dtype='>u8', count=cells * 4, offset=start).astype(np.uint64).reshape(cells, 4)
+        start += cells * 32
+        table.checks = np.frombuffer(raw, dtype='>u8', count=cells, offset=start).astype(np.uint64)
+        return table
+
+    def to_b64(self):
+        return base64.b64encode(self.to_bytes()).decode()
+
+    @classmethod
+    def from_b64(cls, text):
+        if not isinstance(text, str):
+            raise ValueError('Malformed IBLT: expected a base64 string')
+        return cls.from_bytes(base64.b64decode(text, validate=True))
+
+# One IBLT per size in IBLT_SIZES over the same id set, kept up to date as ids are added
+class SetDigest:
+    def __init__(self, sizes=IBLT_SIZES):
+        self.tables = {size: IBLT(size) for size in sizes}
+
+    def add_many(self, ids):
+        for table in self.tables.values():
+            table.add_many(ids)
+
+    def table(self, cells):
+        for table in self.tables.values():
+            if table.cells == cells:
+                return table
+        return None
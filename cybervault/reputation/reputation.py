@@ -4,11 +4,73 @@ Blockchain-based, privacy-preserving user/node reputation for CyberVault.
 """
 import hashlib
 import json
+import threading
+from collections import OrderedDict
 from blockchain.blockchain import Block
-from backend.security import AESCipher
+from backend.security import get_cipher
+from backend.db import as_bytes
 from backend.zkp import prove_loan_eligibility
 
 REPUTATION_PREFIX = 'reputation:'
+REPUTATION_CACHE_SIZE = 4096
+REPUTATION_INDEX_SCHEMA = '''CREATE TABLE IF NOT EXISTS reputation_index (user_id TEXT PRIMARY KEY, score INTEGER, block_hash TEXT, block_id INTEGER)'''
+UPSERT_REPUTATION = '''INSERT INTO reputation_index (user_id, score, block_hash, block_id) VALUES (?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET score=excluded.score, block_hash=excluded.block_hash, block_id=excluded.block_id'''
+
+# Thread-safe LRU cache in front of the reputation index. Writers bump a generation, and
+# a fill read from the index is only stored if no write committed since its token() was
+# taken, so a lookup racing an update can never cache the score it replaced.
+class LRUCache:
+    def __init__(self, maxsize=REPUTATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def token(self):
+        with self._lock:
+            return self._generation
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    # With a token, skip the put if a write has landed since the token was taken
+    def put(self, key, value, token=None):
+        with self._lock:
+            if token is not None and token != self._generation:
+                return
+            self._set(key, value)
+
+    # A committed write: newer than any fill in flight
+    def update(self, key, value):
+        with self._lock:
+            self._generation += 1
+            self._set(key, value)
+
+    def invalidate(self, keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    # Caller holds the lock
+    def _set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+_cache = LRUCache()
+_MISSING = object()
 
 # Calculate reputation score
 
@@ -21,30 +83,105 @@ def calculate_reputation(user_id, tx_history, feedback=[]):
         score += int(bool(proof))
     return hashlib.sha256(f'{user_id}:{score}'.encode()).hexdigest(), score
 
-# Store reputation on blockchain (as encrypted data)
-def store_reputation_on_chain(user_id, score, aes_key, blockchain_db):
-    aes = AESCipher(aes_key)
+# Create the materialized reputation index; a fresh index is filled from the chain
+def init_reputation_index(aes_key, blockchain_db):
+    c = blockchain_db.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='reputation_index'")
+    exists = c.fetchone() is not None
+    with blockchain_db:
+        blockchain_db.execute(REPUTATION_INDEX_SCHEMA)
+    if not exists:
+        rebuild_reputation_index(aes_key, blockchain_db)
+
+# Store reputation on blockchain (as encrypted data) and update the index atomically.
+# With a BlockProducer the update is packed into a shared block, indexed by
+# index_sealed_reputation in the sealing transaction and evicted from the cache by
+# reputation_committed once that commits.
+def store_reputation_on_chain(user_id, score, aes_key, blockchain_db, producer=None):
+    if producer is not None:
+        return producer.add('reputation', {'user_id': user_id, 'score': score})['block_hash']
+    aes = get_cipher(aes_key)
     rep_data = json.dumps({'user_id': user_id, 'score': score})
-    enc_data = aes.encrypt(rep_data).hex()
-    block = Block(index=0, previous_hash='', timestamp='', data=enc_data)
+    enc_data = aes.encrypt(rep_data)
     # Insert block into blockchain DB (assume blockchain_db is sqlite3 connection)
-    c = blockchain_db.cursor()
-    c.execute('INSERT INTO blockchain (block_hash, prev_hash, data, timestamp) VALUES (?, ?, ?, ?)',
-              (block.hash, block.previous_hash, enc_data, ''))
-    blockchain_db.commit()
+    with blockchain_db:
+        c = blockchain_db.cursor()
+        # Link to the current tip; IMMEDIATE keeps concurrent appends from forking
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('SELECT block_hash FROM blockchain ORDER BY id DESC LIMIT 1')
+        last = c.fetchone()
+        block = Block(index=0, previous_hash=last[0] if last else '', timestamp='', data=enc_data)
+        c.execute('INSERT INTO blockchain (block_hash, prev_hash, data, timestamp) VALUES (?, ?, ?, ?)',
+                  (block.hash, block.previous_hash, enc_data, ''))
+        c.execute(UPSERT_REPUTATION, (user_id, score, block.hash, c.lastrowid))
+    _cache.update(user_id, score)
     return block.hash
 
-# Query reputation from blockchain (decrypt)
+# BlockProducer on_seal hook: index the block's reputation items (later positions win)
+def index_sealed_reputation(conn, block_id, block_hash, items):
+    rows = [(item.payload['user_id'], item.payload['score'], block_hash, block_id)
+            for item in items if item.kind == 'reputation']
+    if rows:
+        conn.executemany(UPSERT_REPUTATION, rows)
+
+# BlockProducer on_commit hook: once the block is durable, drop its users' cached scores
+# (bumping the generation, so fills that read the old index row are discarded too)
+def reputation_committed(block_id, block_hash, items):
+    users = [item.payload['user_id'] for item in items if item.kind == 'reputation']
+    if users:
+        _cache.invalidate(users)
+
+# Query reputation: LRU cache, then the indexed table (no chain decryption)
 def query_reputation_from_chain(user_id, aes_key, blockchain_db):
-    aes = AESCipher(aes_key)
+    score = _cache.get(user_id, _MISSING)
+    if score is not _MISSING:
+        return score
+    token = _cache.token()
     c = blockchain_db.cursor()
-    c.execute('SELECT data FROM blockchain')
-    for row in c.fetchall():
+    c.execute('SELECT score FROM reputation_index WHERE user_id=?', (user_id,))
+    row = c.fetchone()
+    score = row[0] if row else None
+    _cache.put(user_id, score, token)
+    return score
+
+# Single-payload blocks plus reputation items of packed blocks, in chain order
+SELECT_REPUTATION_PAYLOADS = '''SELECT id, block_hash, data, 0 FROM blockchain WHERE item_count IS NULL
+    UNION ALL
+    SELECT b.id, b.block_hash, i.data, i.position FROM block_items i JOIN blockchain b ON b.id = i.block_id WHERE i.kind = 'reputation'
+    ORDER BY 1, 4'''
+
+# Recovery: rebuild the index by decrypting every payload (latest score wins)
+def rebuild_reputation_index(aes_key, blockchain_db):
+    aes = get_cipher(aes_key)
+    latest = {}
+    c = blockchain_db.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='block_items'")
+    if c.fetchone():
+        c.execute(SELECT_REPUTATION_PAYLOADS)
+    else:
+        c.execute('SELECT id, block_hash, data, 0 FROM blockchain ORDER BY id ASC')
+    for block_id, block_hash, data, _ in c:
         try:
-            data = bytes.fromhex(row[0])
-            rep = json.loads(aes.decrypt(data))
-            if rep.get('user_id') == user_id:
-                return rep.get('score')
+            rep = json.loads(aes.decrypt(as_bytes(data)))
+            if isinstance(rep, dict) and 'user_id' in rep and 'score' in rep:
+                latest[rep['user_id']] = (rep['user_id'], rep['score'], block_hash, block_id)
         except Exception:
             continue
-    return None
+    with blockchain_db:
+        blockchain_db.execute(REPUTATION_INDEX_SCHEMA)
+        blockchain_db.execute('DELETE FROM reputation_index')
+        blockchain_db.executemany(UPSERT_REPUTATION, latest.values())
+    _cache.clear()
+    return len(latest)
+
+# CLI recovery: python -m reputation.reputation rebuild <db_file> <aes_key>
+if __name__ == '__main__':
+    import sqlite3
+    import sys
+    if len(sys.argv) < 4 or sys.argv[1] != 'rebuild':
+        print('Usage: python -m reputation.reputation rebuild <db_file> <aes_key>')
+        exit(1)
+    conn = sqlite3.connect(sys.argv[2])
+    count = rebuild_reputation_index(sys.argv[3], conn)
+    conn.close()
+    print(f'Reputation index rebuilt: {count} users')
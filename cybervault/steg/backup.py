@@ -0,0 +1,271 @@
+"""
+Steganographic Ledger Backup
+Streams a consistent snapshot of the ledger database through zlib and AES-256-GCM,
+shards the ciphertext across cover images in worker processes, and adds one XOR
+parity shard per stripe so restore survives a missing shard in every stripe. The key
+comes from the passphrase through scrypt with a random per-backup salt.
+"""
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import sqlite3
+import struct
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from steg.steg import encode_bytes_to_image, decode_bytes_from_image
+
+SHARD_MAGIC = b'CVB1'
+SHARD_HEADER = struct.Struct('>4sI')
+SHARD_SIZE = 1024 * 1024
+STRIPE_WIDTH = 4
+READ_SIZE = 1024 * 1024
+# scrypt cost for new backups (~32 MiB, ~0.1s per derivation); restore accepts up to MAX_SCRYPT_N
+SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+MAX_SCRYPT_N = 2 ** 20
+SALT_SIZE = 16
+
+def new_kdf_params():
+    return {'name': 'scrypt', 'salt': secrets.token_bytes(SALT_SIZE).hex(), 'n': SCRYPT_N, 'r': SCRYPT_R, 'p': SCRYPT_P}
+
+# AES-256 key from the passphrase and the KDF parameters stored in the shard header
+def _derive_key(passphrase, kdf):
+    if kdf.get('name') != 'scrypt':
+        raise ValueError(f"Unsupported backup key derivation: {kdf.get('name')}")
+    n, r, p = int(kdf['n']), int(kdf['r']), int(kdf['p'])
+    if not 1 < n <= MAX_SCRYPT_N or n & (n - 1) or not 0 < r <= 32 or not 0 < p <= 16:
+        raise ValueError('Backup key derivation parameters out of range')
+    return hashlib.scrypt(passphrase.encode(), salt=bytes.fromhex(kdf['salt']), n=n, r=r, p=p,
+                          maxmem=2 * 128 * r * n * p + 1024 * 1024, dklen=32)
+
+def _pack_shard(header, data):
+    header_bytes = json.dumps(header).encode()
+    return SHARD_HEADER.pack(SHARD_MAGIC, len(header_bytes)) + header_bytes + data
+
+def _unpack_shard(payload):
+    magic, header_len = SHARD_HEADER.unpack(payload[:SHARD_HEADER.size])
+    if magic != SHARD_MAGIC:
+        raise ValueError('Not a ledger backup shard')
+    start = SHARD_HEADER.size + header_len
+    return json.loads(payload[SHARD_HEADER.size:start]), payload[start:]
+
+# Worker: hide one shard in an image
+def _write_shard(payload, image_path, cover_path):
+    return encode_bytes_to_image(payload, image_path, cover_path)
+
+# Worker: recover one shard to a spool file; returns its header, or None if unusable
+def _read_shard(image_path, spool_dir):
+    try:
+        header, data = _unpack_shard(decode_bytes_from_image(image_path))
+        if hashlib.sha256(data).hexdigest() != header['sha256']:
+            return None
+    except Exception:
+        return None
+    header['spool'] = os.path.join(spool_dir, f"{header['backup_id']}-{header['kind']}-{header['index']}.bin")
+    with open(header['spool'], 'wb') as f:
+        f.write(data)
+    return header
+
+def _xor_into(parity, data):
+    parity[:len(data)] ^= np.frombuffer(data, dtype=np.uint8)
+
+# Consistent point-in-time copy via the SQLite online backup API
+def snapshot_database(db_path, snapshot_path):
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(snapshot_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+class _ShardWriter:
+    def __init__(self, pool, out_dir, backup_id, base_header, covers, stripe_width, max_pending):
+        self.pool = pool
+        self.out_dir = out_dir
+        self.backup_id = backup_id
+        self.base_header = base_header
+        self.covers = covers or [None]
+        self.stripe_width = stripe_width
+        self.max_pending = max_pending
+        self.pending = set()
+        self.paths = []
+        self.index = 0
+        self.members = []
+        self.parity = None
+
+    def _submit(self, payload, name):
+        if len(self.pending) >= self.max_pending:
+            done, self.pending = wait(self.pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+        path = os.path.join(self.out_dir, f'{self.backup_id}-{name}.png')
+        cover = self.covers[len(self.paths) % len(self.covers)]
+        self.pending.add(self.pool.submit(_write_shard, payload, path, cover))
+        self.paths.append(path)
+
+    def add(self, data, final_info=None):
+        stripe = self.index // self.stripe_width
+        digest = hashlib.sha256(data).hexdigest()
+        header = dict(self.base_header, kind='data', index=self.index, stripe=stripe, size=len(data), sha256=digest)
+        if final_info:
+            header.update(final_info)
+        self._submit(_pack_shard(header, data), f'{self.index:05d}')
+        if self.parity is None:
+            self.parity = np.zeros(len(data), dtype=np.uint8)
+        _xor_into(self.parity, data)
+        self.members.append({'index': self.index, 'size': len(data), 'sha256': digest})
+        self.index += 1
+        if final_info or len(self.members) == self.stripe_width:
+            self._flush_parity(stripe, final_info)
+
+    def _flush_parity(self, stripe, final_info):
+        data = self.parity[:max(m['size'] for m in self.members)].tobytes()
+        header = dict(self.base_header, kind='parity', index=stripe, stripe=stripe, size=len(data),
+                      sha256=hashlib.sha256(data).hexdigest(), members=self.members)
+        if final_info:
+            header.update(final_info)
+        self._submit(_pack_shard(header, data), f'p{stripe:05d}')
+        self.members = []
+        self.parity = None
+
+    def close(self):
+        for future in self.pending:
+            future.result()
+        self.pending = set()
+        return self.paths
+
+# Backup: snapshot -> zlib -> AES-GCM -> shards + parity, encoded in parallel
+def backup_database(db_path, out_dir, passphrase, covers=None, shard_size=SHARD_SIZE,
+                    stripe_width=STRIPE_WIDTH, workers=None):
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    backup_id = secrets.token_hex(8)
+    nonce = secrets.token_bytes(12)
+    kdf = new_kdf_params()
+    base_header = {'backup_id': backup_id, 'nonce': nonce.hex(), 'kdf': kdf, 'stripe_width': stripe_width}
+    encryptor = Cipher(algorithms.AES(_derive_key(passphrase, kdf)), modes.GCM(nonce)).encryptor()
+    compressor = zlib.compressobj(6)
+    plain_hash = hashlib.sha256()
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, 'snapshot.db')
+        snapshot_database(db_path, snapshot)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            writer = _ShardWriter(pool, out_dir, backup_id, base_header, covers, stripe_width, workers * 2)
+            buffer = bytearray()
+            with open(snapshot, 'rb') as f:
+                while True:
+                    block = f.read(READ_SIZE)
+                    if not block:
+                        break
+                    plain_hash.update(block)
+                    buffer += encryptor.update(compressor.compress(block))
+                    # Keep the last partial shard back: it is only final once the stream ends
+                    while len(buffer) > shard_size:
+                        writer.add(bytes(buffer[:shard_size]))
+                        del buffer[:shard_size]
+            buffer += encryptor.update(compressor.flush())
+            encryptor.finalize()
+            while len(buffer) > shard_size:
+                writer.add(bytes(buffer[:shard_size]))
+                del buffer[:shard_size]
+            final_info = {'final': True, 'total_shards': writer.index + 1,
+                          'tag': encryptor.tag.hex(), 'plain_sha256': plain_hash.hexdigest()}
+            writer.add(bytes(buffer), final_info)
+            paths = writer.close()
+    return {'backup_id': backup_id, 'images': paths, 'data_shards': final_info['total_shards']}
+
+# Restore: decode shards in parallel, rebuild up to one missing shard per stripe,
+# then stream decrypt + decompress into out_path (replaced atomically)
+def restore_database(image_paths, out_path, passphrase, workers=None):
+    workers = workers or os.cpu_count() or 1
+    spool = tempfile.mkdtemp(prefix='cybervault-restore-')
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            headers = [h for h in pool.map(_read_shard, image_paths, [spool] * len(image_paths)) if h]
+        if not headers:
+            raise ValueError('No readable backup shards')
+        backup_id = max({h['backup_id'] for h in headers}, key=lambda b: sum(h['backup_id'] == b for h in headers))
+        headers = [h for h in headers if h['backup_id'] == backup_id]
+        final = next((h for h in headers if h.get('final')), None)
+        if final is None:
+            raise ValueError('Final shard and its parity are both missing')
+        data = {h['index']: h for h in headers if h['kind'] == 'data'}
+        parity = {h['stripe']: h for h in headers if h['kind'] == 'parity'}
+        total, width = final['total_shards'], final['stripe_width']
+        recovered = _recover_missing(data, parity, total, width, spool)
+
+        decryptor = Cipher(algorithms.AES(_derive_key(passphrase, final['kdf'])),
+                           modes.GCM(bytes.fromhex(final['nonce']))).decryptor()
+        decompressor = zlib.decompressobj()
+        plain_hash = hashlib.sha256()
+        tmp_out = f'{out_path}.restore-tmp'
+        try:
+            with open(tmp_out, 'wb') as out:
+                for index in range(total):
+                    with open(data[index]['spool'], 'rb') as f:
+                        plain = decompressor.decompress(decryptor.update(f.read()))
+                    plain_hash.update(plain)
+                    out.write(plain)
+                # Raises InvalidTag on a wrong passphrase or tampered ciphertext
+                decryptor.finalize_with_tag(bytes.fromhex(final['tag']))
+                tail = decompressor.flush()
+                plain_hash.update(tail)
+                out.write(tail)
+            if plain_hash.hexdigest() != final['plain_sha256']:
+                raise ValueError('Restored database does not match the backup checksum')
+        except BaseException:
+            os.remove(tmp_out)
+            raise
+        os.replace(tmp_out, out_path)
+        return {'backup_id': backup_id, 'data_shards': total, 'recovered_shards': recovered}
+    finally:
+        shutil.rmtree(spool, ignore_errors=True)
+
+def _recover_missing(data, parity, total, width, spool):
+    recovered = []
+    for stripe in range((total + width - 1) // width):
+        indices = range(stripe * width, min((stripe + 1) * width, total))
+        missing = [i for i in indices if i not in data]
+        if not missing:
+            continue
+        if len(missing) > 1 or stripe not in parity:
+            raise ValueError(f'Stripe {stripe} lost {len(missing)} shard(s); cannot recover')
+        p = parity[stripe]
+        with open(p['spool'], 'rb') as f:
+            acc = np.frombuffer(f.read(), dtype=np.uint8).copy()
+        for i in indices:
+            if i in data:
+                with open(data[i]['spool'], 'rb') as f:
+                    _xor_into(acc, f.read())
+        member = next(m for m in p['members'] if m['index'] == missing[0])
+        rebuilt = acc[:member['size']].tobytes()
+        if hashlib.sha256(rebuilt).hexdigest() != member['sha256']:
+            raise ValueError(f'Parity rebuild of shard {missing[0]} failed its checksum')
+        path = os.path.join(spool, f'rebuilt-{missing[0]}.bin')
+        with open(path, 'wb') as f:
+            f.write(rebuilt)
+        data[missing[0]] = dict(member, kind='data', spool=path)
+        recovered.append(missing[0])
+    return recovered
+
+# CLI: python -m steg.backup backup <db_file> <out_dir> <passphrase> [cover ...]
+#      python -m steg.backup restore <out_db_file> <passphrase> <image ...>
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 5 or sys.argv[1] not in ('backup', 'restore'):
+        print('Usage: python -m steg.backup backup <db_file> <out_dir> <passphrase> [cover ...]')
+        print('       python -m steg.backup restore <out_db_file> <passphrase> <image ...>')
+        exit(1)
+    if sys.argv[1] == 'backup':
+        result = backup_database(sys.argv[2], sys.argv[3], sys.argv[4], covers=sys.argv[5:] or None)
+        print(f"Backup {result['backup_id']}: {result['data_shards']} data shards in {len(result['images'])} images")
+    else:
+        result = restore_database(sys.argv[4:], sys.argv[2], sys.argv[3])
+        print(f"Restored backup {result['backup_id']} ({result['data_shards']} shards, rebuilt {result['recovered_shards']})")
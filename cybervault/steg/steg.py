@@ -6,40 +6,87 @@ from PIL import Image
 import numpy as np
 import io
 import json
+import struct
+
+# Length-prefixed frame: magic + payload size, then the payload bits (MSB first)
+MAGIC = b'CVS1'
+HEADER = struct.Struct('>4sQ')
+HEADER_BITS = HEADER.size * 8
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+PNG_COMPRESS_LEVEL = 1
+
+# LSB encode raw bytes into an image (a generated white image, or a copy of cover_path)
+def encode_bytes_to_image(payload, image_path='backup.png', cover_path=None):
+    framed = HEADER.pack(MAGIC, len(payload)) + payload
+    bits = np.unpackbits(np.frombuffer(framed, dtype=np.uint8))
+    if cover_path:
+        img = np.array(Image.open(cover_path).convert('RGB'))
+        if img.size < bits.size:
+            raise ValueError(f'Cover image holds {img.size // 8} bytes, need {bits.size // 8}')
+    else:
+        size = int(np.ceil(np.sqrt(bits.size / 3)))
+        img = np.full((size, size, 3), 255, dtype=np.uint8)
+    flat = img.reshape(-1)
+    flat[:bits.size] = (flat[:bits.size] & 0xFE) | bits
+    # LSB noise barely compresses; a low zlib level keeps saves fast
+    Image.fromarray(img).save(image_path, compress_level=PNG_COMPRESS_LEVEL)
+    return image_path
+
+# LSB decode raw bytes; reads only the header and payload bits, not the whole image
+def decode_bytes_from_image(image_path):
+    flat = np.asarray(Image.open(image_path)).reshape(-1)
+    if flat.size < HEADER_BITS:
+        return None
+    magic, length = HEADER.unpack(np.packbits(flat[:HEADER_BITS] & 1).tobytes())
+    end = HEADER_BITS + length * 8
+    if magic != MAGIC or end > flat.size:
+        return None
+    return np.packbits(flat[HEADER_BITS:end] & 1).tobytes()
 
 # LSB encode data into image
 def encode_data_to_image(data, image_path='backup.png'):
-    # Convert data to binary string
-    data_bytes = json.dumps(data).encode('utf-8')
-    data_bits = ''.join([bin(byte)[2:].zfill(8) for byte in data_bytes])
-    size = int(np.ceil(np.sqrt(len(data_bits) / 3)))
-    img = np.zeros((size, size, 3), dtype=np.uint8) + 255
-    flat = img.flatten()
-    for i, bit in enumerate(data_bits):
-        flat[i] = (flat[i] & ~1) | int(bit)
-    img = flat.reshape((size, size, 3))
-    Image.fromarray(img).save(image_path)
-    return image_path
+    return encode_bytes_to_image(json.dumps(data).encode('utf-8'), image_path)
 
 # LSB decode data from image
 def decode_data_from_image(image_path):
-    img = np.array(Image.open(image_path))
-    flat = img.flatten()
-    bits = [str(flat[i] & 1) for i in range(len(flat))]
-    # Group bits into bytes
-    bytes_list = [int(''.join(bits[i:i+8]), 2) for i in range(0, len(bits), 8)]
-    # Find null terminator or try to decode
     try:
-        data_bytes = bytes(bytes_list)
+        data_bytes = decode_bytes_from_image(image_path)
+        if data_bytes is None:
+            # Images written before the length header: the whole LSB plane, junk ignored
+            flat = np.asarray(Image.open(image_path)).reshape(-1)
+            data_bytes = np.packbits(flat & 1).tobytes()
         return json.loads(data_bytes.decode('utf-8', errors='ignore'))
     except Exception:
         return None
 
+# Stream a file-like object into a sequence of images, one chunk per image,
+# so payloads larger than memory never have to be held at once
+def encode_stream_to_images(stream, image_prefix, chunk_size=STREAM_CHUNK_SIZE):
+    paths = []
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        paths.append(encode_bytes_to_image(chunk, f'{image_prefix}.{len(paths):05d}.png'))
+    return paths
+
+def decode_images_to_stream(image_paths, stream):
+    written = 0
+    for path in image_paths:
+        chunk = decode_bytes_from_image(path)
+        if chunk is None:
+            raise ValueError(f'No CyberVault payload in {path}')
+        stream.write(chunk)
+        written += len(chunk)
+    return written
+
 # CLI backup
 if __name__ == '__main__':
     import sys
     if len(sys.argv) < 3:
         print('Usage: python steg.py backup|restore <file> [data]')
+        print('       python steg.py backup-file <file> <image_prefix>')
+        print('       python steg.py restore-file <file> <image> [image ...]')
         exit(1)
     cmd, file = sys.argv[1], sys.argv[2]
     if cmd == 'backup':
@@ -49,3 +96,11 @@ if __name__ == '__main__':
     elif cmd == 'restore':
         data = decode_data_from_image(file)
         print('Restored data:', data)
+    elif cmd == 'backup-file':
+        with open(file, 'rb') as f:
+            paths = encode_stream_to_images(f, sys.argv[3])
+        print(f'Backup written to {len(paths)} images')
+    elif cmd == 'restore-file':
+        with open(file, 'wb') as f:
+            written = decode_images_to_stream(sorted(sys.argv[3:]), f)
+        print(f'Restored {written} bytes to {file}')
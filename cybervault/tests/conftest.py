@@ -0,0 +1,11 @@
+"""
+Test setup: modules import each other as the backend does, with the package root and
+backend/ on sys.path
+"""
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (ROOT, os.path.join(ROOT, 'backend')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,98 @@
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import pytest
+
+APP = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend', 'app.py'))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+# The backend in its own process and working directory (it keeps its database in the cwd)
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    cwd = tmp_path_factory.mktemp('server')
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, APP], cwd=cwd, env=dict(os.environ, CYBERVAULT_PORT=str(port)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while True:
+        try:
+            urllib.request.urlopen(url + '/status', timeout=1).close()
+            break
+        except OSError:
+            if proc.poll() is not None or time.time() > deadline:
+                proc.kill()
+                pytest.fail('backend did not start: ' + proc.stderr.read().decode()[-2000:])
+            time.sleep(0.2)
+    yield url, cwd
+    proc.terminate()
+    proc.wait(timeout=10)
+
+def post(url, path, body, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = 'Bearer ' + token
+    request = urllib.request.Request(url + path, json.dumps(body).encode(), headers)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def login(url, username):
+    post(url, '/register', {'username': username, 'pin': '1234'})
+    reply = post(url, '/login', {'username': username, 'pin': '1234'})[1]
+    return reply['token'], reply['user_id']
+
+def test_resubmitted_transaction_is_reported_as_duplicate(server):
+    url, _ = server
+    token, user_id = login(url, 'dup')
+    tx = {'user_id': user_id, 'data': {'amount': '100', 'type': 'loan'}, 'timestamp': '2026-10-18T10:00:00Z'}
+    assert post(url, '/transaction', tx, token) == (200, {'status': 'queued', 'fraud_flag': 0})
+    assert post(url, '/transaction', tx, token) == (200, {'status': 'duplicate', 'fraud_flag': 0})
+    page = json.loads(urllib.request.urlopen(f'{url}/users/{user_id}/transactions', timeout=10).read())
+    assert len(page['transactions']) == 1
+
+def test_null_byte_in_static_path_is_404(server):
+    url, _ = server
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(url + '/app.js%00.html', timeout=10)
+    assert e.value.code == 404
+
+def test_incremental_validation_is_open_and_full_runs_need_a_token(server):
+    url, _ = server
+    status, reply = post(url, '/blockchain/validate', {})
+    assert status == 200 and reply['valid']
+    assert post(url, '/blockchain/validate', {'full': True})[0] == 401
+    token, _ = login(url, 'validator')
+    status, reply = post(url, '/blockchain/validate', {'full': True}, token)
+    assert status == 200 and 'full_started' in reply
+
+def test_locked_database_answers_503(server):
+    url, cwd = server
+    token, user_id = login(url, 'locked')
+    lock = sqlite3.connect(str(cwd / 'cybervault.db'))
+    # Let the write-behind session insert land first, so only the transaction meets the lock
+    deadline = time.time() + 10
+    while not lock.execute('SELECT 1 FROM sessions WHERE user_id = ?', (user_id,)).fetchone() and time.time() < deadline:
+        time.sleep(0.05)
+    lock.execute('BEGIN IMMEDIATE')
+    try:
+        tx = {'user_id': user_id, 'data': {'amount': '10', 'type': 'loan'}, 'timestamp': '2026-10-18T11:00:00Z'}
+        status, reply = post(url, '/transaction', tx, token)
+        assert status == 503 and 'locked' in reply['error']
+    finally:
+        lock.rollback()
+        lock.close()
+    # Once the lock is gone the same transaction goes through
+    assert post(url, '/transaction', tx, token) == (200, {'status': 'queued', 'fraud_flag': 0})
@@ -0,0 +1,72 @@
+import json
+import os
+import random
+import pytest
+import atie.atie as atie
+from atie.atie import SignatureMatcher, add_threat_signature, analyze_threats, analyze_threats_many, get_matcher
+
+@pytest.fixture
+def threat_db(tmp_path, monkeypatch):
+    path = str(tmp_path / 'atie_threat_db.json')
+    monkeypatch.setattr(atie, 'THREAT_DB', path)
+    monkeypatch.setattr(atie, '_matcher', None)
+    monkeypatch.setattr(atie, '_matcher_key', None)
+    return path
+
+def write_db(path, signatures):
+    with open(path, 'w') as f:
+        json.dump({'signatures': signatures, 'version': 1}, f)
+
+def test_finds_any_of_many_patterns():
+    matcher = SignatureMatcher(['stolen-card-0042', 'mule', 'x9', '', 'chargeback-ring'])
+    assert matcher.search('{"note": "paid by stolen-card-0042"}') == 'stolen-card-0042'
+    assert matcher.search('money mule account') == 'mule'
+    assert matcher.search('ax9b') == 'x9'
+    assert matcher.search('a chargeback-ring member') == 'chargeback-ring'
+    assert matcher.search('nothing to see') is None
+    # The empty signature is ignored rather than matching everything
+    assert SignatureMatcher(['']).search('anything') is None
+
+def test_overlapping_patterns():
+    # Long signatures sharing their first GRAM_SIZE chars land in one bucket
+    matcher = SignatureMatcher(['abcdefgh-one', 'abcdefgh-two', 'abcdefgh', 'defg'])
+    assert matcher.search('xxabcdefgh-twoxx') in {'abcdefgh-two', 'abcdefgh'}
+    assert matcher.search('abcdefgh-three') == 'abcdefgh'
+    assert matcher.search('abcdefg') == 'defg'
+    # A match that starts inside an earlier partial match
+    assert SignatureMatcher(['aaaaaaab']).search('aaaaaaaaab') == 'aaaaaaab'
+
+def test_matching_is_case_sensitive():
+    matcher = SignatureMatcher(['FraudRing', 'evil'])
+    assert matcher.search('fraudring') is None
+    assert matcher.search('EVIL') is None
+    assert matcher.search('a FraudRing b') == 'FraudRing'
+
+def test_agrees_with_substring_search():
+    rng = random.Random(3)
+    signatures = [''.join(rng.choices('abcd', k=rng.randint(1, 12))) for _ in range(200)]
+    matcher = SignatureMatcher(signatures)
+    for _ in range(300):
+        text = ''.join(rng.choices('abcdxyz', k=rng.randint(0, 40)))
+        found = matcher.search(text)
+        assert (found is not None) == any(sig in text for sig in signatures)
+        assert found is None or (found in signatures and found in text)
+
+def test_matcher_is_rebuilt_when_the_file_changes(threat_db):
+    write_db(threat_db, ['alpha-signature'])
+    first = get_matcher()
+    assert get_matcher() is first
+    assert analyze_threats({'memo': 'alpha-signature'})['action'] == 'quarantine'
+    # Another process rewrites the database: a new mtime means a new matcher
+    write_db(threat_db, ['beta-signature'])
+    st = os.stat(threat_db)
+    os.utime(threat_db, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert get_matcher() is not first
+    assert analyze_threats_many([{'memo': 'alpha-signature'}, {'memo': 'beta-signature'}]) == [
+        {'threat_score': 0, 'action': 'allow'}, {'threat_score': 100, 'action': 'quarantine'}]
+
+def test_added_signature_takes_effect_immediately(threat_db):
+    assert analyze_threats({'memo': 'gamma'})['action'] == 'allow'
+    assert add_threat_signature('gamma')
+    assert not add_threat_signature('gamma')
+    assert analyze_threats({'memo': 'gamma'})['action'] == 'quarantine'
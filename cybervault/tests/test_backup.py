@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import pytest
+from steg.backup import _derive_key, _unpack_shard, backup_database, restore_database
+from steg.steg import decode_bytes_from_image
+
+PASSPHRASE = 'correct horse'
+
+@pytest.fixture
+def backup(tmp_path):
+    db_file = str(tmp_path / 'ledger.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v BLOB)')
+    conn.executemany('INSERT INTO t (v) VALUES (?)', [(os.urandom(200),) for _ in range(300)])
+    conn.commit()
+    conn.close()
+    # Small shards so the backup spans several stripes
+    result = backup_database(db_file, str(tmp_path / 'images'), PASSPHRASE, shard_size=8192, stripe_width=3, workers=1)
+    return db_file, result
+
+def rows(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute('SELECT id, v FROM t ORDER BY id').fetchall()
+    finally:
+        conn.close()
+
+def test_restore_rebuilds_one_missing_shard_per_stripe(backup, tmp_path):
+    db_file, result = backup
+    images = sorted(result['images'])
+    assert result['data_shards'] > 3
+    out = str(tmp_path / 'restored.db')
+    # Drop one data shard from the first and one from the last stripe
+    last = f"-{result['data_shards'] - 1:05d}.png"
+    kept = [p for p in images if not p.endswith(('-00001.png', last))]
+    restored = restore_database(kept, out, PASSPHRASE, workers=1)
+    assert restored['recovered_shards'] == [1, result['data_shards'] - 1]
+    assert rows(out) == rows(db_file)
+
+def test_restore_fails_with_two_shards_missing_from_a_stripe(backup, tmp_path):
+    _, result = backup
+    kept = [p for p in result['images'] if not p.endswith(('-00000.png', '-00001.png'))]
+    with pytest.raises(ValueError, match='Stripe 0'):
+        restore_database(kept, str(tmp_path / 'restored.db'), PASSPHRASE, workers=1)
+
+def test_wrong_passphrase_is_rejected(backup, tmp_path):
+    _, result = backup
+    out = str(tmp_path / 'restored.db')
+    with pytest.raises(Exception):
+        restore_database(result['images'], out, 'wrong', workers=1)
+    assert not os.path.exists(out)
+
+def test_each_backup_gets_its_own_scrypt_salt(backup, tmp_path):
+    db_file, result = backup
+    other = backup_database(db_file, str(tmp_path / 'other'), PASSPHRASE, shard_size=8192, workers=1)
+    headers = [_unpack_shard(decode_bytes_from_image(r['images'][0]))[0] for r in (result, other)]
+    assert all(h['kdf']['name'] == 'scrypt' and len(bytes.fromhex(h['kdf']['salt'])) == 16 for h in headers)
+    assert headers[0]['kdf']['salt'] != headers[1]['kdf']['salt']
+    assert _derive_key(PASSPHRASE, headers[0]['kdf']) != _derive_key(PASSPHRASE, headers[1]['kdf'])
+
+@pytest.mark.parametrize('kdf', [
+    {'name': 'sha256'},
+    {'name': 'scrypt', 'salt': '00', 'n': 2 ** 30, 'r': 8, 'p': 1},
+    {'name': 'scrypt', 'salt': '00', 'n': 1000, 'r': 8, 'p': 1},
+])
+def test_unsupported_or_costly_kdf_params_are_rejected(kdf):
+    with pytest.raises(ValueError):
+        _derive_key(PASSPHRASE, kdf)
@@ -0,0 +1,108 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+import pytest
+import ai.model
+from ai.model import FraudBatcher
+from db import ConnectionPool
+from modules.batching import drain_batch, run_batches
+from writer import GroupCommitWriter
+
+class Item:
+    def __init__(self, size=1):
+        self.size = size
+        self.future = Future()
+
+def test_drain_batch_bounds_by_size_and_stops_at_sentinel():
+    q = queue.Queue()
+    items = [Item(2) for _ in range(5)]
+    for item in items:
+        q.put(item)
+    q.put(None)
+    assert drain_batch(q, 4, 1.0, size=lambda i: i.size) == (items[:2], False)
+    assert drain_batch(q, 100, 0.01) == (items[2:], True)
+    q.put(None)
+    assert drain_batch(q, 100, 0.01) == ([], True)
+
+def test_failed_batch_fails_its_futures_and_the_loop_continues():
+    q = queue.Queue()
+    calls = []
+
+    def handle(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise ValueError('boom')
+        for item in batch:
+            item.future.set_result('ok')
+    thread = threading.Thread(target=run_batches, args=(q, handle, 10, 0.05))
+    thread.start()
+    first = Item()
+    q.put(first)
+    with pytest.raises(ValueError, match='boom'):
+        first.future.result(timeout=5)
+    second = Item()
+    q.put(second)
+    assert second.future.result(timeout=5) == 'ok'
+    q.put(None)
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+def test_fraud_batcher_survives_a_model_load_failure(monkeypatch):
+    def broken():
+        raise OSError('model file unreadable')
+    monkeypatch.setattr(ai.model, 'get_model', broken)
+    batcher = FraudBatcher(max_delay=0.001)
+    try:
+        with pytest.raises(OSError):
+            batcher.submit({'amount': '10', 'type': 'loan'}).result(timeout=5)
+        monkeypatch.setattr(ai.model, 'get_model', lambda: None)
+        assert batcher.submit({'amount': '10', 'type': 'loan'}).result(timeout=5) is False
+    finally:
+        batcher.close()
+
+def test_writer_resolves_each_op(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'w.db'))
+    pool.connection().execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT UNIQUE)')
+    writer = GroupCommitWriter(pool, max_batch=3, max_delay=0.01)
+    try:
+        futures = [writer.submit('INSERT INTO t (v) VALUES (?)', (str(i),)) for i in range(5)]
+        duplicate = writer.submit('INSERT INTO t (v) VALUES (?)', ('0',))
+        assert sorted(f.result(timeout=5) for f in futures) == [1, 2, 3, 4, 5]
+        with pytest.raises(Exception):
+            duplicate.result(timeout=5)
+        assert writer.executemany('INSERT INTO t (v) VALUES (?)', [('a',), ('b',)]) == 2
+    finally:
+        writer.close()
+
+def test_writer_reports_ignored_inserts_as_none(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'w.db'))
+    pool.connection().execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT UNIQUE)')
+    writer = GroupCommitWriter(pool)
+    try:
+        assert writer.execute('INSERT OR IGNORE INTO t (v) VALUES (?)', ('a',)) == 1
+        assert writer.execute('INSERT OR IGNORE INTO t (v) VALUES (?)', ('a',)) is None
+    finally:
+        writer.close()
+
+def test_locked_database_fails_the_batch_without_replaying_each_op(tmp_path):
+    db_file = str(tmp_path / 'w.db')
+    pool = ConnectionPool(db_file, pragmas=('PRAGMA journal_mode=WAL', 'PRAGMA busy_timeout=100'))
+    pool.connection().execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT UNIQUE)')
+    lock = sqlite3.connect(db_file)
+    lock.execute('BEGIN IMMEDIATE')
+    writer = GroupCommitWriter(pool, max_batch=10, max_delay=0.05)
+    try:
+        start = time.monotonic()
+        futures = [writer.submit('INSERT INTO t (v) VALUES (?)', (str(i),)) for i in range(10)]
+        for f in futures:
+            with pytest.raises(sqlite3.OperationalError, match='locked'):
+                f.result(timeout=5)
+        # One busy timeout for the batch, not one per op
+        assert time.monotonic() - start < 0.8
+        lock.rollback()
+        assert writer.execute('INSERT INTO t (v) VALUES (?)', ('after',)) is not None
+    finally:
+        lock.close()
+        writer.close()
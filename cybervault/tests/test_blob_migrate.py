@@ -0,0 +1,50 @@
+import json
+import pytest
+from blob_migrate import migrate_to_blobs
+from blockchain.producer import BlockProducer, inclusion_proof
+from blockchain.validator import init_checkpoints, validate_chain
+from db import ConnectionPool
+from migrations import migrate
+from security import get_cipher
+
+SECRET = 'test-secret'
+
+@pytest.fixture
+def packed(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'chain.db'))
+    conn = pool.connection()
+    migrate(conn)
+    init_checkpoints(conn)
+    cipher = get_cipher('test-key')
+    with conn:
+        # A legacy hex payload the migration should convert
+        conn.execute("INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES ('u', ?, 'queued', 0, '')",
+                     (cipher.encrypt('{}').hex(),))
+    producer = BlockProducer(pool, cipher, max_items=4, max_delay=0.001)
+    try:
+        results = [producer.submit('tx', {'n': i}, timestamp=str(i)) for i in range(10)]
+        results = [f.result(timeout=5) for f in results]
+    finally:
+        producer.close()
+    return conn, results
+
+def check_chain(conn, results):
+    assert validate_chain(conn, SECRET)['valid']
+    proof = inclusion_proof(conn, results[-1]['block_hash'], results[-1]['position'])
+    assert proof['valid'] and proof['merkle_root'] == results[-1]['merkle_root']
+    json.dumps(proof)
+
+def test_migration_leaves_packed_block_roots_alone(packed):
+    conn, results = packed
+    converted = migrate_to_blobs(conn)
+    assert converted['transactions.data'] == (1, 0)
+    assert converted['blockchain.data'][0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM blockchain WHERE typeof(data) != 'text'").fetchone()[0] == 0
+    check_chain(conn, results)
+
+def test_roots_converted_by_an_older_migration_still_verify(packed):
+    conn, results = packed
+    with conn:
+        for row_id, root in conn.execute('SELECT id, data FROM blockchain').fetchall():
+            conn.execute('UPDATE blockchain SET data = ? WHERE id = ?', (bytes.fromhex(root), row_id))
+    check_chain(conn, results)
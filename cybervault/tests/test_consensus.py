@@ -0,0 +1,47 @@
+import hashlib
+import pytest
+from modules.consensus import MerkleLedger, find_divergence, heal_blockchain
+
+def chain(n):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+
+class CountingPeer:
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.size = ledger.size
+        self.exchanges = 0
+
+    def node(self, level, index):
+        self.exchanges += 1
+        return self.ledger.node(level, index)
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64, 1000])
+def test_divergence_is_the_first_differing_block(size):
+    blocks = chain(size)
+    for at in {0, size // 2, size - 1}:
+        local = list(blocks)
+        local[at] = 'corrupted'
+        peer = CountingPeer(MerkleLedger(blocks))
+        assert find_divergence(MerkleLedger(local), peer) == at
+        assert peer.exchanges <= 2 * max(1, size.bit_length()) + 2
+
+def test_identical_and_prefix_ledgers():
+    blocks = chain(100)
+    assert find_divergence(MerkleLedger(blocks), MerkleLedger(blocks)) is None
+    assert find_divergence(MerkleLedger(blocks[:60]), MerkleLedger(blocks)) == 60
+    assert MerkleLedger(blocks[:60]).root() != MerkleLedger(blocks).root()
+
+def test_truncate_restores_the_earlier_root():
+    blocks = chain(100)
+    ledger = MerkleLedger(blocks)
+    ledger.truncate(37)
+    assert ledger.root() == MerkleLedger(blocks[:37]).root()
+    ledger.extend(blocks[37:])
+    assert ledger.root() == MerkleLedger(blocks).root()
+
+def test_heal_takes_only_the_divergent_suffix_from_the_majority():
+    blocks = chain(500)
+    local = MerkleLedger(blocks[:400] + ['bad'] * 100)
+    healed = heal_blockchain(local, [blocks, blocks, blocks[:450] + ['fork'] * 50])
+    assert healed is local
+    assert local.blocks == blocks
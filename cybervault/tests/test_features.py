@@ -0,0 +1,82 @@
+import json
+import numpy as np
+import pytest
+from ai.features import FEATURE_NAMES, NO_HISTORY, FeatureStore, parse_timestamp
+from db import ConnectionPool
+from migrations import migrate
+from security import get_cipher
+
+START = 1_790_000_000
+COL = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'features.db'))
+    migrate(pool.connection())
+    return pool
+
+def insert(pool, rows):
+    conn = pool.connection()
+    with conn:
+        conn.executemany('INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, 0, ?)',
+                         [(user_id, data, 'queued', ts) for user_id, data, ts in rows])
+
+def iso(ts):
+    return np.datetime_as_string(np.datetime64(int(ts), 's')) + 'Z'
+
+def test_windows_recency_and_zscore():
+    store = FeatureStore()
+    for offset, amount in [(-7200, 10), (-1800, 20), (-60, 30)]:
+        store.observe('u', amount, START + offset)
+    row = store.matrix(['u', 'new'], [40, 5], [0, 1], [START, START])
+    assert row[0, COL['count_1h']] == 2 and row[0, COL['sum_1h']] == 50
+    assert row[0, COL['count_24h']] == 3 and row[0, COL['sum_24h']] == 60
+    assert row[0, COL['since_last']] == 60
+    assert row[0, COL['amount_z']] == pytest.approx((40 - 20) / 10)
+    assert row[1, COL['since_last']] == NO_HISTORY and row[1, COL['count_24h']] == 0
+
+def test_replay_matches_scoring_one_at_a_time():
+    rng = np.random.default_rng(7)
+    users = [f'u{i}' for i in rng.integers(0, 5, 200)]
+    amounts = rng.integers(1, 1000, 200)
+    times = START + np.sort(rng.integers(0, 86400, 200))
+    types = rng.integers(0, 2, 200)
+    one_by_one = FeatureStore()
+    expected = []
+    for u, a, t, k in zip(users, amounts, times, types):
+        expected.append(one_by_one.matrix([u], [a], [k], [t])[0])
+        one_by_one.observe(u, a, t)
+    assert np.allclose(FeatureStore().replay(users, amounts, types, times), expected)
+
+def test_sync_skips_undecryptable_rows_and_advances(pool):
+    cipher = get_cipher('test-key')
+    insert(pool, [
+        ('a', cipher.encrypt(json.dumps({'amount': '10'})), iso(START)),
+        ('a', 'abc', iso(START + 1)),  # odd-length legacy hex: cannot even be decoded
+        ('a', cipher.encrypt('not json'), iso(START + 2)),
+        ('a', cipher.encrypt(json.dumps({'amount': '30'})).hex(), iso(START + 3)),
+    ])
+    store = FeatureStore(pool=pool, cipher=cipher)
+    store.sync()
+    assert store.last_id == 4 and store.skipped_rows == 2
+    assert store.n[store.slots['a']] == 2
+    insert(pool, [('a', cipher.encrypt(json.dumps({'amount': '50'})), iso(START + 4))])
+    store.sync()
+    assert store.last_id == 5 and store.n[store.slots['a']] == 3
+
+def test_checkpoint_round_trip(pool, tmp_path):
+    cipher = get_cipher('test-key')
+    insert(pool, [(f'u{i % 3}', cipher.encrypt(json.dumps({'amount': str(i)})), iso(START + i)) for i in range(30)])
+    path = str(tmp_path / 'features.npz')
+    store = FeatureStore.open(path, pool, cipher)
+    store.sync()
+    store.save()
+    resumed = FeatureStore.open(path, pool, cipher)
+    assert resumed.last_id == 30 and resumed.slots == store.slots
+    probe = (['u0', 'u1', 'u2'], [5, 5, 5], [0, 0, 0], [START + 40] * 3)
+    assert np.array_equal(resumed.matrix(*probe), store.matrix(*probe))
+
+def test_parse_timestamp():
+    assert parse_timestamp('2026-10-18T10:00:00Z') == parse_timestamp('2026-10-18T10:00:00')
+    assert parse_timestamp('2026-10-18T12:00:00+02:00') == parse_timestamp('2026-10-18T10:00:00Z')
+    assert parse_timestamp('yesterday') is None and parse_timestamp(None) is None
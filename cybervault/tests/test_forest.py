@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from ai.forest import CompiledForest, export_forest
+
+sklearn = pytest.importorskip('sklearn.ensemble')
+
+def test_compiled_forest_matches_sklearn(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 9)).astype(np.float32)
+    y = (X[:, 0] + X[:, 3] * X[:, 5] > 0.5).astype(int)
+    clf = sklearn.RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(X, y)
+    path = str(tmp_path / 'forest.npz')
+    export_forest(clf, path)
+    forest = CompiledForest.load(path)
+    probe = rng.normal(size=(2000, 9))
+    assert np.allclose(forest.predict_proba(probe), clf.predict_proba(probe.astype(np.float32)))
+    assert (forest.predict(probe) == clf.predict(probe.astype(np.float32))).all()
+
+def test_rejects_wrong_feature_count(tmp_path):
+    X = np.arange(40, dtype=np.float32).reshape(20, 2)
+    clf = sklearn.RandomForestClassifier(n_estimators=2, max_depth=2, random_state=0).fit(X, np.arange(20) % 2)
+    export_forest(clf, str(tmp_path / 'f.npz'))
+    with pytest.raises(ValueError):
+        CompiledForest.load(str(tmp_path / 'f.npz')).predict(np.zeros((3, 3)))
@@ -0,0 +1,69 @@
+import json
+import os
+import pytest
+from governance import governance
+from governance.governance import (activate_kill_switch, bulk_vote, get_proposal, load_proposals, submit_proposal,
+                                   vote_proposal)
+from security import get_cipher
+
+AES_KEY = 'test-key'
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(governance, 'GOVERNANCE_DB', str(tmp_path / 'governance.db'))
+    monkeypatch.setattr(governance, 'PROPOSALS_DB', str(tmp_path / 'governance_proposals.json'))
+    return tmp_path
+
+def test_proposal_round_trip(store):
+    proposal_id = submit_proposal('alice', {'fee': 2}, AES_KEY)
+    proposal = get_proposal(proposal_id)
+    assert proposal['proposer'] == 'alice' and proposal['change_data'] == {'fee': 2}
+    assert proposal['votes'] == ['alice'] and proposal['status'] == 'pending'
+    assert json.loads(get_cipher(AES_KEY).decrypt(bytes.fromhex(proposal['enc_data']))) == {'fee': 2}
+    assert load_proposals() == [proposal]
+    assert get_proposal('missing') is None
+
+def test_votes_reach_the_threshold_once_per_voter(store):
+    proposal_id = submit_proposal('alice', {'kill': True}, AES_KEY)
+    assert activate_kill_switch(AES_KEY) == 'No approved kill switch proposal.'
+    vote_proposal(proposal_id, 'bob')
+    vote_proposal(proposal_id, 'bob')
+    vote_proposal('missing', 'bob')
+    assert get_proposal(proposal_id)['status'] == 'pending'
+    vote_proposal(proposal_id, 'carol')
+    proposal = get_proposal(proposal_id)
+    assert proposal['status'] == 'approved' and proposal['votes'] == ['alice', 'bob', 'carol']
+    assert activate_kill_switch(AES_KEY) == 'System shutdown initiated.'
+
+def test_bulk_vote_counts_only_new_votes(store):
+    a = submit_proposal('alice', {'fee': 1}, AES_KEY)
+    b = submit_proposal('bob', {'fee': 2}, AES_KEY)
+    assert bulk_vote([(a, 'bob'), (a, 'bob'), (b, 'bob'), (b, 'carol'), ('missing', 'dave')]) == 2
+    assert [p['votes'] for p in load_proposals()] == [['alice', 'bob'], ['bob', 'carol']]
+
+def test_load_proposals_does_not_query_per_proposal(store):
+    for i in range(20):
+        proposal_id = submit_proposal(f'user{i}', {'n': i}, AES_KEY)
+        vote_proposal(proposal_id, 'reviewer')
+    statements = []
+    conn = governance._db()
+    conn.set_trace_callback(statements.append)
+    try:
+        proposals = load_proposals()
+    finally:
+        conn.set_trace_callback(None)
+    assert len(proposals) == 20 and all(len(p['votes']) == 2 for p in proposals)
+    assert len([s for s in statements if s.lstrip().upper().startswith('SELECT')]) == 2
+
+def test_legacy_json_proposals_are_imported_once(store):
+    legacy = [{'id': 'p1', 'proposer': 'alice', 'change_data': {'kill': True}, 'votes': ['alice', 'bob', 'carol'],
+               'timestamp': 1.0, 'status': 'approved', 'enc_data': get_cipher(AES_KEY).encrypt('{}').hex()}]
+    with open(governance.PROPOSALS_DB, 'w') as f:
+        json.dump(legacy, f)
+    proposal = get_proposal('p1')
+    assert {k: proposal[k] for k in ('proposer', 'change_data', 'votes', 'status')} == {
+        'proposer': 'alice', 'change_data': {'kill': True}, 'votes': ['alice', 'bob', 'carol'], 'status': 'approved'}
+    assert not os.path.exists(governance.PROPOSALS_DB)
+    assert os.path.exists(governance.PROPOSALS_DB + '.imported')
+    vote_proposal('p1', 'dave')
+    assert len(get_proposal('p1')['votes']) == 4
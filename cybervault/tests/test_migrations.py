@@ -0,0 +1,75 @@
+import sqlite3
+import pytest
+from migrations import MIGRATIONS, migrate, schema_version
+
+# The schema app.py created before migrations existed (user_version 0)
+BASELINE_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, pin_hash TEXT)',
+    'CREATE TABLE IF NOT EXISTS transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, data TEXT, status TEXT, fraud_flag INTEGER, timestamp TEXT)',
+    'CREATE TABLE IF NOT EXISTS blockchain (id INTEGER PRIMARY KEY, block_hash TEXT, prev_hash TEXT, data TEXT, timestamp TEXT)',
+)
+LATEST = MIGRATIONS[-1][0]
+
+@pytest.fixture
+def baseline(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'baseline.db'))
+    for stmt in BASELINE_SCHEMA:
+        conn.execute(stmt)
+    conn.execute("INSERT INTO transactions (user_id, data, status, fraud_flag, timestamp) VALUES ('u', 'abcd', 'queued', 0, '2026-10-18T10:00:00Z')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+def indexes(conn, table):
+    return {row[1]: bool(row[2]) for row in conn.execute(f'PRAGMA index_list({table})') if row[1].startswith('idx_')}
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+def test_versions_are_consecutive():
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, LATEST + 1))
+
+def test_baseline_database_is_upgraded(baseline):
+    assert schema_version(baseline) == 0
+    applied = migrate(baseline)
+    assert [version for version, _ in applied] == list(range(1, LATEST + 1))
+    assert schema_version(baseline) == LATEST
+    assert indexes(baseline, 'transactions') == {
+        'idx_transactions_user_id': False, 'idx_transactions_status': False,
+        'idx_transactions_timestamp': False, 'idx_transactions_content_id': True}
+    assert indexes(baseline, 'blockchain') == {'idx_blockchain_block_hash': False, 'idx_blockchain_prev_hash': False}
+    assert indexes(baseline, 'block_items') == {'idx_block_items_kind': False}
+    assert 'content_id' in columns(baseline, 'transactions') and 'item_count' in columns(baseline, 'blockchain')
+    for table in ('block_items', 'sessions', 'fraud_labels'):
+        assert columns(baseline, table)
+    # Existing rows survive
+    assert baseline.execute('SELECT user_id, data FROM transactions').fetchall() == [('u', 'abcd')]
+
+def test_lookups_use_the_new_indexes(baseline):
+    migrate(baseline)
+    plan = ' '.join(row[3] for row in baseline.execute('EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE user_id = ? ORDER BY id', ('u',)))
+    assert 'idx_transactions_user_id' in plan
+    plan = ' '.join(row[3] for row in baseline.execute('EXPLAIN QUERY PLAN SELECT * FROM blockchain WHERE block_hash = ?', ('h',)))
+    assert 'idx_blockchain_block_hash' in plan
+
+def test_migrate_is_idempotent(baseline):
+    migrate(baseline)
+    schema = baseline.execute('SELECT type, name, sql FROM sqlite_master ORDER BY name').fetchall()
+    assert migrate(baseline) == []
+    assert schema_version(baseline) == LATEST
+    assert baseline.execute('SELECT type, name, sql FROM sqlite_master ORDER BY name').fetchall() == schema
+
+def test_target_stops_early_and_resumes(baseline):
+    assert [v for v, _ in migrate(baseline, target=2)] == [1, 2]
+    assert schema_version(baseline) == 2
+    assert 'content_id' not in columns(baseline, 'transactions')
+    assert [v for v, _ in migrate(baseline)] == list(range(3, LATEST + 1))
+
+def test_failed_migration_is_rolled_back(baseline, monkeypatch):
+    broken = MIGRATIONS + [(LATEST + 1, 'broken', ['CREATE TABLE extra (id INTEGER)', 'NOT VALID SQL'])]
+    monkeypatch.setattr('migrations.MIGRATIONS', broken)
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(baseline)
+    # Everything before the broken step is applied; the broken step left nothing behind
+    assert schema_version(baseline) == LATEST
+    assert not baseline.execute("SELECT 1 FROM sqlite_master WHERE name = 'extra'").fetchone()
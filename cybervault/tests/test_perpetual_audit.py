@@ -0,0 +1,84 @@
+import datetime
+import json
+import os
+import pytest
+from modules import perpetual_audit
+from modules.perpetual_audit import AuditLogger, query, segment_paths, verify_chain
+
+@pytest.fixture
+def logger(tmp_path):
+    logger = AuditLogger(str(tmp_path / 'audit.log'))
+    yield logger
+    logger.close()
+
+def test_unserializable_details_raise_to_caller(logger):
+    for details in ({'raw': b'\x00'}, {'at': datetime.datetime.now()}):
+        with pytest.raises(TypeError):
+            logger.log('bad', details)
+    logger.log('good', {'n': 1})
+    logger.flush()
+    assert [e['action'] for e in query(path=logger.path)] == ['good']
+
+def test_int_keys_verify(logger):
+    logger.log('vote', {1: 'yes', 2: 'no'})
+    logger.log('vote', {'nested': {10: [1, 2]}})
+    logger.flush()
+    assert verify_chain(logger.path) == (True, 2, None)
+
+def test_query_by_action_and_time(logger):
+    for i in range(10):
+        logger.log('even' if i % 2 == 0 else 'odd', {'i': i})
+    logger.flush()
+    evens = list(query(action='even', path=logger.path))
+    assert [e['details']['i'] for e in evens] == [0, 2, 4, 6, 8]
+    start = evens[2]['timestamp']
+    assert all(e['timestamp'] >= start for e in query(start=start, path=logger.path))
+
+def test_tampering_is_detected(logger):
+    for i in range(3):
+        logger.log('transfer', {'amount': i})
+    logger.close()
+    with open(logger.path) as f:
+        lines = f.readlines()
+    lines[1] = lines[1].replace('"amount": 1', '"amount": 9')
+    with open(logger.path, 'w') as f:
+        f.writelines(lines)
+    assert verify_chain(logger.path) == (False, 1, (logger.path, 2))
+
+def test_segments_never_exceed_limit(tmp_path):
+    path = str(tmp_path / 'audit.log')
+    logger = AuditLogger(path, segment_bytes=4096)
+    with logger._cond:
+        # One large batch, so rotation has to happen between its records
+        for i in range(200):
+            logger._buffer.append((float(i), 'act', json.dumps({'action': 'act', 'details': {'i': i}, 'timestamp': float(i)}, sort_keys=True)))
+            logger._enqueued += 1
+        logger._cond.notify_all()
+    logger.flush()
+    logger.close()
+    segments = segment_paths(path)
+    assert len(segments) > 2
+    assert all(os.path.getsize(s) <= 4096 for s in segments)
+    assert verify_chain(path) == (True, 200, None)
+    assert [e['details']['i'] for e in query(path=path)] == list(range(200))
+
+def test_reads_in_bounded_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(perpetual_audit, 'READ_CHUNK', 50)
+    path = str(tmp_path / 'audit.log')
+    # A legacy (unchained) log, with lines longer than a chunk
+    with open(path, 'w') as f:
+        for i in range(100):
+            f.write(json.dumps({'timestamp': float(i), 'action': 'a' if i % 3 else 'b', 'details': {'pad': 'x' * (i % 70)}}) + '\n')
+    reads = []
+    real_open = open
+    def tracking_open(*args, **kwargs):
+        f = real_open(*args, **kwargs)
+        if args[0] == path and 'b' in args[1]:
+            read = f.read
+            f.read = lambda n=-1: reads.append(n) or read(n)
+        return f
+    monkeypatch.setattr('builtins.open', tracking_open)
+    perpetual_audit.build_index(path)
+    assert reads and all(0 < n <= 50 for n in reads)
+    assert len(list(query(action='b', path=path))) == 34
+    assert len(list(query(start=10, end=19, path=path))) == 10
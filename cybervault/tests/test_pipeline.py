@@ -0,0 +1,82 @@
+import json
+import os
+import sqlite3
+import time
+import pytest
+import ai.pipeline
+from ai.pipeline import AES_KEY, import_labels, train
+from migrations import migrate
+from security import get_cipher
+
+ROWS = 1200
+
+def seed(db_file, target=None):
+    conn = sqlite3.connect(db_file)
+    migrate(conn, target)
+    cipher = get_cipher(AES_KEY)
+    payloads = [json.dumps({'amount': str(5000 if i % 100 == 99 else 50 + i % 7), 'type': 'payment'}) for i in range(ROWS)]
+    with conn:
+        conn.executemany('INSERT INTO transactions (id, user_id, data, status, fraud_flag, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+                         [(i + 1, f'user-{i % 20}', e, 'queued', 0,
+                           time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(1_790_000_000 + 60 * i)))
+                          for i, e in enumerate(cipher.encrypt_many(payloads))])
+    conn.close()
+
+def write_labels(path, labels):
+    with open(path, 'w') as f:
+        f.write('transaction_id,label,source\n')
+        f.writelines(f'{tx_id},{label},chargeback\n' for tx_id, label in labels)
+
+def test_missing_label_table_fails_clearly(tmp_path):
+    db_file = str(tmp_path / 'cv.db')
+    seed(db_file, target=5)
+    with pytest.raises(ValueError, match='fraud_labels'):
+        train(db_file, workers=1, models_dir=str(tmp_path / 'models'))
+
+def test_single_class_labels_fail_clearly(tmp_path):
+    db_file = str(tmp_path / 'cv.db')
+    seed(db_file)
+    # An unscored table: fraud_flag is 0 everywhere, and only legitimate labels exist
+    write_labels(tmp_path / 'labels.csv', [(i, 0) for i in range(1, 101)])
+    import_labels(db_file, str(tmp_path / 'labels.csv'))
+    with pytest.raises(ValueError, match='both'):
+        train(db_file, workers=1, models_dir=str(tmp_path / 'models'))
+
+def test_trains_on_labeled_rows_only(tmp_path):
+    db_file = str(tmp_path / 'cv.db')
+    seed(db_file)
+    labels = [(i, int(i % 100 == 0)) for i in range(1, ROWS + 1) if i % 2 == 0]
+    write_labels(tmp_path / 'labels.csv', labels)
+    assert import_labels(db_file, str(tmp_path / 'labels.csv')) == len(labels)
+    _, report = train(db_file, fit_rows=10000, workers=1, chunk_rows=250, models_dir=str(tmp_path / 'models'))
+    assert report['rows'] == ROWS
+    assert report['rows_used'] == len(labels)
+    assert report['fraud_rows'] == sum(label for _, label in labels)
+    assert report['fits'] == 1 and report['dropped_rows'] == 0
+
+def test_pending_group_is_capped_while_a_class_is_missing(tmp_path):
+    db_file = str(tmp_path / 'cv.db')
+    seed(db_file)
+    # Fraud only shows up in the last rows, so early groups hold a single class
+    labels = [(i, int(i > ROWS - 50 and i % 100 > 50)) for i in range(1, ROWS + 1)]
+    write_labels(tmp_path / 'labels.csv', labels)
+    import_labels(db_file, str(tmp_path / 'labels.csv'))
+    _, report = train(db_file, fit_rows=100, workers=1, chunk_rows=50, models_dir=str(tmp_path / 'models'))
+    assert report['fits'] >= 1
+    assert report['dropped_rows'] > 0
+
+def test_runs_in_the_same_second_get_distinct_versions(tmp_path, monkeypatch):
+    db_file = str(tmp_path / 'cv.db')
+    seed(db_file)
+    write_labels(tmp_path / 'labels.csv', [(i, int(i % 100 == 0)) for i in range(1, ROWS + 1)])
+    import_labels(db_file, str(tmp_path / 'labels.csv'))
+    monkeypatch.setattr(time, 'gmtime', lambda *args: time.struct_time((2026, 10, 18, 10, 0, 0, 6, 291, 0)))
+    # No getrusage (as on Windows): the report leaves peak RSS empty
+    monkeypatch.setattr(ai.pipeline, 'resource', None)
+    models_dir = str(tmp_path / 'models')
+    first, _ = train(db_file, workers=1, models_dir=models_dir)
+    second, report = train(db_file, workers=1, models_dir=models_dir)
+    assert first != second
+    assert sorted(os.listdir(models_dir)) == sorted(os.path.basename(d) for d in (first, second))
+    assert set(os.listdir(second)) == {'fraud_model.npz', 'fraud_model.joblib', 'report.json'}
+    assert report['peak_rss_mb'] is None
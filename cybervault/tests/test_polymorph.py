@@ -0,0 +1,41 @@
+import os
+from modules.polymorph import is_polymorphed, polymorph_data, polymorph_directory, recover_data
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_roundtrip_and_rekey(tmp_path):
+    path = str(tmp_path / 'a.bin')
+    write(path, b'secret' * 1000)
+    key = polymorph_data(path)
+    assert is_polymorphed(path)
+    key2 = polymorph_data(path, old_key=key)
+    assert recover_data(path, key2)
+    assert read(path) == b'secret' * 1000
+
+def test_directory_failure_keeps_keys_of_rewritten_files(tmp_path):
+    contents = {name: os.urandom(100) + name.encode() for name in ('a', 'b', 'c')}
+    for name, data in contents.items():
+        write(str(tmp_path / name), data)
+    # b is already polymorphed and no key is given for it
+    polymorph_data(str(tmp_path / 'b'))
+    new_keys, errors = polymorph_directory(str(tmp_path), workers=2)
+    assert set(errors) == {str(tmp_path / 'b')}
+    assert set(new_keys) == {str(tmp_path / 'a'), str(tmp_path / 'c')}
+    for path, key in new_keys.items():
+        recover_data(path, key)
+        assert read(path) == contents[os.path.basename(path)]
+
+def test_directory_rekeys_with_given_keys(tmp_path):
+    path = str(tmp_path / 'a')
+    write(path, b'payload')
+    key = polymorph_data(path)
+    new_keys, errors = polymorph_directory(str(tmp_path), keys={path: key}, workers=1)
+    assert not errors
+    recover_data(path, new_keys[path])
+    assert read(path) == b'payload'
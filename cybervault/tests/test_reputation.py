@@ -0,0 +1,51 @@
+import pytest
+from blockchain.producer import BlockProducer
+from db import ConnectionPool
+from migrations import migrate
+from reputation import reputation
+from reputation.reputation import (LRUCache, index_sealed_reputation, init_reputation_index, query_reputation_from_chain,
+                                   reputation_committed, store_reputation_on_chain)
+from security import get_cipher
+
+AES_KEY = 'test-key'
+
+@pytest.fixture
+def chain(tmp_path, monkeypatch):
+    monkeypatch.setattr(reputation, '_cache', LRUCache())
+    pool = ConnectionPool(str(tmp_path / 'rep.db'))
+    conn = pool.connection()
+    migrate(conn)
+    init_reputation_index(AES_KEY, conn)
+    producer = BlockProducer(pool, get_cipher(AES_KEY), max_delay=0.001,
+                             on_seal=index_sealed_reputation, on_commit=reputation_committed)
+    yield conn, producer
+    producer.close()
+
+def test_stale_fill_is_not_cached():
+    cache = LRUCache()
+    token = cache.token()
+    cache.update('u', 2)
+    cache.put('u', 1, token)
+    assert cache.get('u') == 2
+    token = cache.token()
+    cache.invalidate(['u'])
+    cache.put('u', 1, token)
+    assert cache.get('u') is None
+
+def test_query_sees_update_once_store_returns(chain):
+    conn, producer = chain
+    store_reputation_on_chain('u', 1, AES_KEY, conn, producer)
+    assert query_reputation_from_chain('u', AES_KEY, conn) == 1
+    store_reputation_on_chain('u', 5, AES_KEY, conn, producer)
+    assert query_reputation_from_chain('u', AES_KEY, conn) == 5
+
+def test_lookup_racing_a_seal_cannot_cache_the_old_score(chain):
+    conn, producer = chain
+    store_reputation_on_chain('u', 1, AES_KEY, conn, producer)
+    # A lookup that missed the cache and read the index before the next block committed...
+    token = reputation._cache.token()
+    old = conn.execute('SELECT score FROM reputation_index WHERE user_id=?', ('u',)).fetchone()[0]
+    store_reputation_on_chain('u', 7, AES_KEY, conn, producer)
+    # ...fills the cache only after the commit: the fill is dropped
+    reputation._cache.put('u', old, token)
+    assert query_reputation_from_chain('u', AES_KEY, conn) == 7
@@ -0,0 +1,73 @@
+import http.client
+import json
+import socket
+import threading
+import time
+import pytest
+from server import BoundedThreadPoolServer, KeepAliveHandler
+
+class EchoHandler(KeepAliveHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = 5
+
+    def do_GET(self):
+        body = json.dumps({'path': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = BoundedThreadPoolServer(('127.0.0.1', 0), EchoHandler, max_workers=2, queue_depth=4, idle_timeout=1)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def get(conn, path):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    return json.loads(response.read())
+
+def test_idle_keepalive_connections_do_not_hold_workers(server):
+    port = server.server_address[1]
+    idle = [http.client.HTTPConnection('127.0.0.1', port, timeout=5) for _ in range(8)]
+    for conn in idle:
+        assert get(conn, '/idle') == {'path': '/idle'}
+    # Plus connections that never send anything
+    silent = [socket.create_connection(('127.0.0.1', port)) for _ in range(4)]
+    start = time.monotonic()
+    assert get(http.client.HTTPConnection('127.0.0.1', port, timeout=5), '/busy') == {'path': '/busy'}
+    assert time.monotonic() - start < 0.5
+    # Parked connections are still usable
+    for conn in idle:
+        assert get(conn, '/again') == {'path': '/again'}
+    for s in silent:
+        s.close()
+
+def test_pipelined_requests_are_all_served(server):
+    sock = socket.create_connection(('127.0.0.1', server.server_address[1]), timeout=5)
+    sock.sendall(b'GET /a HTTP/1.1\r\nHost: x\r\n\r\nGET /b HTTP/1.1\r\nHost: x\r\n\r\n')
+    data = b''
+    while data.count(b'"path"') < 2:
+        chunk = sock.recv(4096)
+        assert chunk
+        data += chunk
+    assert b'/a' in data and b'/b' in data
+    sock.close()
+
+def test_idle_connections_are_closed_after_timeout(server):
+    sock = socket.create_connection(('127.0.0.1', server.server_address[1]), timeout=5)
+    start = time.monotonic()
+    assert sock.recv(1) == b''
+    assert 0.9 < time.monotonic() - start < 4
+
+def test_port_in_use_raises_the_bind_error(server):
+    # TCPServer calls server_close() when bind fails; the bind error must surface
+    with pytest.raises(OSError):
+        BoundedThreadPoolServer(server.server_address, EchoHandler)
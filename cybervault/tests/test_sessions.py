@@ -0,0 +1,72 @@
+import sqlite3
+import time
+import pytest
+from migrations import migrate
+from sessions import SessionStore, hash_token
+
+class RecordingWriter:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def submit(self, sql, params=()):
+        with self.conn:
+            self.conn.execute(sql, params)
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)
+    return conn
+
+def test_expired_tokens_are_rejected_and_deleted(conn, monkeypatch):
+    store = SessionStore(RecordingWriter(conn), ttl=60)
+    token = store.create('alice')
+    assert store.validate(token) == 'alice'
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert store.validate(token) is None
+    assert len(store) == 0
+    assert conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0] == 0
+
+def test_least_recently_used_session_is_evicted(conn):
+    store = SessionStore(RecordingWriter(conn), max_sessions=2)
+    a, b = store.create('a'), store.create('b')
+    assert store.validate(a) == 'a'
+    c = store.create('c')
+    assert store.validate(b) is None
+    assert store.validate(a) == 'a' and store.validate(c) == 'c'
+    stored = {row[0] for row in conn.execute('SELECT token_hash FROM sessions')}
+    assert stored == {hash_token(a), hash_token(c)}
+
+def test_sessions_survive_a_restart_and_revoke_persists(conn):
+    store = SessionStore(RecordingWriter(conn))
+    a, b = store.create('a'), store.create('b')
+    assert store.revoke(b)
+    restarted = SessionStore(RecordingWriter(conn))
+    assert restarted.load(conn) == 1
+    assert restarted.validate(a) == 'a'
+    assert restarted.validate(b) is None
+    # Only hashes reach the database
+    assert conn.execute('SELECT COUNT(*) FROM sessions WHERE token_hash = ?', (a,)).fetchone()[0] == 0
+
+def test_login_sweeps_expired_sessions(conn, monkeypatch):
+    store = SessionStore(RecordingWriter(conn), ttl=60, sweep_interval=30)
+    stale = [store.create(f'user{i}') for i in range(5)]
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    # Nobody presents the stale tokens again; the next login clears them anyway
+    fresh = store.create('fresh')
+    assert len(store) == 1
+    assert store.validate(fresh) == 'fresh'
+    assert all(store.validate(t) is None for t in stale)
+    assert conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0] == 1
+
+def test_sweep_is_rate_limited(conn, monkeypatch):
+    store = SessionStore(RecordingWriter(conn), ttl=60, sweep_interval=120)
+    store.create('old')
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    store.create('new')
+    # The last sweep ran at construction, under sweep_interval ago
+    assert len(store) == 2
+    assert store.sweep() == 1 and len(store) == 1
@@ -0,0 +1,52 @@
+import base64
+import hashlib
+import pytest
+from mesh import reconcile
+from modules.set_reconcile import IBLT, IBLT_HEADER, IBLT_MAGIC
+
+def ids(start, stop):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(start, stop)]
+
+def test_decode_recovers_both_sides_of_the_difference():
+    ours, theirs = IBLT(96), IBLT(96)
+    ours.add_many(ids(0, 1000))
+    theirs.add_many(ids(20, 1010))
+    diff = ours.subtract(IBLT.from_b64(theirs.to_b64()))
+    only_ours, only_theirs = diff.decode()
+    assert sorted(only_ours) == sorted(ids(0, 20))
+    assert sorted(only_theirs) == sorted(ids(1000, 1010))
+
+def test_decode_reports_an_oversized_difference():
+    ours, theirs = IBLT(96), IBLT(96)
+    ours.add_many(ids(0, 500))
+    assert ours.subtract(theirs).decode() is None
+
+@pytest.mark.parametrize('raw', [
+    b'',
+    b'CVI',
+    IBLT_MAGIC,
+    IBLT_HEADER.pack(b'XXXX', 96) + bytes(96 * 44),
+    IBLT_HEADER.pack(IBLT_MAGIC, 0),
+    IBLT_HEADER.pack(IBLT_MAGIC, 97) + bytes(97 * 44),
+    IBLT_HEADER.pack(IBLT_MAGIC, 96) + bytes(96 * 44 - 1),
+    IBLT_HEADER.pack(IBLT_MAGIC, 2 ** 32 - 1) + bytes(100),
+])
+def test_malformed_bytes_raise_value_error(raw):
+    with pytest.raises(ValueError):
+        IBLT.from_bytes(raw)
+
+@pytest.mark.parametrize('request_body', [
+    {'iblt': base64.b64encode(b'CVI1').decode()},
+    {'iblt': 'not base64!'},
+    {'iblt': 12345},
+    {'iblt': None},
+    {'ids': [1, 2]},
+    {'ids': [['nested']]},
+])
+def test_reconcile_rejects_malformed_requests(request_body):
+    class Digest:
+        def difference(self, remote):
+            raise AssertionError('malformed table reached the digest')
+    # Raised before the database or digest is touched; the handler answers 400
+    with pytest.raises(ValueError):
+        reconcile(None, None, Digest(), request_body)
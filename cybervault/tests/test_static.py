@@ -0,0 +1,84 @@
+import gzip
+import os
+import pytest
+import static
+from static import StaticCache, choose_encoding
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / 'site'
+    root.mkdir()
+    (root / 'index.html').write_text('<html>' + 'index ' * 100 + '</html>')
+    (root / 'app.js').write_text('console.log(1);\n' * 50)
+    (root / 'tiny.css').write_text('a{}')
+    (tmp_path / 'secret.txt').write_text('outside the root')
+    return root, StaticCache(str(root))
+
+def test_etag_revalidation(site):
+    _, cache = site
+    asset = cache.lookup('/app.js')
+    assert asset.body == b'console.log(1);\n' * 50
+    assert asset.not_modified(asset.etag, None)
+    assert asset.not_modified(f'"other", W/{asset.etag_for("gzip")}', None)
+    assert not asset.not_modified('"other"', None)
+    assert asset.not_modified(None, asset.last_modified)
+    assert not asset.not_modified(None, 'Thu, 01 Jan 1970 00:00:00 GMT')
+
+def test_gzip_negotiation(site):
+    _, cache = site
+    asset = cache.lookup('/app.js')
+    assert gzip.decompress(asset.variants['gzip']) == asset.body
+    assert choose_encoding('gzip, deflate', asset.variants) == 'gzip'
+    assert choose_encoding('*', asset.variants) == 'gzip'
+    assert choose_encoding('gzip;q=0', asset.variants) is None
+    assert choose_encoding('identity', asset.variants) is None
+    assert choose_encoding(None, asset.variants) is None
+    # Too small to be worth compressing
+    assert cache.lookup('/tiny.css').variants == {}
+
+def test_traversal_and_unknown_paths_fall_back_to_index(site):
+    root, cache = site
+    index = cache.lookup('/')
+    assert index.path == os.path.join(str(root), 'index.html')
+    assert cache.lookup('/../secret.txt') is index
+    assert cache.lookup('/%2e%2e/secret.txt') is index
+    assert cache.lookup('/some/client/route') is index
+
+def test_null_byte_raises_value_error(site):
+    _, cache = site
+    with pytest.raises(ValueError):
+        cache.lookup('/app.js%00.png')
+
+def test_hits_skip_filesystem_work_until_the_interval(site, monkeypatch):
+    root, cache = site
+    asset = cache.lookup('/app.js')
+    def no_fs(*args):
+        raise AssertionError('filesystem touched on a cache hit')
+    monkeypatch.setattr(static.os.path, 'realpath', no_fs)
+    monkeypatch.setattr(static.os, 'stat', no_fs)
+    assert cache.lookup('/app.js') is asset
+
+def test_modified_file_is_reloaded(site, monkeypatch):
+    root, cache = site
+    old = cache.lookup('/app.js')
+    (root / 'app.js').write_text('changed();\n')
+    os.utime(root / 'app.js', ns=(old.mtime_ns + 10**9, old.mtime_ns + 10**9))
+    # Within the interval the cached copy is served
+    assert cache.lookup('/app.js') is old
+    monkeypatch.setattr(static, 'STAT_INTERVAL', 0)
+    new = cache.lookup('/app.js')
+    assert new.body == b'changed();\n' and new.etag != old.etag
+
+def test_new_file_replaces_index_fallback_after_invalidate(site):
+    root, cache = site
+    assert cache.lookup('/late.js').path.endswith('index.html')
+    (root / 'late.js').write_text('late();')
+    cache.invalidate()
+    assert cache.lookup('/late.js').body == b'late();'
+
+def test_url_cache_is_bounded(site):
+    _, cache = site
+    cache.max_urls = 10
+    for i in range(50):
+        cache.lookup(f'/route/{i}')
+    assert len(cache._urls) == 10
@@ -0,0 +1,73 @@
+import io
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from steg.steg import (HEADER, MAGIC, decode_bytes_from_image, decode_data_from_image,
+                       decode_images_to_stream, encode_bytes_to_image, encode_data_to_image, encode_stream_to_images)
+
+def lsb_image(path, payload, shape):
+    # Hand-built white image whose LSB plane starts with payload's bits (cut to fit)
+    img = np.full(shape, 255, dtype=np.uint8)
+    flat = img.reshape(-1)
+    bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))[:flat.size]
+    flat[:bits.size] = (flat[:bits.size] & 0xFE) | bits
+    Image.fromarray(img).save(path)
+    return path
+
+@pytest.mark.parametrize('payload', [b'', b'x', bytes(range(256)) * 40])
+def test_bytes_round_trip(tmp_path, payload):
+    path = encode_bytes_to_image(payload, str(tmp_path / 'p.png'))
+    assert decode_bytes_from_image(path) == payload
+
+def test_round_trip_through_a_cover_image(tmp_path):
+    cover = str(tmp_path / 'cover.png')
+    pixels = np.random.default_rng(1).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(cover)
+    payload = os.urandom(1000)
+    path = encode_bytes_to_image(payload, str(tmp_path / 'out.png'), cover)
+    assert decode_bytes_from_image(path) == payload
+    # Only the low bit of each channel changes
+    stego = np.asarray(Image.open(path))
+    assert stego.shape == pixels.shape and np.array_equal(stego >> 1, pixels >> 1)
+
+def test_payload_larger_than_the_cover_is_rejected(tmp_path):
+    cover = str(tmp_path / 'small.png')
+    Image.new('RGB', (8, 8), 'white').save(cover)
+    # 8x8x3 channels hold 24 bytes, the 12-byte header included
+    encode_bytes_to_image(b'x' * 12, str(tmp_path / 'fits.png'), cover)
+    with pytest.raises(ValueError, match='holds 24 bytes'):
+        encode_bytes_to_image(b'x' * 13, str(tmp_path / 'overflow.png'), cover)
+
+def test_truncated_header_decodes_to_none(tmp_path):
+    # Fewer pixel values than header bits
+    tiny = lsb_image(str(tmp_path / 'tiny.png'), HEADER.pack(MAGIC, 0)[:5], (2, 2, 3))
+    assert decode_bytes_from_image(tiny) is None
+    # A header that claims more payload than the image holds
+    claims = lsb_image(str(tmp_path / 'claims.png'), HEADER.pack(MAGIC, 10 ** 6) + b'abc', (16, 16, 3))
+    assert decode_bytes_from_image(claims) is None
+    # No magic: not one of ours
+    foreign = lsb_image(str(tmp_path / 'foreign.png'), HEADER.pack(b'XXXX', 3) + b'abc', (16, 16, 3))
+    assert decode_bytes_from_image(foreign) is None
+    # A correct header is read back exactly
+    ours = lsb_image(str(tmp_path / 'ours.png'), HEADER.pack(MAGIC, 3) + b'abc', (16, 16, 3))
+    assert decode_bytes_from_image(ours) == b'abc'
+
+def test_json_round_trip_and_legacy_images(tmp_path):
+    data = {'ledger': [1, 2, 3], 'note': 'ünïcode'}
+    assert decode_data_from_image(encode_data_to_image(data, str(tmp_path / 'd.png'))) == data
+    # Written before the length header: raw JSON in the LSB plane, trailing junk ignored
+    legacy = lsb_image(str(tmp_path / 'legacy.png'), b'{"old": true}', (8, 8, 3))
+    assert decode_data_from_image(legacy) == {'old': True}
+
+def test_stream_round_trip_across_images(tmp_path):
+    payload = os.urandom(10_000)
+    paths = encode_stream_to_images(io.BytesIO(payload), str(tmp_path / 'chunk'), chunk_size=3000)
+    assert len(paths) == 4
+    out = io.BytesIO()
+    assert decode_images_to_stream(paths, out) == len(payload)
+    assert out.getvalue() == payload
+    blank = str(tmp_path / 'blank.png')
+    Image.new('RGB', (16, 16), 'white').save(blank)
+    with pytest.raises(ValueError, match='No CyberVault payload'):
+        decode_images_to_stream([blank], io.BytesIO())
@@ -0,0 +1,75 @@
+import json
+import time
+import pytest
+from blockchain.blockchain import Block
+from blockchain.validator import FullValidationJob, init_checkpoints, validate_chain, validate_chain_full
+from db import ConnectionPool
+from migrations import migrate
+
+SECRET = 'test-secret'
+
+@pytest.fixture
+def chain(tmp_path):
+    db_file = str(tmp_path / 'chain.db')
+    conn = ConnectionPool(db_file).connection()
+    migrate(conn)
+    init_checkpoints(conn)
+    prev = ''
+    with conn:
+        for i in range(50):
+            block = Block(index=0, previous_hash=prev, timestamp=str(i), data=json.dumps({'n': i}))
+            conn.execute('INSERT INTO blockchain (block_hash, prev_hash, data, timestamp) VALUES (?, ?, ?, ?)',
+                         (block.hash, prev, block.data, block.timestamp))
+            prev = block.hash
+    return db_file, conn
+
+def tamper(conn, block_id):
+    with conn:
+        conn.execute("UPDATE blockchain SET data = '{}' WHERE id = ?", (block_id,))
+
+def test_incremental_checks_only_new_blocks(chain):
+    _, conn = chain
+    assert validate_chain(conn, SECRET) == {'valid': True, 'length': 50, 'checked': 50, 'first_invalid': None}
+    assert validate_chain(conn, SECRET)['checked'] == 0
+
+def test_only_the_latest_checkpoint_is_kept(chain):
+    _, conn = chain
+    prev = conn.execute('SELECT block_hash FROM blockchain ORDER BY id DESC LIMIT 1').fetchone()[0]
+    for i in range(5):
+        block = Block(index=0, previous_hash=prev, timestamp=f'n{i}', data='{}')
+        with conn:
+            conn.execute('INSERT INTO blockchain (block_hash, prev_hash, data, timestamp) VALUES (?, ?, ?, ?)',
+                         (block.hash, prev, block.data, block.timestamp))
+        prev = block.hash
+        assert validate_chain(conn, SECRET)['valid']
+    assert conn.execute('SELECT COUNT(*), MAX(length) FROM chain_checkpoints').fetchone() == (1, 55)
+    assert validate_chain(conn, SECRET) == {'valid': True, 'length': 55, 'checked': 0, 'first_invalid': None}
+
+def test_full_validation_finds_tampering_behind_a_checkpoint(chain):
+    db_file, conn = chain
+    validate_chain(conn, SECRET)
+    tamper(conn, 10)
+    # The incremental check trusts everything up to its checkpoint
+    assert validate_chain(conn, SECRET)['valid']
+    result = validate_chain_full(db_file, SECRET, workers=2)
+    assert not result['valid'] and result['first_invalid'] == 10
+
+def test_full_validation_job_runs_one_at_a_time(chain):
+    db_file, conn = chain
+    job = FullValidationJob(db_file, SECRET)
+    assert job.start()
+    assert not job.start()
+    deadline = time.time() + 60
+    while job.status()['running'] and time.time() < deadline:
+        time.sleep(0.05)
+    status = job.status()
+    assert not status['running']
+    assert status['result'] == {'valid': True, 'length': 50, 'checked': 50, 'first_invalid': None}
+    tamper(conn, 30)
+    assert job.start()
+    deadline = time.time() + 60
+    while job.status()['running'] and time.time() < deadline:
+        time.sleep(0.05)
+    status = job.status()
+    assert not status['running']
+    assert status['result']['first_invalid'] == 30